@@ -0,0 +1,370 @@
+"""
+Benchmarks for the cosinor and drinking-behaviour hot paths
+
+Every case runs over synthetic sheep (see disco_baa_01.synthetic): 5-minute
+readings with a circadian cosine, noise and injected drink drops. A case is
+timed sheep by sheep with its setup (building the day frames, writing the
+sheep's CSV) excluded, so 1000 sheep x 365 days never has to fit in memory.
+
+Usage:
+    python benchmarks/run_benchmarks.py              # 1, 100, 1000 sheep x 365 days
+    python benchmarks/run_benchmarks.py --sheep 1 --days 30 --repeat 5
+    python benchmarks/run_benchmarks.py --cases drink_detection \
+        drinking.detect_drinking_events
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/old.json
+
+Results are written as JSON to benchmarks/results/<timestamp>-<commit>.json
+(or --output). With --compare, the median times are compared case by case
+against an earlier results file and the run fails if any case got slower
+than --max-slowdown.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from disco_baa_01.cache import SeriesCache
+from disco_baa_01.cosinor import fit_cosinor
+from disco_baa_01.drinking import detect_drinking_events, mask_drinking_events
+from disco_baa_01.extraction import (
+    PERCENT_LIST,
+    drink_detection,
+    extract_pointed_temp_value,
+    perform_cosinor_analysis,
+    process_single_sheep_cosinor,
+    process_single_sheep_drinking,
+    remove_outliers_interpolate_drink,
+)
+from disco_baa_01.percentiles import pointed_temp_values_segments
+from disco_baa_01.periodogram import least_squares_periodogram, period_grid
+from disco_baa_01.resampling import resample_to_grid
+from disco_baa_01.sweep import DEFAULT_TEMP_THRESHES, sweep_drinking_thresholds
+from disco_baa_01.synthetic import (
+    SAMPLES_PER_DAY,
+    synthetic_sheep_frame,
+    synthetic_sheep_ids,
+)
+
+RESULTS_DIR = Path(__file__).parent / "results"
+DEFAULT_SHEEP = [1, 100, 1000]
+DEFAULT_DAYS = 365
+
+
+def _day_frames(sheep: pd.DataFrame, sheep_id: str) -> List[pd.DataFrame]:
+    """Per-day frames indexed by 'Datetime', as built by the per-day loop."""
+    sheep = sheep.copy()
+    sheep["time_hours"] = sheep["DT"].dt.hour + sheep["DT"].dt.minute / 60
+    sheep["Datetime"] = sheep["DT"]
+    sheep = sheep.set_index("Datetime")
+    return [day for _, day in sheep.groupby(sheep.index.date, sort=True)]
+
+
+def _case_perform_cosinor_analysis(sheep, sheep_id, tmp_dir):
+    days = _day_frames(sheep, sheep_id)
+    return lambda: [
+        perform_cosinor_analysis(day[sheep_id].dropna(), day["time_hours"])
+        for day in days
+    ]
+
+
+def _case_drink_detection(sheep, sheep_id, tmp_dir):
+    days = _day_frames(sheep, sheep_id)
+    return lambda: [drink_detection(day, sheep_id, temp_thresh=-0.5) for day in days]
+
+
+def _case_remove_outliers_interpolate_drink(sheep, sheep_id, tmp_dir):
+    days = _day_frames(sheep, sheep_id)
+    return lambda: [
+        remove_outliers_interpolate_drink(day.copy(), sheep_id, 35, -0.5)
+        for day in days
+    ]
+
+
+def _case_extract_pointed_temp_value(sheep, sheep_id, tmp_dir):
+    days = [day[sheep_id].dropna() for day in _day_frames(sheep, sheep_id)]
+    return lambda: [
+        extract_pointed_temp_value(day, percent / 100.0)
+        for day in days
+        for percent in PERCENT_LIST
+    ]
+
+
+def _case_fit_cosinor(sheep, sheep_id, tmp_dir):
+    values = sheep[sheep_id].to_numpy()
+    hours = (sheep["DT"].dt.hour + sheep["DT"].dt.minute / 60).to_numpy()
+    offsets = np.arange(0, len(values) + 1, SAMPLES_PER_DAY)
+    return lambda: fit_cosinor(values, hours, offsets)
+
+
+def _case_detect_drinking_events(sheep, sheep_id, tmp_dir):
+    values = sheep[sheep_id].to_numpy()
+    timestamps = sheep["DT"].to_numpy()
+    offsets = np.arange(0, len(values) + 1, SAMPLES_PER_DAY)
+    return lambda: detect_drinking_events(values, timestamps, -0.5, offsets=offsets)
+
+
+def _case_mask_drinking_events(sheep, sheep_id, tmp_dir):
+    values = sheep[sheep_id].to_numpy()
+    offsets = np.arange(0, len(values) + 1, SAMPLES_PER_DAY)
+    return lambda: mask_drinking_events(values, 35, -0.5, offsets=offsets)
+
+
+def _case_pointed_temp_values_segments(sheep, sheep_id, tmp_dir):
+    values = sheep[sheep_id].to_numpy()
+    offsets = np.arange(0, len(values) + 1, SAMPLES_PER_DAY)
+    fractions = [percent / 100.0 for percent in PERCENT_LIST]
+    return lambda: pointed_temp_values_segments(values, offsets, fractions)
+
+
+def _case_least_squares_periodogram(sheep, sheep_id, tmp_dir):
+    values = sheep[sheep_id].to_numpy()
+    hours = ((sheep["DT"] - sheep["DT"].iloc[0]) / pd.Timedelta(hours=1)).to_numpy()
+    periods = period_grid()
+    return lambda: least_squares_periodogram(values, hours, periods)
+
+
+def _case_resample_to_grid(sheep, sheep_id, tmp_dir):
+    # Irregular input: every 50th reading missing, the rest jittered by up to a minute
+    kept = sheep.iloc[np.arange(len(sheep)) % 50 != 0]
+    jitter = (
+        np.random.default_rng(0).integers(-60, 60, len(kept)).astype("timedelta64[s]")
+    )
+    timestamps = kept["DT"].to_numpy() + jitter
+    values = kept[sheep_id].to_numpy()
+    return lambda: resample_to_grid(timestamps, values, min_value=35)
+
+
+def _case_sweep_drinking_thresholds(sheep, sheep_id, tmp_dir):
+    return lambda: sweep_drinking_thresholds(sheep, sheep_id, DEFAULT_TEMP_THRESHES)
+
+
+def _write_csv(sheep, sheep_id, tmp_dir) -> Path:
+    path = Path(tmp_dir) / f"{sheep_id}.csv"
+    sheep.to_csv(path, index=False)
+    return path
+
+
+def _case_process_single_sheep_cosinor(sheep, sheep_id, tmp_dir):
+    path = _write_csv(sheep, sheep_id, tmp_dir)
+    return lambda: process_single_sheep_cosinor(path, sheep_id)
+
+
+def _case_process_single_sheep_drinking(sheep, sheep_id, tmp_dir):
+    path = _write_csv(sheep, sheep_id, tmp_dir)
+    return lambda: process_single_sheep_drinking(path, sheep_id)
+
+
+def _case_process_single_sheep_cosinor_cached(sheep, sheep_id, tmp_dir):
+    path = _write_csv(sheep, sheep_id, tmp_dir)
+    cache_dir = Path(tmp_dir) / "cache"
+    SeriesCache(cache_dir).warm([(sheep_id, path)])
+    return lambda: process_single_sheep_cosinor(path, sheep_id, cache_dir=cache_dir)
+
+
+# name -> setup(sheep_frame, sheep_id, tmp_dir) returning the callable to time
+CASES: Dict[str, Callable] = {
+    "perform_cosinor_analysis": _case_perform_cosinor_analysis,
+    "drink_detection": _case_drink_detection,
+    "remove_outliers_interpolate_drink": _case_remove_outliers_interpolate_drink,
+    "extract_pointed_temp_value": _case_extract_pointed_temp_value,
+    "cosinor.fit_cosinor": _case_fit_cosinor,
+    "drinking.detect_drinking_events": _case_detect_drinking_events,
+    "drinking.mask_drinking_events": _case_mask_drinking_events,
+    "percentiles.pointed_temp_values_segments": _case_pointed_temp_values_segments,
+    "periodogram.least_squares_periodogram": _case_least_squares_periodogram,
+    "resampling.resample_to_grid": _case_resample_to_grid,
+    "sweep.sweep_drinking_thresholds": _case_sweep_drinking_thresholds,
+    "process_single_sheep_cosinor": _case_process_single_sheep_cosinor,
+    "process_single_sheep_drinking": _case_process_single_sheep_drinking,
+    "process_single_sheep_cosinor[cached]": _case_process_single_sheep_cosinor_cached,
+}
+
+
+def _iter_sheep(n_sheep: int, n_days: int, seed: int) -> Iterator[tuple]:
+    for i, sheep_id in enumerate(synthetic_sheep_ids(n_sheep)):
+        yield sheep_id, synthetic_sheep_frame(sheep_id, n_days, seed=seed + i)
+
+
+def time_case(
+    name: str, n_sheep: int, n_days: int, repeat: int = 3, seed: int = 0
+) -> dict:
+    """
+    Time one case over n_sheep synthetic sheep.
+
+    Each repetition sums the timed calls of every sheep; setup is excluded.
+
+    Returns:
+        Result record with the per-repetition times and summary statistics
+    """
+    setup = CASES[name]
+    times = [0.0] * repeat
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for sheep_id, sheep in _iter_sheep(n_sheep, n_days, seed):
+            run = setup(sheep, sheep_id, tmp_dir)
+            for r in range(repeat):
+                start = time.perf_counter()
+                run()
+                times[r] += time.perf_counter() - start
+    median = statistics.median(times)
+    return {
+        "name": name,
+        "n_sheep": n_sheep,
+        "n_days": n_days,
+        "repeat": repeat,
+        "times_s": times,
+        "min_s": min(times),
+        "median_s": median,
+        "per_sheep_day_us": median / (n_sheep * n_days) * 1e6,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment_info() -> dict:
+    """Commit and library versions the results were measured with."""
+    import scipy
+
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "scipy": scipy.__version__,
+    }
+
+
+def run_benchmarks(
+    cases: List[str],
+    sheep_counts: List[int],
+    n_days: int = DEFAULT_DAYS,
+    repeat: int = 3,
+    seed: int = 0,
+    verbose: bool = True,
+) -> dict:
+    """
+    Run the given cases at each sheep count.
+
+    Returns:
+        {"environment": ..., "results": [...]} ready to be saved as JSON
+    """
+    results = []
+    for n_sheep in sheep_counts:
+        for name in cases:
+            record = time_case(name, n_sheep, n_days, repeat, seed)
+            results.append(record)
+            if verbose:
+                print(
+                    f"{name:<42} {n_sheep:>5} sheep x {n_days} days  "
+                    f"median {record['median_s']:9.3f} s  "
+                    f"({record['per_sheep_day_us']:9.1f} us/sheep-day)"
+                )
+    return {"environment": environment_info(), "results": results}
+
+
+def compare_results(current: dict, baseline: dict) -> pd.DataFrame:
+    """
+    Median time ratio (current / baseline) for every case measured in both runs.
+    """
+
+    def medians(report):
+        return {
+            (r["name"], r["n_sheep"], r["n_days"]): r["median_s"]
+            for r in report["results"]
+        }
+
+    now, before = medians(current), medians(baseline)
+    rows = [
+        {
+            "name": key[0],
+            "n_sheep": key[1],
+            "n_days": key[2],
+            "baseline_s": before[key],
+            "current_s": now[key],
+            "ratio": now[key] / before[key] if before[key] > 0 else np.nan,
+        }
+        for key in now
+        if key in before
+    ]
+    return pd.DataFrame(
+        rows, columns=["name", "n_sheep", "n_days", "baseline_s", "current_s", "ratio"]
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--cases", nargs="+", choices=sorted(CASES), default=list(CASES)
+    )
+    parser.add_argument("--sheep", nargs="+", type=int, default=DEFAULT_SHEEP)
+    parser.add_argument("--days", type=int, default=DEFAULT_DAYS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument(
+        "--compare", type=Path, default=None, help="Earlier results JSON"
+    )
+    parser.add_argument("--max-slowdown", type=float, default=1.2)
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.cases, args.sheep, args.days, args.repeat, args.seed)
+
+    output = args.output
+    if output is None:
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = (
+            RESULTS_DIR
+            / f"{stamp}-{report['environment']['commit'] or 'nocommit'}.json"
+        )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare is not None:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        comparison = compare_results(report, baseline)
+        print(comparison.to_string(index=False))
+        regressions = comparison[comparison["ratio"] > args.max_slowdown]
+        if not regressions.empty:
+            print(
+                f"{len(regressions)} case(s) slower than "
+                f"{args.max_slowdown}x the baseline"
+            )
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
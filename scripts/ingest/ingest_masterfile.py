@@ -2,18 +2,36 @@
 
 This module ingests the masterfile (.xlsx), reads the target sheet
 (default: 'RF Ewe.ram data'), and persists the ingested data to CSV and
-Parquet. Object columns are cast to strings to ensure Parquet compatibility.
+Parquet. The Parquet copy goes through optimize_dtypes: dates become
+datetime64, numbers stored as text become compact numeric dtypes, and
+repetitive text becomes categoricals, with missing values kept as nulls.
+
+Runs are recorded in the pipeline manifest (input hash, sheet name and
+CLEANING_RULES_VERSION); ingestion is skipped when none of them changed and
+the artifacts still exist.
 
 Import and call `ingest_masterfile_sheet()` from other modules, or run this
-file directly to perform the ingestion with defaults.
+file directly to perform the ingestion with defaults. To ingest and filter
+with a single Excel parse, use `run_masterfile_pipeline.py` instead.
 """
-from definitions import RAW_DATA_DIR, INCOMING_DATA_DIR
+from definitions import RAW_DATA_DIR, INCOMING_DATA_DIR, PIPELINE_MANIFEST_PATH
 
 from pathlib import Path
 from typing import Optional, Tuple
 
 import pandas as pd
 
+from disco_baa_01.manifest import Manifest
+# Cleaning rules live in the package so the single-pass pipeline can share them
+from disco_baa_01.masterfile import (  # noqa: F401 (re-exported)
+    CLEANING_RULES_VERSION,
+    clean,
+    clean_temp_logger_ids,
+    document_anomalies,
+    document_dropped_rows,
+    write_artifacts,
+)
+
 # inputs
 HEAT_STRESS_MASTERFILE_MAY_2024_XLSX = INCOMING_DATA_DIR / "Heat Stress Masterfile May 2024.xlsx"
 SHEET_NAME = "RF Ewe.ram data"
@@ -23,119 +41,20 @@ DEFAULT_OUTPUT_CSV = RAW_DATA_DIR / f"{HEAT_STRESS_MASTERFILE_MAY_2024_XLSX.stem
 DEFAULT_OUTPUT_PARQUET = RAW_DATA_DIR / f"{HEAT_STRESS_MASTERFILE_MAY_2024_XLSX.stem} - {SHEET_NAME}.parquet"
 
 
-def clean_temp_logger_ids(df):
-    
-    columns = [
-        "Temp logger # 2022",
-        "Temp logger # 2023",
-        "Temp logger # 2024",
-    ]
-
-    # Values that should be ignored when checking for unexpected fractional values
-    allowed_fractional_values = [
-        0.7,  # Known data entry artifact; row will be dropped
-    ]
-
-    def _to_nullable_int(col_name: str, series: pd.Series) -> pd.Series:
-        numeric = pd.to_numeric(series, errors="coerce")
-
-        # Alert on fractional values before conversion (excluding allowed values)
-        fractional_mask = numeric.notna() & (numeric % 1 != 0)
-        fractional_mask = fractional_mask & ~numeric.isin(allowed_fractional_values)
-        
-        if fractional_mask.any():
-            sample_indices = numeric.loc[fractional_mask].head(5).index.tolist()
-            sample_values = numeric.loc[fractional_mask].head(5).tolist()
-            raise ValueError(
-                f"Column '{col_name}' has {fractional_mask.sum()} fractional values; "
-                f"first examples (index -> value): {list(zip(sample_indices, sample_values))}"
-            )
-
-        return numeric.astype("Int64")
-
-    # Identify rows with allowed fractional values (to be dropped)
-    rows_to_drop = pd.Series([False] * len(df), index=df.index)
-    for col in columns:
-        if col in df.columns:
-            numeric = pd.to_numeric(df[col], errors="coerce")
-            rows_to_drop |= numeric.isin(allowed_fractional_values)
-    
-    dropped_rows = df[rows_to_drop].copy()
-    df = df[~rows_to_drop].reset_index(drop=True)
-    
-    # convert columns to nullable int
-    for col in columns:
-        if col in df.columns:
-            df[col] = _to_nullable_int(col, df[col])
-    
-    return df, dropped_rows
-
-
-def clean(df) -> Tuple[pd.DataFrame, pd.DataFrame]:
-    df, dropped_rows = clean_temp_logger_ids(df)
-
-    return df, dropped_rows
-
-
-def document_anomalies(df: pd.DataFrame, anomalies_path: Path) -> None:
-    """Analyze dataframe for known anomalies and write details to a text file.
-
-    Current checks:
-    - Rows with a 2023 pregnancy scan result but missing 2023 scan date.
-    - Specific EID "940 110009540002" flagged if present with the above condition.
-    """
-    lines: list[str] = []
-    lines.append("Data Ingestion Anomalies\n")
-    lines.append("=========================\n\n")
-
-    # Check: 2023 preg scan has result but no date
-    preg_result_col = "Preg scan 2023"
-    preg_date_col = "date of preg scanning 2023"
-    eid_col = "EID"
-
-    if preg_result_col in df.columns and preg_date_col in df.columns:
-        mask = df[preg_result_col].astype(str).str.strip().ne("") & df[preg_date_col].isna()
-        count = int(mask.sum())
-        lines.append(
-            f"Rows with '{preg_result_col}' present but missing '{preg_date_col}': {count}\n"
-        )
-        if count:
-            # Include a small sample for quick inspection
-            cols_to_show = [c for c in [eid_col, preg_result_col, preg_date_col] if c in df.columns]
-            sample = df.loc[mask, cols_to_show].head(10)
-            lines.append("Sample (up to 10 rows):\n")
-            lines.append(sample.to_string(index=True) + "\n\n")
-
-            # Specific EID of interest
-            if eid_col in df.columns:
-                specific_eid = "940 110009540002"
-                specific_mask = mask & (df[eid_col] == specific_eid)
-                if specific_mask.any():
-                    lines.append(
-                        f"Specific EID '{specific_eid}' exhibits anomaly. Details:\n"
-                    )
-                    lines.append(
-                        df.loc[specific_mask, cols_to_show].to_string(index=True) + "\n\n"
-                    )
-    else:
-        lines.append(
-            f"Columns not found to check preg-scan anomaly: present={preg_result_col in df.columns}, date_col_present={preg_date_col in df.columns}\n\n"
-        )
-
-    # Write anomalies report if there is any content
-    if lines:
-        with open(anomalies_path, "w", encoding="utf-8") as f:
-            f.writelines(lines)
-
-
 def ingest_masterfile_sheet(
     input_filepath: Path,
     sheet_name: str = SHEET_NAME,
     output_csv_path: Optional[Path] = None,
     output_parquet_path: Optional[Path] = None,
+    manifest_path: Optional[Path] = PIPELINE_MANIFEST_PATH,
+    force: bool = False,
 ) -> Tuple[Path, Path]:
     """Ingest an Excel masterfile sheet and persist to CSV and Parquet.
 
+    The Excel file is only parsed when its content hash, the sheet name or
+    CLEANING_RULES_VERSION differ from the last recorded run, or when an
+    artifact is missing.
+
     Args:
         input_filepath: Path to the masterfile Excel to ingest.
         sheet_name: Name of the sheet to extract.
@@ -144,6 +63,9 @@ def ingest_masterfile_sheet(
         output_parquet_path: Optional path for the Parquet artifact. If None, a
             default path will be created in RAW_DATA_DIR as
             "<input-stem> - <sheet>.parquet".
+        manifest_path: Pipeline manifest to check and update. If None, the
+            sheet is always ingested and nothing is recorded.
+        force: Ingest even if the manifest says the artifacts are current.
 
     Returns:
         A tuple of (csv_path, parquet_path).
@@ -152,6 +74,17 @@ def ingest_masterfile_sheet(
     input_stem = Path(input_filepath).stem
     csv_path = output_csv_path or (RAW_DATA_DIR / f"{input_stem} - {sheet_name}.csv")
     parquet_path = output_parquet_path or (RAW_DATA_DIR / f"{input_stem} - {sheet_name}.parquet")
+    anomalies_path = RAW_DATA_DIR / f"{HEAT_STRESS_MASTERFILE_MAY_2024_XLSX.stem} - {SHEET_NAME} - ANOMALIES.txt"
+
+    # Skip the Excel parse entirely when nothing the artifacts depend on changed
+    manifest = Manifest(manifest_path) if manifest_path is not None else None
+    step = f"ingest: {input_stem} - {sheet_name}"
+    step_inputs = {"masterfile": input_filepath}
+    step_params = {"sheet_name": sheet_name, "cleaning_rules_version": CLEANING_RULES_VERSION}
+    step_outputs = [csv_path, parquet_path, anomalies_path]
+    if manifest is not None and not force and manifest.is_current(step, step_inputs, step_params, step_outputs):
+        print(f"Ingestion up to date, skipping: {input_filepath} [{sheet_name}]")
+        return csv_path, parquet_path
 
     # Ingest: read Excel and extract target sheet
     df = pd.read_excel(str(input_filepath), sheet_name=sheet_name)
@@ -159,29 +92,17 @@ def ingest_masterfile_sheet(
     df, dropped_rows = clean(df)
 
     # Document dropped rows
-    if not dropped_rows.empty:
-        comments_path = RAW_DATA_DIR / f"{HEAT_STRESS_MASTERFILE_MAY_2024_XLSX.stem} - {SHEET_NAME} - DROPPED_ROWS.txt"
-        with open(comments_path, "w", encoding="utf-8") as f:
-            f.write("Rows Dropped During Data Ingestion\n")
-            f.write("===================================\n\n")
-            f.write(f"Total rows dropped: {len(dropped_rows)}\n\n")
-            f.write("Reason: Rows with invalid fractional values in temp logger columns\n")
-            f.write("- 0.7: Known data entry artifact; row(s) removed as data quality issue\n\n")
-            f.write("Dropped row details:\n")
-            f.write(dropped_rows.to_string())
+    comments_path = RAW_DATA_DIR / f"{HEAT_STRESS_MASTERFILE_MAY_2024_XLSX.stem} - {SHEET_NAME} - DROPPED_ROWS.txt"
+    document_dropped_rows(dropped_rows, comments_path)
 
     # Document anomalies (non-dropping issues)
-    anomalies_path = RAW_DATA_DIR / f"{HEAT_STRESS_MASTERFILE_MAY_2024_XLSX.stem} - {SHEET_NAME} - ANOMALIES.txt"
     document_anomalies(df, anomalies_path)
 
-    # Persist ingestion artifacts
-    df.to_csv(csv_path, index=False)
+    # Persist ingestion artifacts (Parquet dtypes compacted by optimize_dtypes)
+    write_artifacts(df, csv_path, parquet_path)
 
-    # Ensure Parquet compatibility by casting object columns to string
-    df_w_strings = df.copy()
-    for col in df.select_dtypes(include=["object"]).columns:
-        df_w_strings[col] = df_w_strings[col].astype(str)
-    df_w_strings.to_parquet(parquet_path, index=False)
+    if manifest is not None:
+        manifest.record(step, step_inputs, step_params, step_outputs)
 
     return csv_path, parquet_path
 
@@ -0,0 +1,31 @@
+"""Ingest, clean and filter the Heat Stress Masterfile with one Excel parse.
+
+Chains the work of `ingest_masterfile.py` and `01_filter_masterfile.py` on a
+single in-memory frame. Steps whose inputs are unchanged (per the pipeline
+manifest) are skipped; if only the filter rules changed, filtering starts
+from the ingested Parquet without opening the workbook.
+"""
+
+from definitions import RAW_DATA_DIR, INCOMING_DATA_DIR, PIPELINE_MANIFEST_PATH
+
+from disco_baa_01.masterfile import SHEET_NAME, run_masterfile_pipeline
+
+# inputs
+HEAT_STRESS_MASTERFILE_MAY_2024_XLSX = (
+    INCOMING_DATA_DIR / "Heat Stress Masterfile May 2024.xlsx"
+)
+
+# outputs
+FILTERED_OUTPUT_STEM = RAW_DATA_DIR / "filtered" / "disco_baa_01_filtered_masterfile"
+
+
+if __name__ == "__main__":
+    paths = run_masterfile_pipeline(
+        input_filepath=HEAT_STRESS_MASTERFILE_MAY_2024_XLSX,
+        output_dir=RAW_DATA_DIR,
+        filtered_stem=FILTERED_OUTPUT_STEM,
+        sheet_name=SHEET_NAME,
+        manifest_path=PIPELINE_MANIFEST_PATH,
+    )
+    for name, path in paths.items():
+        print(f"{name}: {path}")
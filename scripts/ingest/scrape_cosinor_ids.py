@@ -2,6 +2,7 @@ from pathlib import Path
 import pandas as pd
 
 from definitions import INCOMING_COSINOR_ANALYSIS_DIRECTORY, INTERIM_DATA_DIR
+from disco_baa_01.sink import sheep_ids, sink_path
 
 #!/usr/bin/env python3
 
@@ -14,10 +15,21 @@ def extract_prefixes(directory: Path, prefix_len: int = 5) -> tuple[list[str], l
     prefixes = [name[:prefix_len] for name in files]
     return files, prefixes
 
+
+def extract_dataset_ids(directory: Path) -> tuple[list[str], list[str]] | None:
+    """IDs from a consolidated cosinor_features.parquet's metadata, if there is one."""
+    dataset = sink_path(directory, "cosinor_features")
+    if not dataset.exists():
+        return None
+    ids = sheep_ids(dataset)
+    return [dataset.name] * len(ids), ids
+
 def main():
     src_dir = INCOMING_COSINOR_ANALYSIS_DIRECTORY  # change to your target directory
-    files, prefixes = extract_prefixes(src_dir, prefix_len=5)
-    
+    # Consolidated output carries its IDs in the file footer; per-sheep CSVs encode them in the name
+    found = extract_dataset_ids(src_dir)
+    files, prefixes = found if found is not None else extract_prefixes(src_dir, prefix_len=5)
+
     out_base = OUTPUT_DIR
     out_base.mkdir(parents=True, exist_ok=True)
 
@@ -31,4 +43,4 @@ def main():
     print(f"Wrote {csv_path} and {parquet_path}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,18 +1,21 @@
-"""Plot cosinor fitted curves for consecutive 24-hour periods."""
+"""Plot cosinor fitted curves for consecutive 24-hour periods, or for a whole herd."""
 
 from __future__ import annotations
 
 import argparse
 from pathlib import Path
 
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 
+from disco_baa_01.plotting import DEFAULT_GRID, curve_matrix, plot_herd_cosinor
 
-def compute_cosinor_curve(time_hours: np.ndarray, mesor: float, amplitude: float, phase: float) -> np.ndarray:
-    """Compute the cosinor fitted curve for a 24-hour period."""
-    angular_frequency = 2 * np.pi / 24
+
+def compute_cosinor_curve(
+    time_hours: np.ndarray, mesor: float, amplitude: float, phase: float, period: float = 24.0
+) -> np.ndarray:
+    """Compute the cosinor fitted curve (24-hour period unless given)."""
+    angular_frequency = 2 * np.pi / period
     return mesor + amplitude * np.cos(angular_frequency * time_hours + phase)
 
 
@@ -23,21 +26,22 @@ def plot_consecutive_cosinor_fits(
     output_path: Path,
 ) -> None:
     """Plot cosinor fits for a consecutive block of days."""
-    data = data.sort_values(["record_date", "record_num"]).reset_index(drop=True)
-    subset = data.iloc[start_index : start_index + periods]
+    # pyplot is only needed here; --herd mode renders without it
+    import matplotlib.pyplot as plt
 
-    time_hours = np.linspace(0, 24, 240)
+    order = np.lexsort((data["record_num"].to_numpy(), data["record_date"].to_numpy()))
+    subset = data.iloc[order[start_index : start_index + periods]]
 
-    fig, ax = plt.subplots(figsize=(10, 6))
+    time_hours, curves = curve_matrix(subset["M"], subset["A"], subset["phi"])
+    labels = [f"{date} (#{int(num)})" for date, num in zip(subset["record_date"], subset["record_num"])]
 
-    for _, row in subset.iterrows():
-        fitted = compute_cosinor_curve(time_hours, row["M"], row["A"], row["phi"])
-        label = f"{row['record_date']} (#{int(row['record_num'])})"
-        ax.plot(time_hours, fitted, label=label, linewidth=1.5, alpha=0.85)
+    fig, ax = plt.subplots(figsize=(10, 6))
+    for line, label in zip(ax.plot(time_hours, curves.T, linewidth=1.5, alpha=0.85), labels):
+        line.set_label(label)
 
     ax.set_xlabel("Time (hours)")
     ax.set_ylabel("Fitted value")
-    ax.set_title("Cosinor fitted curves (10 consecutive 24-hour periods)")
+    ax.set_title(f"Cosinor fitted curves ({len(subset)} consecutive 24-hour periods)")
     ax.set_xlim(0, 24)
     ax.grid(True, alpha=0.3)
     ax.legend(fontsize=8, ncol=2, frameon=False)
@@ -45,6 +49,7 @@ def plot_consecutive_cosinor_fits(
     output_path.parent.mkdir(parents=True, exist_ok=True)
     fig.tight_layout()
     fig.savefig(output_path, dpi=200)
+    plt.close(fig)
 
 
 def main() -> None:
@@ -73,8 +78,41 @@ def main() -> None:
         default=Path("artifacts/cosinor_fits.png"),
         help="Output path for the generated plot.",
     )
+    parser.add_argument(
+        "--herd",
+        type=Path,
+        default=None,
+        help="Consolidated cosinor_features.parquet (or CSV with a sheep_id column); "
+        "plots every sheep as a paged panel grid to --output (.pdf or .png).",
+    )
+    parser.add_argument(
+        "--grid",
+        type=int,
+        nargs=2,
+        default=list(DEFAULT_GRID),
+        metavar=("ROWS", "COLS"),
+        help="Panels per page in --herd mode.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Processes rendering PNG pages in --herd mode.",
+    )
     args = parser.parse_args()
 
+    if args.herd is not None:
+        columns = ["sheep_id", "record_date", "M", "A", "phi"]
+        if args.herd.suffix == ".parquet":
+            features = pd.read_parquet(args.herd, columns=columns)
+        else:
+            features = pd.read_csv(args.herd, usecols=columns)
+        paths = plot_herd_cosinor(
+            features, args.output, rows=args.grid[0], cols=args.grid[1], workers=args.workers
+        )
+        print(f"Wrote {len(paths)} file(s), first: {paths[0] if paths else None}")
+        return
+
     data = pd.read_csv(args.csv)
     plot_consecutive_cosinor_fits(data, args.start, args.periods, args.output)
 
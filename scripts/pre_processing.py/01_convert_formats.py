@@ -2,13 +2,21 @@
 
 This script reads the 'RF Ewe.ram data' sheet from the Heat Stress Masterfile
 May 2024 Excel file and converts it to both CSV and Parquet formats for easier
-data processing. Object columns are converted to strings for Parquet compatibility.
+data processing. The Parquet copy gets compact dtypes (see
+disco_baa_01.utils.optimize_dtypes), which also keeps mixed-type columns
+Parquet-compatible.
+
+The conversion is skipped when the workbook's content hash and the sheet name
+match the last run recorded in the pipeline manifest and both outputs exist.
 """
-from definitions import RAW_DATA_DIR
+from definitions import RAW_DATA_DIR, PIPELINE_MANIFEST_PATH
 from pathlib import Path
 
 import pandas as pd
 
+from disco_baa_01.manifest import Manifest
+from disco_baa_01.utils import optimize_dtypes
+
 # inputs
 HEAT_STRESS_MASTERFILE_MAY_2024_xlsx = "Heat Stress Masterfile May 2024.xlsx"
 SHEET_NAME = "RF Ewe.ram data"
@@ -18,14 +26,22 @@ OUTPUT_CSV = RAW_DATA_DIR / f"{Path(HEAT_STRESS_MASTERFILE_MAY_2024_xlsx).stem}
 OUTPUT_PARQUET = RAW_DATA_DIR / f"{Path(HEAT_STRESS_MASTERFILE_MAY_2024_xlsx).stem} - {SHEET_NAME}.parquet"
 
 
-df = pd.read_excel(str(RAW_DATA_DIR / HEAT_STRESS_MASTERFILE_MAY_2024_xlsx), sheet_name=SHEET_NAME)
+manifest = Manifest(PIPELINE_MANIFEST_PATH)
+step = f"convert: {HEAT_STRESS_MASTERFILE_MAY_2024_xlsx} - {SHEET_NAME}"
+step_inputs = {"masterfile": RAW_DATA_DIR / HEAT_STRESS_MASTERFILE_MAY_2024_xlsx}
+step_params = {"sheet_name": SHEET_NAME, "parquet_dtypes": "optimized"}
+step_outputs = [OUTPUT_CSV, OUTPUT_PARQUET]
+
+if manifest.is_current(step, step_inputs, step_params, step_outputs):
+    print(f"Converted masterfile up to date, skipping: {OUTPUT_CSV.name}")
+else:
+    df = pd.read_excel(str(RAW_DATA_DIR / HEAT_STRESS_MASTERFILE_MAY_2024_xlsx), sheet_name=SHEET_NAME)
+
+    # Save as CSV
+    df.to_csv(OUTPUT_CSV, index=False)
 
-# Save as CSV
-df.to_csv(OUTPUT_CSV, index=False)
+    # Save as Parquet
+    # Compact dtypes; mixed-type object columns become strings/categoricals
+    optimize_dtypes(df).to_parquet(OUTPUT_PARQUET, index=False)
 
-# Save as Parquet
-# Convert object columns with mixed types to string to avoid parquet conversion errors
-df_w_strings = df.copy()
-for col in df.select_dtypes(include=['object']).columns:
-    df_w_strings[col] = df_w_strings[col].astype(str)
-df_w_strings.to_parquet(OUTPUT_PARQUET, index=False)
\ No newline at end of file
+    manifest.record(step, step_inputs, step_params, step_outputs)
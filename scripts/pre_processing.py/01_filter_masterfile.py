@@ -1,53 +1,30 @@
-from definitions import RAW_DATA_DIR
+from definitions import RAW_DATA_DIR, PIPELINE_MANIFEST_PATH
 from pathlib import Path
 import pandas as pd
 
-# Create csv and parquet from filtered Heat Stress Masterfile.xlsx
-
-# TODO: Should the input be the CSV or Parquet from 01_convert_formats.py?
-INPUT_FILEPATH = RAW_DATA_DIR / "Heat Stress Masterfile May 2024.xlsx"
-OUTPUT_STEM = RAW_DATA_DIR / "filtered" / "disco_baa_01_filtered_masterfile"
+from disco_baa_01.manifest import Manifest
+from disco_baa_01.masterfile import (
+    COLUMNS_TO_DROP,
+    FILTER_RULES_VERSION,  # noqa: F401 (re-exported)
+    ROW_FILTER_COLUMNS,
+    ROWS_TO_DROP_CONDITIONS,
+    SHEET_NAME,
+    filter_frame,
+    filter_parquet,
+    filter_step_params,
+    write_artifacts,
+)
 
+# Create csv and parquet from filtered Heat Stress Masterfile
 
-rows_to_drop_conditions = [
-    # Drop males (i.e. rows were sex == 'm' or 'M')
-    lambda df: df["sex"].str.lower() == "m",
-]
+# Start from the Parquet written by ingest_masterfile.py: it is already cleaned
+# and lets the filter skip loading the dropped columns. An .xlsx input still works.
+INPUT_FILEPATH = RAW_DATA_DIR / f"Heat Stress Masterfile May 2024 - {SHEET_NAME}.parquet"
+OUTPUT_STEM = RAW_DATA_DIR / "filtered" / "disco_baa_01_filtered_masterfile"
 
-columns_to_drop = [
-    # Columns with only 1 unique value
-    "State",
-    "Breed",
-    # "Sensor serial 3 2022",
-    # "date start of joining 2023",
-    # "sensor serial 3 off 2023",
-    "wet_dry_marking_2023",
-    "Sensor serial 1 2024",
-    "GPS # 2024",
-    "LWC_during_joining_2024",
-    "sensor serial 3 off 2024",
-    "Site",
-    "sex",
-    "Weaning date 2022",
-    "Sensor serial 3 2023",
-    "2024 treatment (males)",
-    "Sensor serial 2 2024",
-    "Date temp logger insterted 2024",
-    "Sensor serial 1 off 2024",
-    "WT_lambing_2024",
-    "WT_marking _2024",
-    "Farm",
-    "Paddock for 2022 (rams only)",
-    "Paddock for 2023 (rams only)",
-    "Date end of joining 2023",
-    "BLOOD TAKEN 2023",
-    "date start of joining 2024",
-    "Sensor serial 3 2024",
-    "Sensor serial 2 off 2024",
-    "BLOOD TAKEN 2024",
-    "paddock_lambing_2024",
-    "wet_dry_marking_2024",
-]
+# Filter rules are shared with disco_baa_01.masterfile.run_masterfile_pipeline
+rows_to_drop_conditions = ROWS_TO_DROP_CONDITIONS
+columns_to_drop = COLUMNS_TO_DROP
 
 
 def filter_masterfile(
@@ -55,36 +32,52 @@ def filter_masterfile(
     output_filepath: Path,
     columns_to_drop: list[str] | None = None,
     row_filter_functions: list | None = None,
+    manifest_path: Path | None = PIPELINE_MANIFEST_PATH,
+    force: bool = False,
 ) -> None:
     """
     Filter a masterfile by dropping specified columns and rows.
+
+    Skipped when the input's content hash, the dropped columns and
+    FILTER_RULES_VERSION match the last recorded run and both outputs exist.
     
     Args:
-        input_filepath: Path to the input Excel file
+        input_filepath: Path to the ingested Parquet (read with column
+                        projection) or to the raw Excel file
         output_filepath: Path to save the output parquet file
         columns_to_drop: List of column names to drop from the dataframe
         row_filter_functions: List of functions that take a dataframe and return a boolean series
                              indicating which rows to drop (True = drop)
+        manifest_path: Pipeline manifest to check and update. If None, the
+                       filter always runs and nothing is recorded.
+        force: Run even if the manifest says the outputs are current.
     """
-    df = pd.read_excel(str(input_filepath), sheet_name="RF Ewe.ram data")
-    
-    # Drop rows based on specified conditions
-    if row_filter_functions is not None:
-        for condition in row_filter_functions:
-            df = df[~condition(df)]
-    
-    # Drop specified columns
-    if columns_to_drop is not None:
-        df = df.drop(columns=columns_to_drop)
+    if Path(input_filepath).suffix == '.parquet':
+        filter_parquet(
+            input_filepath, output_filepath, columns_to_drop, row_filter_functions,
+            ROW_FILTER_COLUMNS, manifest_path, force,
+        )
+        return
+
+    manifest = Manifest(manifest_path) if manifest_path is not None else None
+    step = f"filter: {Path(input_filepath).name} -> {Path(output_filepath).name}"
+    step_inputs = {"masterfile": input_filepath}
+    step_params = filter_step_params(columns_to_drop, row_filter_functions)
+    step_outputs = [output_filepath.with_suffix('.csv'), output_filepath.with_suffix('.parquet')]
+    if manifest is not None and not force and manifest.is_current(step, step_inputs, step_params, step_outputs):
+        print(f"Filtered masterfile up to date, skipping: {output_filepath}")
+        return
+
+    df = pd.read_excel(str(input_filepath), sheet_name=SHEET_NAME)
+
+    # Drop rows based on specified conditions, then the specified columns
+    df = filter_frame(df, columns_to_drop, row_filter_functions)
 
-    # Convert object columns with mixed types to string to avoid parquet conversion errors
-    for col in df.select_dtypes(include=['object']).columns:
-        df[col] = df[col].astype(str)
+    # Save the filtered DataFrame to CSV and parquet files
+    write_artifacts(df, *step_outputs)
 
-    # Save the filtered DataFrame to a CSV file
-    df.to_csv(output_filepath.with_suffix('.csv'), index=False)
-    # Save the filtered DataFrame to a parquet file
-    df.to_parquet(output_filepath.with_suffix('.parquet'), index=False)
+    if manifest is not None:
+        manifest.record(step, step_inputs, step_params, step_outputs)
 
 if __name__ == "__main__":
-    filter_masterfile(INPUT_FILEPATH, OUTPUT_STEM, columns_to_drop, rows_to_drop_conditions)
\ No newline at end of file
+    filter_masterfile(INPUT_FILEPATH, OUTPUT_STEM, columns_to_drop, rows_to_drop_conditions)
@@ -0,0 +1,66 @@
+"""Sweep drink-detection thresholds over every split sheep file."""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+from disco_baa_01.extraction import list_splitted_files
+from disco_baa_01.sweep import DEFAULT_TEMP_THRESHES, save_sweep, sweep_herd
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Count drinking events per sheep, day and threshold."
+    )
+    parser.add_argument(
+        "--data-dir",
+        type=Path,
+        default=Path("splitted_data_file"),
+        help="Directory of per-sheep CSV files.",
+    )
+    parser.add_argument(
+        "--temp-thresh",
+        type=float,
+        nargs="+",
+        default=list(DEFAULT_TEMP_THRESHES),
+        help="Drop thresholds (degrees, negative) to evaluate.",
+    )
+    parser.add_argument(
+        "--abnormal-temp-thresh",
+        type=float,
+        nargs="+",
+        default=[35.0],
+        help="Low-temperature cut-offs to evaluate.",
+    )
+    parser.add_argument(
+        "--no-masking",
+        action="store_true",
+        help="Skip the masked_readings column.",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=None,
+        help="Optional series cache directory.",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=Path("artifacts/drink_threshold_sweep.parquet"),
+        help="Output path (.parquet, or .csv).",
+    )
+    args = parser.parse_args()
+
+    sweep = sweep_herd(
+        list_splitted_files(args.data_dir),
+        temp_threshes=args.temp_thresh,
+        abnormal_temp_threshes=args.abnormal_temp_thresh,
+        include_masking=not args.no_masking,
+        cache_dir=args.cache_dir,
+    )
+    print(f"Wrote {save_sweep(sweep, args.output)} ({len(sweep)} rows)")
+
+
+if __name__ == "__main__":
+    main()
@@ -20,4 +20,7 @@ RAW_DATA_DIR = DATA_DIR / f"01_raw{SAMPLE_SUFFIX}"
 INCOMING_COSINOR_ANALYSIS_DIRECTORY = INCOMING_DATA_DIR / "processed_cosinor_output"
 
 INTERIM_DATA_DIR = DATA_DIR / "02_interim"
-PROCESSED_DATA_DIR = DATA_DIR / "03_processed"
\ No newline at end of file
+PROCESSED_DATA_DIR = DATA_DIR / "03_processed"
+
+# Records input hashes / rule versions so unchanged pipeline steps are skipped
+PIPELINE_MANIFEST_PATH = DATA_DIR / "pipeline_manifest.json"
@@ -12,5 +12,8 @@ RAW_DATA_DIR = DATA_DIR / "01_raw"
 
 INTERIM_DATA_DIR = DATA_DIR / "02_interim"
 
+# Records input hashes / rule versions so unchanged pipeline steps are skipped
+PIPELINE_MANIFEST_PATH = DATA_DIR / "pipeline_manifest.json"
+
 if DEMO_MODE:
     RAW_DATA_DIR = DATA_DIR / "01_raw_sample"
\ No newline at end of file
@@ -1,5 +1,78 @@
 """
 disco-baa-01: A data science project for sheep-related data analysis
+
+Importing the package loads no third-party library. Submodules and the main
+entry points below are resolved on first attribute access (PEP 562), so
+`disco_baa_01.fit_cosinor` imports NumPy and pandas only when it is used and
+short-lived CLI or worker processes pay only for what they touch.
 """
 
+import importlib
+
 __version__ = "0.1.0"
+
+# Public name -> submodule defining it
+_EXPORTS = {
+    "AnimalIndex": "animals",
+    "FeatureSink": "sink",
+    "Manifest": "manifest",
+    "RunStats": "instrumentation",
+    "StreamingAnalyser": "streaming",
+    "TemperatureStore": "store",
+    "configure_logging": "instrumentation",
+    "detect_drinking_events": "drinking",
+    "fit_cosinor": "cosinor",
+    "fit_multicosinor": "cosinor",
+    "load_masterfile": "masterfile",
+    "mask_drinking_events": "drinking",
+    "plot_herd_cosinor": "plotting",
+    "resample_to_grid": "resampling",
+    "run_parallel": "parallel",
+    "run_stages": "pipeline",
+    "segment_days": "segments",
+    "sweep_drinking_thresholds": "sweep",
+}
+
+_SUBMODULES = {
+    "animals",
+    "cache",
+    "cli",
+    "cosinor",
+    "drinking",
+    "extraction",
+    "instrumentation",
+    "manifest",
+    "masterfile",
+    "parallel",
+    "percentiles",
+    "periodogram",
+    "pipeline",
+    "plotting",
+    "resampling",
+    "segments",
+    "sink",
+    "splitting",
+    "store",
+    "streaming",
+    "sweep",
+    "synthetic",
+    "utils",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(f"{__name__}.{_EXPORTS[name]}"), name)
+    elif name in _SUBMODULES:
+        value = importlib.import_module(f"{__name__}.{name}")
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    # Cache so later lookups skip __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS) | _SUBMODULES)
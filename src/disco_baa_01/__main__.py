@@ -0,0 +1,7 @@
+"""`python -m disco_baa_01` runs the disco-baa command line interface."""
+
+import sys
+
+from disco_baa_01.cli import main
+
+sys.exit(main())
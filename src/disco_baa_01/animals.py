@@ -0,0 +1,280 @@
+"""
+Logger number + year -> masterfile animal record lookup
+
+Rumen loggers are identified in the temperature data by ids such as "M0142"
+and in the masterfile by the integer 'Temp logger # <year>' columns that
+clean_temp_logger_ids normalises. A logger number is reused across seasons,
+so the key of an animal record is (year, logger number).
+
+AnimalIndex is built once from the ingested masterfile Parquet, persisted as a
+small long-format Parquet (one row per year and logger), and joins traits onto
+cosinor or drinking rows by factorizing the rows' sheep ids and dates, looking
+up each distinct (year, logger) pair with np.searchsorted and gathering the
+trait columns with one take(); no row-wise Python work.
+"""
+
+import logging
+import re
+from pathlib import Path
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from disco_baa_01.manifest import file_sha256
+
+PathLike = Union[str, Path]
+ArrayLike = Union[np.ndarray, pd.Series, list]
+
+LOGGER_YEARS = (2022, 2023, 2024)
+
+# Masterfile column holding the logger number of each animal in a given year
+LOGGER_COLUMN = "Temp logger # {year}"
+
+ID_COLUMN = "EID"
+
+# Reproductive traits: pregnancy scans, weights and condition scores
+TRAIT_PATTERN = re.compile(r"^(Preg scan|WT|CS)[ _]")
+
+SOURCE_SHA_KEY = b"disco_baa_01.source_sha256"
+
+log = logging.getLogger(__name__)
+
+
+def trait_columns(columns: Sequence[str]) -> List[str]:
+    """Masterfile columns holding reproductive traits (Preg scan, WT, CS)."""
+    return [column for column in columns if TRAIT_PATTERN.match(column)]
+
+
+def logger_numbers(sheep_ids: ArrayLike) -> np.ndarray:
+    """
+    Logger number of every sheep id ("M0142" -> 142), -1 where there is none.
+
+    Distinct ids are parsed once, so long columns cost a factorize.
+    """
+    codes, uniques = pd.factorize(pd.Series(sheep_ids, dtype=object))
+    digits = (
+        pd.Series(uniques, dtype=object)
+        .astype(str)
+        .str.extract(r"(\d+)\s*$", expand=False)
+    )
+    numbers = pd.to_numeric(digits, errors="coerce").fillna(-1).to_numpy(dtype=np.int64)
+    return np.where(codes >= 0, numbers[codes], -1)
+
+
+def record_years(dates: ArrayLike) -> np.ndarray:
+    """Year of every date (datetimes or 'YYYY-MM-DD' strings), -1 where missing."""
+    dates = pd.Series(dates)
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        return dates.dt.year.fillna(-1).to_numpy(dtype=np.int64)
+    codes, uniques = pd.factorize(dates)
+    years = (
+        pd.to_datetime(pd.Series(uniques), errors="coerce")
+        .dt.year.fillna(-1)
+        .to_numpy(dtype=np.int64)
+    )
+    return np.where(codes >= 0, years[codes], -1)
+
+
+def _keys(years: np.ndarray, loggers: np.ndarray) -> np.ndarray:
+    return years.astype(np.int64) * 1_000_000_000 + loggers.astype(np.int64)
+
+
+class AnimalIndex:
+    """
+    Sorted (year, logger) keys over a table of animal records.
+
+    Args:
+        records: One row per (year, logger) with 'year' and 'logger' columns,
+            the animal id and its traits. Keys used by more than one animal
+            are kept out of the lookup (they match nothing) and listed in
+            `ambiguous`
+    """
+
+    def __init__(self, records: pd.DataFrame):
+        keys = _keys(records["year"].to_numpy(), records["logger"].to_numpy())
+        counts = pd.Series(keys).value_counts()
+        ambiguous = np.isin(keys, counts.index[counts.to_numpy() > 1])
+        self.ambiguous = records[ambiguous].reset_index(drop=True)
+        if ambiguous.any():
+            log.warning(
+                "%d logger numbers are used by more than one animal in the same year",
+                counts.gt(1).sum(),
+            )
+
+        records = records[~ambiguous]
+        order = np.argsort(keys[~ambiguous], kind="stable")
+        self.records = records.iloc[order].reset_index(drop=True)
+        self.keys = keys[~ambiguous][order]
+
+    @classmethod
+    def from_frame(
+        cls,
+        masterfile: pd.DataFrame,
+        years: Sequence[int] = LOGGER_YEARS,
+        traits: Optional[Sequence[str]] = None,
+        id_column: str = ID_COLUMN,
+    ) -> "AnimalIndex":
+        """
+        Build the index from a cleaned masterfile frame.
+
+        Args:
+            masterfile: Frame with the id, 'Temp logger # <year>' and trait columns
+            years: Seasons whose logger columns are indexed
+            traits: Trait columns to keep. Defaults to trait_columns()
+            id_column: Animal id column
+
+        Returns:
+            AnimalIndex over every animal that carried a logger in a season
+        """
+        traits = trait_columns(masterfile.columns) if traits is None else list(traits)
+        parts = []
+        for year in years:
+            column = LOGGER_COLUMN.format(year=year)
+            if column not in masterfile.columns:
+                continue
+            logger = pd.to_numeric(masterfile[column], errors="coerce")
+            carried = logger.notna().to_numpy()
+            part = masterfile.loc[carried, [id_column] + traits].reset_index(drop=True)
+            part.insert(0, "logger", logger[carried].to_numpy(dtype=np.int64))
+            part.insert(0, "year", np.int16(year))
+            parts.append(part)
+        if not parts:
+            pattern = LOGGER_COLUMN.format(year="<year>")
+            raise KeyError(f"No '{pattern}' columns for years {list(years)}")
+        return cls(pd.concat(parts, ignore_index=True))
+
+    @classmethod
+    def from_parquet(
+        cls,
+        parquet_path: PathLike,
+        years: Sequence[int] = LOGGER_YEARS,
+        traits: Optional[Sequence[str]] = None,
+        id_column: str = ID_COLUMN,
+    ) -> "AnimalIndex":
+        """Build the index from the ingested masterfile Parquet's needed columns."""
+        import pyarrow.parquet as pq
+
+        names = pq.read_schema(str(parquet_path)).names
+        traits = trait_columns(names) if traits is None else list(traits)
+        loggers = [
+            LOGGER_COLUMN.format(year=year)
+            for year in years
+            if LOGGER_COLUMN.format(year=year) in names
+        ]
+        frame = pd.read_parquet(parquet_path, columns=[id_column] + loggers + traits)
+        return cls.from_frame(frame, years, traits, id_column)
+
+    def save(self, path: PathLike, source_sha256: Optional[str] = None) -> Path:
+        """
+        Persist the records (ambiguous keys included) as Parquet.
+
+        Args:
+            path: Output file
+            source_sha256: Hash of the masterfile the index was built from,
+                kept in the file metadata for load_or_build
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        table = pa.Table.from_pandas(
+            pd.concat([self.records, self.ambiguous], ignore_index=True),
+            preserve_index=False,
+        )
+        if source_sha256 is not None:
+            table = table.replace_schema_metadata(
+                {
+                    **(table.schema.metadata or {}),
+                    SOURCE_SHA_KEY: source_sha256.encode(),
+                }
+            )
+        pq.write_table(table, path)
+        return path
+
+    @classmethod
+    def load(cls, path: PathLike) -> "AnimalIndex":
+        return cls(pd.read_parquet(path))
+
+    @classmethod
+    def load_or_build(
+        cls, masterfile_parquet: PathLike, index_path: PathLike, **kwargs
+    ) -> "AnimalIndex":
+        """
+        Load a persisted index, rebuilding it when the masterfile has changed.
+
+        Args:
+            masterfile_parquet: Ingested masterfile Parquet
+            index_path: Location of the persisted index
+            **kwargs: Forwarded to from_parquet on a rebuild
+        """
+        import pyarrow.parquet as pq
+
+        source_sha256 = file_sha256(masterfile_parquet)
+        index_path = Path(index_path)
+        if index_path.exists():
+            metadata = pq.read_schema(str(index_path)).metadata or {}
+            if metadata.get(SOURCE_SHA_KEY, b"").decode() == source_sha256:
+                return cls.load(index_path)
+        index = cls.from_parquet(masterfile_parquet, **kwargs)
+        index.save(index_path, source_sha256)
+        return index
+
+    def lookup(self, years: ArrayLike, loggers: ArrayLike) -> np.ndarray:
+        """
+        Record position of every (year, logger) pair.
+
+        Returns:
+            int64 positions into records; -1 where there is no (unambiguous) match
+        """
+        keys = _keys(np.asarray(years), np.asarray(loggers))
+        if self.keys.size == 0:
+            return np.full(keys.size, -1, dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self.keys, keys), self.keys.size - 1)
+        return np.where(self.keys[positions] == keys, positions, -1)
+
+    def join(
+        self,
+        frame: pd.DataFrame,
+        sheep_column: str = "sheep_id",
+        date_column: str = "record_date",
+        columns: Optional[Sequence[str]] = None,
+        year: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """
+        Attach animal records to cosinor / drinking rows (left join).
+
+        Args:
+            frame: Rows with a sheep id ("M0142") and a date column
+            sheep_column: Column with the logger ids (e.g. 'logger_code' for
+                drinking events)
+            date_column: Column whose year selects the season (e.g. 'DT');
+                ignored when year is given
+            columns: Record columns to attach. Defaults to the id and all traits
+            year: Season of every row, instead of the date column's year
+
+        Returns:
+            Copy of frame with the record columns appended; rows without a
+            match get missing values
+        """
+        loggers = logger_numbers(frame[sheep_column])
+        years = (
+            np.full(len(frame), year, dtype=np.int64)
+            if year is not None
+            else record_years(frame[date_column])
+        )
+        positions = self.lookup(years, loggers)
+        if columns is None:
+            columns = [
+                column
+                for column in self.records.columns
+                if column not in ("year", "logger")
+            ]
+        matched = positions >= 0
+
+        # Records plus one all-missing row that unmatched positions point at
+        records = self.records[list(columns)].reindex(range(len(self.records) + 1))
+        attached = records.take(np.where(matched, positions, len(self.records)))
+        attached.index = frame.index
+        return pd.concat([frame, attached], axis=1)
@@ -0,0 +1,214 @@
+"""
+Memory-mapped cache of per-sheep time series
+
+The first time a sheep is requested its split CSV (or TemperatureStore
+partitions) is parsed once and written as two .npy arrays,
+
+    <root>/<sheep_id>/timestamps.npy   int64 nanoseconds since the epoch, sorted
+    <root>/<sheep_id>/temps.npy        float64 temperatures
+
+plus a meta.json describing the source files. Later runs open the arrays with
+np.load(mmap_mode="r"), so worker processes share the OS page cache instead of
+each re-parsing text. An entry is rebuilt when a source file's size, mtime or
+content hash changes; when only the mtime moved but the SHA-256 still
+matches, the entry is kept and its meta refreshed.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from disco_baa_01.manifest import file_sha256
+from disco_baa_01.store import TemperatureStore, is_temperature_store
+
+PathLike = Union[str, Path]
+
+# Bump when the cached layout changes so old entries are rebuilt
+# (2: float64 temperatures, so cached runs detect the same drinks as uncached)
+CACHE_FORMAT_VERSION = 2
+
+
+def source_files(source: PathLike, sheep_id: str) -> List[Path]:
+    """Files a sheep's series is read from: its CSV, or its store partitions."""
+    source = Path(source)
+    if is_temperature_store(source):
+        return sorted(source.glob(f"year=*/group=*/sheep_id={sheep_id}/*.parquet"))
+    return [source]
+
+
+def read_source_arrays(
+    source: PathLike, sheep_id: str
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Parse a sheep's series into (int64 ns timestamps, float64 temps), sorted by time.
+
+    Raises:
+        KeyError: If the source has no 'DT' or sheep_id column
+    """
+    if is_temperature_store(source):
+        data = TemperatureStore(source).read_sheep_series(sheep_id)
+    else:
+        header = pd.read_csv(source, nrows=0).columns
+        if "DT" not in header or sheep_id not in header:
+            raise KeyError(f"Missing 'DT' or '{sheep_id}' column in {source}")
+        data = pd.read_csv(source, usecols=["DT", sheep_id])
+    timestamps = pd.to_datetime(data["DT"]).to_numpy(dtype="datetime64[ns]")
+    temps = pd.to_numeric(data[sheep_id], errors="coerce").to_numpy(dtype=np.float64)
+    keep = ~np.isnat(timestamps)
+    timestamps, temps = timestamps[keep].view(np.int64), temps[keep]
+    order = np.argsort(timestamps, kind="stable")
+    return timestamps[order], temps[order]
+
+
+class SeriesCache:
+    """
+    Per-sheep binary cache under `root`.
+
+    Args:
+        root: Directory of the cache (created on first write)
+    """
+
+    def __init__(self, root: PathLike):
+        self.root = Path(root)
+
+    def entry_dir(self, sheep_id: str) -> Path:
+        return self.root / str(sheep_id)
+
+    def _read_meta(self, sheep_id: str) -> Optional[dict]:
+        path = self.entry_dir(sheep_id) / "meta.json"
+        if not path.exists():
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_meta(self, sheep_id: str, meta: dict) -> None:
+        path = self.entry_dir(sheep_id) / "meta.json"
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _describe(files: List[Path], hashes: Optional[dict] = None) -> dict:
+        described = {}
+        for path in files:
+            stat = path.stat()
+            key = str(path.resolve())
+            described[key] = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "sha256": (hashes or {}).get(key) or file_sha256(path),
+            }
+        return described
+
+    def is_current(self, source: PathLike, sheep_id: str) -> bool:
+        """
+        Whether the cached entry still matches its source files.
+
+        Files whose size and mtime are unchanged are trusted; a file whose
+        mtime moved is re-hashed and accepted if its content is the same.
+        """
+        meta = self._read_meta(sheep_id)
+        if meta is None or meta.get("format") != CACHE_FORMAT_VERSION:
+            return False
+        if not all(
+            (self.entry_dir(sheep_id) / name).exists()
+            for name in ["timestamps.npy", "temps.npy"]
+        ):
+            return False
+        files = source_files(source, sheep_id)
+        recorded = meta["files"]
+        if sorted(recorded) != sorted(str(path.resolve()) for path in files):
+            return False
+
+        refreshed = False
+        for path in files:
+            key, stat = str(path.resolve()), path.stat()
+            entry = recorded[key]
+            if entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                continue
+            if entry["size"] != stat.st_size or file_sha256(path) != entry["sha256"]:
+                return False
+            entry["mtime_ns"] = stat.st_mtime_ns
+            refreshed = True
+        if refreshed:
+            self._write_meta(sheep_id, meta)
+        return True
+
+    def build(self, source: PathLike, sheep_id: str) -> None:
+        """Parse the source once and (re)write the sheep's entry."""
+        files = source_files(source, sheep_id)
+        if not files or not all(path.exists() for path in files):
+            raise FileNotFoundError(f"No source data for '{sheep_id}' in {source}")
+        timestamps, temps = read_source_arrays(source, sheep_id)
+
+        entry = self.entry_dir(sheep_id)
+        entry.mkdir(parents=True, exist_ok=True)
+        for name, array in [("timestamps", timestamps), ("temps", temps)]:
+            tmp_path = entry / f"{name}.tmp.npy"
+            np.save(tmp_path, array)
+            os.replace(tmp_path, entry / f"{name}.npy")
+        self._write_meta(
+            sheep_id,
+            {
+                "format": CACHE_FORMAT_VERSION,
+                "sheep_id": str(sheep_id),
+                "source": str(source),
+                "files": self._describe(files),
+            },
+        )
+
+    def arrays(
+        self, source: PathLike, sheep_id: str, start=None, end=None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Memory-mapped (timestamps, temps) of a sheep, building the entry if stale.
+
+        Args:
+            source: The sheep's split CSV, or a TemperatureStore root
+            sheep_id: Logger column name of the sheep
+            start: Inclusive lower bound on the timestamps
+            end: Exclusive upper bound on the timestamps
+
+        Returns:
+            Read-only int64 nanosecond timestamps and float64 temperatures;
+            a start/end range is a slice (no copy) of the mapped arrays
+        """
+        if not self.is_current(source, sheep_id):
+            self.build(source, sheep_id)
+        entry = self.entry_dir(sheep_id)
+        timestamps = np.load(entry / "timestamps.npy", mmap_mode="r")
+        temps = np.load(entry / "temps.npy", mmap_mode="r")
+        lo = (
+            0
+            if start is None
+            else np.searchsorted(timestamps, pd.Timestamp(start).as_unit("ns").value)
+        )
+        hi = (
+            timestamps.size
+            if end is None
+            else np.searchsorted(timestamps, pd.Timestamp(end).as_unit("ns").value)
+        )
+        return timestamps[lo:hi], temps[lo:hi]
+
+    def frame(
+        self, source: PathLike, sheep_id: str, start=None, end=None
+    ) -> pd.DataFrame:
+        """A sheep's cached series in the split-CSV layout ('DT', <sheep_id>)."""
+        timestamps, temps = self.arrays(source, sheep_id, start, end)
+        return pd.DataFrame(
+            {"DT": timestamps.view("datetime64[ns]"), str(sheep_id): temps}
+        )
+
+    def warm(self, sheep_sources: Iterable[Tuple[str, PathLike]]) -> List[str]:
+        """Build every stale entry; returns the ids that were (re)built."""
+        built = []
+        for sheep_id, source in sheep_sources:
+            if not self.is_current(source, sheep_id):
+                self.build(source, sheep_id)
+                built.append(sheep_id)
+        return built
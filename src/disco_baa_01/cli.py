@@ -0,0 +1,265 @@
+"""
+`disco-baa` command line interface
+
+    disco-baa split WORKBOOK --out DIR            logger workbook -> per-sheep shards
+    disco-baa cosinor DATA --out DIR              consolidated cosinor_features.parquet
+    disco-baa drink DATA --out DIR                consolidated drinking_behavior.parquet
+    disco-baa ingest MASTERFILE --out DIR         clean masterfile -> CSV + Parquet
+    disco-baa filter PARQUET --out STEM           apply the masterfile filter rules
+    disco-baa join FEATURES MASTERFILE --out FILE attach animal records to features
+    disco-baa plot FEATURES --out FILE            paged herd cosinor plots
+    disco-baa run --data-dir data                 every stale stage of the pipeline
+    disco-baa stream FEED --out DIR               live day fits and drink events
+
+Every subcommand runs its stage through disco_baa_01.pipeline and accepts
+--log-level, --log-file, --manifest and --force. With a manifest (run uses
+<data-dir>/pipeline_manifest.json by default) a stage is skipped when its
+inputs and parameters are unchanged. Paths are given on the command line, so
+no definitions module is needed. stream is not a stage: it follows a feed
+(disco_baa_01.streaming) and appends its results as they complete.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+from disco_baa_01 import pipeline
+
+_MAX_GAP_HELP = "Align series to the 5-minute grid, interpolating gaps up to this long."
+
+
+def _add_extraction_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "data", type=Path, help="Directory of split CSVs or a TemperatureStore."
+    )
+    parser.add_argument(
+        "--out",
+        type=Path,
+        required=True,
+        help="Directory of the consolidated Parquet file.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes (default: all CPUs).",
+    )
+    parser.add_argument("--abnormal-temp-thresh", type=float, default=35.0)
+    parser.add_argument("--temp-thresh", type=float, default=-0.5)
+    parser.add_argument(
+        "--cache-dir", type=Path, default=None, help="Series cache directory."
+    )
+    parser.add_argument(
+        "--max-gap-minutes", type=float, default=None, help=_MAX_GAP_HELP
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    logging_options = argparse.ArgumentParser(add_help=False)
+    logging_options.add_argument(
+        "--log-level", default="INFO", help="Logging level (default: INFO)."
+    )
+    logging_options.add_argument(
+        "--log-file",
+        type=Path,
+        default=None,
+        help="Log to this file instead of stderr.",
+    )
+    common = argparse.ArgumentParser(add_help=False, parents=[logging_options])
+    common.add_argument(
+        "--manifest",
+        type=Path,
+        default=None,
+        help="Pipeline manifest; skip stages that are current.",
+    )
+    common.add_argument(
+        "--force",
+        action="store_true",
+        help="Run even if the manifest says the stage is current.",
+    )
+
+    parser = argparse.ArgumentParser(
+        prog="disco-baa", description="Sheep rumen temperature pipeline."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def command(name, help):
+        return subparsers.add_parser(name, help=help, parents=[common])
+
+    split = command(
+        "split", "Split a calibrated logger workbook into a TemperatureStore."
+    )
+    split.add_argument("workbook", type=Path)
+    split.add_argument("--sheet", default="Sheet1")
+    split.add_argument("--out", type=Path, required=True)
+
+    _add_extraction_arguments(command("cosinor", "Fit daily cosinor features."))
+    _add_extraction_arguments(command("drink", "Detect drinking events."))
+
+    ingest = command("ingest", "Ingest and clean the masterfile sheet.")
+    ingest.add_argument("masterfile", type=Path)
+    ingest.add_argument("--sheet", default=None)
+    ingest.add_argument("--out", type=Path, required=True, help="Output directory.")
+
+    filter_ = command("filter", "Filter the ingested masterfile.")
+    filter_.add_argument("parquet", type=Path)
+    filter_.add_argument(
+        "--out", type=Path, required=True, help="Output path without suffix."
+    )
+
+    join = command("join", "Join masterfile animal records onto features.")
+    join.add_argument("features", type=Path)
+    join.add_argument("masterfile", type=Path, help="Ingested masterfile Parquet.")
+    join.add_argument("--out", type=Path, required=True)
+
+    plot = command("plot", "Plot every sheep's cosinor curves.")
+    plot.add_argument(
+        "features", type=Path, help="Consolidated cosinor_features.parquet."
+    )
+    plot.add_argument("--out", type=Path, required=True, help=".pdf or .png")
+    plot.add_argument(
+        "--grid", type=int, nargs=2, default=None, metavar=("ROWS", "COLS")
+    )
+    plot.add_argument("--workers", type=int, default=None)
+
+    run = command("run", "Run the stale stages of the whole pipeline.")
+    run.add_argument("--data-dir", type=Path, default=Path("data"))
+    run.add_argument("--masterfile", type=Path, default=None)
+    run.add_argument("--masterfile-sheet", default=None)
+    run.add_argument(
+        "--loggers",
+        type=Path,
+        default=None,
+        help="Calibrated logger workbook to split.",
+    )
+    run.add_argument("--logger-sheet", default="Sheet1")
+    run.add_argument("--workers", type=int, default=None)
+    run.add_argument("--abnormal-temp-thresh", type=float, default=35.0)
+    run.add_argument("--temp-thresh", type=float, default=-0.5)
+    run.add_argument("--cache-dir", type=Path, default=None)
+    run.add_argument("--max-gap-minutes", type=float, default=None, help=_MAX_GAP_HELP)
+    run.add_argument(
+        "--jobs", type=int, default=None, help="Stages running at the same time."
+    )
+    run.add_argument(
+        "--only",
+        nargs="+",
+        default=None,
+        metavar="STAGE",
+        help="Run these stages and their inputs.",
+    )
+    run.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="List the stale stages without running them.",
+    )
+
+    stream = subparsers.add_parser(
+        "stream",
+        help="Fit days and detect drinks on a live feed.",
+        parents=[logging_options],
+    )
+    stream.add_argument(
+        "source", help="Directory of chunk CSVs, a growing CSV file, or '-' for stdin."
+    )
+    stream.add_argument(
+        "--out", type=Path, required=True, help="Directory of the appended CSV outputs."
+    )
+    stream.add_argument("--abnormal-temp-thresh", type=float, default=35.0)
+    stream.add_argument("--temp-thresh", type=float, default=-0.5)
+    stream.add_argument(
+        "--poll-interval",
+        type=float,
+        default=1.0,
+        help="Seconds between checks for new data.",
+    )
+    stream.add_argument(
+        "--idle-timeout",
+        type=float,
+        default=None,
+        help="Stop after this many idle seconds.",
+    )
+    return parser
+
+
+def _stages(args: argparse.Namespace) -> List[pipeline.Stage]:
+    if args.command == "split":
+        return [pipeline.split_stage(args.workbook, args.out, args.sheet)]
+    if args.command in ("cosinor", "drink"):
+        kind = "cosinor_features" if args.command == "cosinor" else "drinking_behavior"
+        return [
+            pipeline.extraction_stage(
+                kind,
+                args.data,
+                args.out,
+                args.workers,
+                args.abnormal_temp_thresh,
+                args.temp_thresh,
+                cache_dir=args.cache_dir,
+                max_gap_minutes=args.max_gap_minutes,
+            )
+        ]
+    if args.command == "ingest":
+        return [pipeline.ingest_stage(args.masterfile, args.out, args.sheet)]
+    if args.command == "filter":
+        return [pipeline.filter_stage(args.parquet, args.out)]
+    if args.command == "join":
+        return [pipeline.join_stage(args.features, args.masterfile, args.out)]
+    if args.command == "plot":
+        rows, cols = args.grid or (None, None)
+        return [pipeline.plot_stage(args.features, args.out, rows, cols, args.workers)]
+    return pipeline.herd_stages(
+        args.data_dir,
+        masterfile=args.masterfile,
+        loggers=args.loggers,
+        logger_sheet=args.logger_sheet,
+        masterfile_sheet=args.masterfile_sheet,
+        workers=args.workers,
+        abnormal_temp_thresh=args.abnormal_temp_thresh,
+        temp_thresh=args.temp_thresh,
+        cache_dir=args.cache_dir,
+        max_gap_minutes=args.max_gap_minutes,
+    )
+
+
+def _stream(args: argparse.Namespace) -> int:
+    from disco_baa_01.streaming import StreamingAnalyser, append_outputs, read_feed
+
+    analyser = StreamingAnalyser(args.abnormal_temp_thresh, args.temp_thresh)
+    try:
+        for chunk in read_feed(args.source, args.poll_interval, args.idle_timeout):
+            append_outputs(analyser.push(chunk), args.out)
+    except KeyboardInterrupt:
+        pass
+    append_outputs(analyser.close(), args.out)
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Entry point of the `disco-baa` console script; returns the exit status."""
+    from disco_baa_01.instrumentation import configure_logging
+
+    args = build_parser().parse_args(argv)
+    configure_logging(args.log_level.upper(), args.log_file)
+    if args.command == "stream":
+        return _stream(args)
+
+    is_run = args.command == "run"
+    manifest = args.manifest
+    if manifest is None and is_run:
+        manifest = pipeline.default_manifest_path(args.data_dir)
+    summary = pipeline.run_stages(
+        _stages(args),
+        manifest_path=manifest,
+        targets=args.only if is_run else None,
+        jobs=args.jobs if is_run else 1,
+        force=args.force,
+        dry_run=is_run and args.dry_run,
+    )
+    print(summary.drop(columns="error").to_string(index=False))
+    return 1 if summary["status"].isin(["failed", "blocked"]).any() else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,701 @@
+"""
+Closed-form cosinor fitting for many sheep-days at once
+
+With a fixed period the cosinor model
+
+    y(t) = M + A * cos(2 * pi * t / T + phi)
+
+is linear in (M, beta, gamma) with beta = A * cos(phi) and
+gamma = -A * sin(phi), so every fit reduces to a 3x3 least-squares problem.
+The functions here accumulate the normal-equation sums for each segment of a
+stacked series in one pass and solve all segments together.
+
+fit_cosinor is the fast path for a single period. The multi-component model
+
+    y(t) = M + sum_k A_k * cos(2 * pi * t / T_k + phi_k)
+
+(e.g. 24 h with its 12 h and 8 h harmonics) works the same way with a
+(1 + 2K)-square system, and rolling multi-day windows are solved from
+running sums of the per-day statistics instead of refitting each window.
+Periods that do not divide 24 h need continuous time (segments.elapsed_hours)
+rather than time of day.
+
+With inference=True the solvers also return standard errors, confidence
+intervals of amplitude and acrophase, and the zero-amplitude F-test, all from
+the same X'X and residual sum of squares: Cov(b) = s^2 (X'X)^-1 with
+s^2 = SS_res / (n - p), propagated to A and phi by the delta method.
+"""
+
+from typing import Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+ArrayLike = Union[np.ndarray, pd.Series, list]
+
+PERIOD_HOURS = 24.0
+
+# Minimum number of observations for a segment to be solvable (3 parameters)
+MIN_POINTS = 3
+
+FIT_COLUMNS = ["M", "A", "phi", "r_squared"]
+
+INFERENCE_COLUMNS = [
+    "se_M",
+    "se_A",
+    "se_phi",
+    "A_lower",
+    "A_upper",
+    "phi_lower",
+    "phi_upper",
+    "f_stat",
+    "p_value",
+]
+
+
+def segment_ids_from_offsets(offsets: ArrayLike) -> np.ndarray:
+    """
+    Expand CSR-style segment offsets into one segment id per observation.
+
+    Args:
+        offsets: Monotonic array of length n_segments + 1 where segment i
+            covers positions offsets[i]:offsets[i + 1]
+
+    Returns:
+        Integer array of segment ids with length offsets[-1]
+    """
+    offsets = np.asarray(offsets, dtype=np.int64)
+    if offsets.ndim != 1 or offsets.size < 1:
+        raise ValueError("offsets must be a 1-D array with at least one element")
+    lengths = np.diff(offsets)
+    if (lengths < 0).any():
+        raise ValueError("offsets must be non-decreasing")
+    return np.repeat(np.arange(lengths.size), lengths)
+
+
+def cosinor_sums(
+    values: ArrayLike,
+    time_hours: ArrayLike,
+    segment_ids: Optional[ArrayLike] = None,
+    n_segments: Optional[int] = None,
+    period: float = PERIOD_HOURS,
+) -> dict:
+    """
+    Accumulate the per-segment sufficient statistics of the cosinor model.
+
+    Observations whose value or time is NaN are masked out, so ragged days
+    can be passed either as a flat series with segment ids or as a NaN-padded
+    matrix flattened row by row.
+
+    Args:
+        values: Observed temperatures
+        time_hours: Time of day of each observation in hours
+        segment_ids: Segment (e.g. sheep-day) of each observation. If None,
+            all observations belong to a single segment
+        n_segments: Number of segments. Defaults to max(segment_ids) + 1
+        period: Period of the rhythm in hours
+
+    Returns:
+        Dictionary of float64 arrays (one entry per segment) with keys
+        n, c, s, cc, ss, cs, y, yc, ys, yy and the scalar "shift" that was
+        subtracted from the values before summing
+    """
+    y = np.asarray(values, dtype=np.float64).ravel()
+    t = np.asarray(time_hours, dtype=np.float64).ravel()
+    if y.shape != t.shape:
+        raise ValueError(
+            "values and time_hours must have the same length, "
+            f"got {y.size} and {t.size}"
+        )
+
+    if segment_ids is None:
+        ids = np.zeros(y.size, dtype=np.int64)
+    else:
+        ids = np.asarray(segment_ids, dtype=np.int64).ravel()
+        if ids.shape != y.shape:
+            raise ValueError("segment_ids must have the same length as values")
+    if n_segments is None:
+        n_segments = int(ids.max()) + 1 if ids.size else 0
+
+    mask = np.isfinite(y) & np.isfinite(t)
+    if not mask.all():
+        y, t, ids = y[mask], t[mask], ids[mask]
+
+    # Shift values towards zero so the sums of squares keep their precision
+    shift = float(y.mean()) if y.size else 0.0
+    y = y - shift
+
+    angle = 2 * np.pi * t / period
+    c = np.cos(angle)
+    s = np.sin(angle)
+
+    def _sum(weights=None):
+        return np.bincount(ids, weights=weights, minlength=n_segments).astype(
+            np.float64
+        )
+
+    return {
+        "n": _sum(),
+        "c": _sum(c),
+        "s": _sum(s),
+        "cc": _sum(c * c),
+        "ss": _sum(s * s),
+        "cs": _sum(c * s),
+        "y": _sum(y),
+        "yc": _sum(y * c),
+        "ys": _sum(y * s),
+        "yy": _sum(y * y),
+        "shift": shift,
+    }
+
+
+def _cosinor_inference(
+    xtx: np.ndarray,
+    coef: np.ndarray,
+    ss_res: np.ndarray,
+    ss_tot: np.ndarray,
+    solvable: np.ndarray,
+    suffixes: Sequence[str],
+    alpha: float,
+) -> dict:
+    """
+    Standard errors, confidence intervals and F-test of solved segments.
+
+    Args:
+        xtx: Normal-equation matrices, (n_segments, p, p)
+        coef: Solved coefficients (M, beta_1, gamma_1, ...), (n_segments, p)
+        ss_res: Residual sum of squares per segment
+        ss_tot: Total (mean-corrected) sum of squares per segment
+        solvable: Segments whose coefficients are valid
+        suffixes: Column suffix of every component ("" for a single period)
+        alpha: 1 - confidence level of the intervals
+
+    Returns:
+        Dictionary of columns: se_M, then se_A<sfx>, se_phi<sfx>,
+        A<sfx>_lower/upper, phi<sfx>_lower/upper per component, f_stat and
+        p_value of H0: all amplitudes are zero
+    """
+    # scipy.stats takes longer to import than a day's fits; only inference needs it
+    from scipy import stats
+
+    k, p = coef.shape
+    n = xtx[:, 0, 0]
+    df_res = n - p
+    usable = solvable & (df_res > 0)
+
+    cov = np.full((k, p, p), np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sigma2 = np.clip(ss_res, 0, None) / df_res
+    if usable.any():
+        cov[usable] = np.linalg.inv(xtx[usable]) * sigma2[usable, None, None]
+    t_crit = np.full(k, np.nan)
+    t_crit[usable] = stats.t.ppf(1 - alpha / 2, df_res[usable])
+
+    result = {"se_M": np.sqrt(cov[:, 0, 0])}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for i, suffix in enumerate(suffixes):
+            b, g = 1 + 2 * i, 2 + 2 * i
+            beta, gamma = coef[:, b], coef[:, g]
+            v_bb, v_gg, v_bg = cov[:, b, b], cov[:, g, g], cov[:, b, g]
+            amplitude2 = beta**2 + gamma**2
+            amplitude = np.sqrt(amplitude2)
+            phi = np.arctan2(-gamma, beta)
+            # Delta method: gradients of A and of phi = atan2(-gamma, beta)
+            # with respect to (beta, gamma)
+            se_a = np.sqrt(
+                np.clip(
+                    beta**2 * v_bb + gamma**2 * v_gg + 2 * beta * gamma * v_bg, 0, None
+                )
+                / amplitude2
+            )
+            se_phi = (
+                np.sqrt(
+                    np.clip(
+                        gamma**2 * v_bb + beta**2 * v_gg - 2 * beta * gamma * v_bg,
+                        0,
+                        None,
+                    )
+                )
+                / amplitude2
+            )
+            result[f"se_A{suffix}"] = se_a
+            result[f"se_phi{suffix}"] = se_phi
+            result[f"A{suffix}_lower"] = amplitude - t_crit * se_a
+            result[f"A{suffix}_upper"] = amplitude + t_crit * se_a
+            result[f"phi{suffix}_lower"] = phi - t_crit * se_phi
+            result[f"phi{suffix}_upper"] = phi + t_crit * se_phi
+
+        f_stat = np.where(usable, (ss_tot - ss_res) / (p - 1) / sigma2, np.nan)
+    p_value = np.full(k, np.nan)
+    p_value[usable] = stats.f.sf(f_stat[usable], p - 1, df_res[usable])
+    result["f_stat"] = f_stat
+    result["p_value"] = p_value
+    return result
+
+
+def solve_cosinor_sums(
+    sums: dict, inference: bool = False, alpha: float = 0.05
+) -> pd.DataFrame:
+    """
+    Solve the cosinor normal equations for every segment at once.
+
+    Segments with fewer than MIN_POINTS observations or a singular design
+    (e.g. all samples at the same time of day) get NaN parameters.
+
+    Args:
+        sums: Sufficient statistics as returned by cosinor_sums
+        inference: Also return the INFERENCE_COLUMNS
+        alpha: 1 - confidence level of the intervals
+
+    Returns:
+        DataFrame with one row per segment and columns n, M, A, phi,
+        r_squared (and INFERENCE_COLUMNS). A is non-negative and phi lies in
+        (-pi, pi]; the phi interval is not wrapped into that range.
+    """
+    n = sums["n"]
+    k = n.size
+
+    xtx = np.empty((k, 3, 3))
+    xtx[:, 0, 0] = n
+    xtx[:, 0, 1] = xtx[:, 1, 0] = sums["c"]
+    xtx[:, 0, 2] = xtx[:, 2, 0] = sums["s"]
+    xtx[:, 1, 1] = sums["cc"]
+    xtx[:, 1, 2] = xtx[:, 2, 1] = sums["cs"]
+    xtx[:, 2, 2] = sums["ss"]
+    xty = np.stack([sums["y"], sums["yc"], sums["ys"]], axis=1)
+
+    coef = np.full((k, 3), np.nan)
+    det = np.linalg.det(xtx) if k else np.empty(0)
+    solvable = (n >= MIN_POINTS) & (np.abs(det) > 1e-9 * np.maximum(n, 1) ** 3)
+    if solvable.any():
+        coef[solvable] = np.linalg.solve(xtx[solvable], xty[solvable][..., None])[
+            ..., 0
+        ]
+
+    mesor, beta, gamma = coef[:, 0], coef[:, 1], coef[:, 2]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # At the least-squares optimum SS_res = y'y - b'X'y
+        ss_res = sums["yy"] - np.einsum("ij,ij->i", coef, xty)
+        ss_tot = sums["yy"] - sums["y"] ** 2 / n
+        r_squared = 1 - np.clip(ss_res, 0, None) / ss_tot
+
+    result = {
+        "n": n.astype(np.int64),
+        "M": mesor + sums["shift"],
+        "A": np.hypot(beta, gamma),
+        "phi": np.arctan2(-gamma, beta),
+        "r_squared": r_squared,
+    }
+    if inference:
+        result.update(
+            _cosinor_inference(xtx, coef, ss_res, ss_tot, solvable, [""], alpha)
+        )
+    return pd.DataFrame(result)
+
+
+def fit_cosinor(
+    values: ArrayLike,
+    time_hours: ArrayLike,
+    offsets: Optional[ArrayLike] = None,
+    period: float = PERIOD_HOURS,
+    inference: bool = False,
+    alpha: float = 0.05,
+) -> pd.DataFrame:
+    """
+    Fit a fixed-period cosinor to every segment of a stacked series.
+
+    Args:
+        values: Observed temperatures for all segments, concatenated
+        time_hours: Time of day of each observation in hours
+        offsets: CSR-style boundaries of the segments (length n_segments + 1).
+            If None, the whole series is fitted as one segment
+        period: Period of the rhythm in hours
+        inference: Also return standard errors, intervals and the F-test
+            (INFERENCE_COLUMNS)
+        alpha: 1 - confidence level of the intervals
+
+    Returns:
+        DataFrame with one row per segment and columns n, M, A, phi, r_squared
+    """
+    if offsets is None:
+        return solve_cosinor_sums(
+            cosinor_sums(values, time_hours, period=period), inference, alpha
+        )
+
+    offsets = np.asarray(offsets, dtype=np.int64)
+    ids = segment_ids_from_offsets(offsets)
+    start = offsets[0]
+    stop = offsets[-1]
+    values = np.asarray(values, dtype=np.float64)[start:stop]
+    time_hours = np.asarray(time_hours, dtype=np.float64)[start:stop]
+    sums = cosinor_sums(
+        values, time_hours, ids, n_segments=offsets.size - 1, period=period
+    )
+    return solve_cosinor_sums(sums, inference, alpha)
+
+
+def fit_cosinor_matrix(
+    values: ArrayLike,
+    time_hours: ArrayLike,
+    period: float = PERIOD_HOURS,
+    inference: bool = False,
+    alpha: float = 0.05,
+) -> pd.DataFrame:
+    """
+    Fit a fixed-period cosinor to every row of a NaN-padded matrix.
+
+    Args:
+        values: Array of shape (n_segments, max_len); NaN marks missing samples
+        time_hours: Array of the same shape, or a 1-D array of length max_len
+            shared by all rows
+        period: Period of the rhythm in hours
+        inference: Also return the INFERENCE_COLUMNS
+        alpha: 1 - confidence level of the intervals
+
+    Returns:
+        DataFrame with one row per matrix row and columns n, M, A, phi, r_squared
+    """
+    values = np.atleast_2d(np.asarray(values, dtype=np.float64))
+    time_hours = np.broadcast_to(np.asarray(time_hours, dtype=np.float64), values.shape)
+    ids = np.repeat(np.arange(values.shape[0]), values.shape[1])
+    sums = cosinor_sums(
+        values, time_hours, ids, n_segments=values.shape[0], period=period
+    )
+    return solve_cosinor_sums(sums, inference, alpha)
+
+
+def cosinor_curve(
+    time_hours: ArrayLike,
+    M: ArrayLike,
+    A: ArrayLike,
+    phi: ArrayLike,
+    period: float = PERIOD_HOURS,
+) -> np.ndarray:
+    """
+    Evaluate fitted cosinor curves, broadcasting parameters against time.
+
+    Args:
+        time_hours: Times at which to evaluate the curves
+        M: Mesor(s)
+        A: Amplitude(s)
+        phi: Acrophase(s) in radians
+        period: Period of the rhythm in hours
+
+    Returns:
+        Array of fitted values
+    """
+    return np.asarray(M) + np.asarray(A) * np.cos(
+        2 * np.pi * np.asarray(time_hours) / period + np.asarray(phi)
+    )
+
+
+def period_label(period: float) -> str:
+    """Column suffix of a period, e.g. 24 -> "24", 23.5 -> "23.5"."""
+    return f"{period:g}"
+
+
+def _design_columns(time_hours: np.ndarray, periods: Sequence[float]) -> list:
+    """Regressors 1, cos(2 pi t / T_k), sin(2 pi t / T_k) for every period."""
+    columns = [np.ones_like(time_hours)]
+    for period in periods:
+        angle = 2 * np.pi * time_hours / period
+        columns.extend([np.cos(angle), np.sin(angle)])
+    return columns
+
+
+def multicosinor_sums(
+    values: ArrayLike,
+    time_hours: ArrayLike,
+    segment_ids: Optional[ArrayLike] = None,
+    n_segments: Optional[int] = None,
+    periods: Sequence[float] = (PERIOD_HOURS,),
+) -> dict:
+    """
+    Accumulate X'X, X'y and y'y of the multi-component model per segment.
+
+    Observations whose value or time is NaN are masked out.
+
+    Args:
+        values: Observed temperatures
+        time_hours: Time of each observation in hours
+        segment_ids: Segment of each observation. If None, one segment
+        n_segments: Number of segments. Defaults to max(segment_ids) + 1
+        periods: Period of every component in hours
+
+    Returns:
+        Dictionary with "xtx" (n_segments, p, p), "xty" (n_segments, p),
+        "yy" (n_segments,), the scalar "shift" subtracted from the values and
+        the "periods", where p = 1 + 2 * len(periods)
+    """
+    y = np.asarray(values, dtype=np.float64).ravel()
+    t = np.asarray(time_hours, dtype=np.float64).ravel()
+    if y.shape != t.shape:
+        raise ValueError(
+            "values and time_hours must have the same length, "
+            f"got {y.size} and {t.size}"
+        )
+    periods = tuple(float(period) for period in periods)
+    if not periods:
+        raise ValueError("periods must contain at least one period")
+
+    if segment_ids is None:
+        ids = np.zeros(y.size, dtype=np.int64)
+    else:
+        ids = np.asarray(segment_ids, dtype=np.int64).ravel()
+        if ids.shape != y.shape:
+            raise ValueError("segment_ids must have the same length as values")
+    if n_segments is None:
+        n_segments = int(ids.max()) + 1 if ids.size else 0
+
+    mask = np.isfinite(y) & np.isfinite(t)
+    if not mask.all():
+        y, t, ids = y[mask], t[mask], ids[mask]
+
+    shift = float(y.mean()) if y.size else 0.0
+    y = y - shift
+
+    def _sum(weights):
+        return np.bincount(ids, weights=weights, minlength=n_segments).astype(
+            np.float64
+        )
+
+    columns = _design_columns(t, periods)
+    p = len(columns)
+    xtx = np.empty((n_segments, p, p))
+    for i in range(p):
+        for j in range(i, p):
+            xtx[:, i, j] = xtx[:, j, i] = _sum(columns[i] * columns[j])
+    xty = np.stack([_sum(column * y) for column in columns], axis=1)
+
+    return {
+        "xtx": xtx,
+        "xty": xty,
+        "yy": _sum(y * y),
+        "shift": shift,
+        "periods": periods,
+    }
+
+
+def solve_multicosinor_sums(
+    sums: dict, inference: bool = False, alpha: float = 0.05
+) -> pd.DataFrame:
+    """
+    Solve the multi-component normal equations for every segment at once.
+
+    Segments with fewer observations than parameters or a (near) singular
+    design get NaN parameters.
+
+    Args:
+        sums: Sufficient statistics as returned by multicosinor_sums
+        inference: Also return se_M, se_A_<T>, se_phi_<T>, A_<T>_lower/upper,
+            phi_<T>_lower/upper, and the F-test of all amplitudes (f_stat,
+            p_value)
+        alpha: 1 - confidence level of the intervals
+
+    Returns:
+        DataFrame with columns n, M, then A_<T> and phi_<T> for every period
+        T (see period_label), and r_squared
+    """
+    xtx, xty, periods = sums["xtx"], sums["xty"], sums["periods"]
+    k, p = xty.shape
+    n = xtx[:, 0, 0]
+
+    coef = np.full((k, p), np.nan)
+    solvable = n >= p
+    if solvable.any():
+        # Smallest eigenvalue of X'X / n: ~0.5 for well-spread samples, ~0 if singular
+        scaled = xtx[solvable] / n[solvable, None, None]
+        solvable[solvable] = np.linalg.eigvalsh(scaled)[:, 0] > 1e-9
+    if solvable.any():
+        coef[solvable] = np.linalg.solve(xtx[solvable], xty[solvable][..., None])[
+            ..., 0
+        ]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ss_res = sums["yy"] - np.einsum("ij,ij->i", coef, xty)
+        ss_tot = sums["yy"] - xty[:, 0] ** 2 / n
+        r_squared = 1 - np.clip(ss_res, 0, None) / ss_tot
+
+    result = {"n": n.astype(np.int64), "M": coef[:, 0] + sums["shift"]}
+    for k_period, period in enumerate(periods):
+        beta, gamma = coef[:, 1 + 2 * k_period], coef[:, 2 + 2 * k_period]
+        result[f"A_{period_label(period)}"] = np.hypot(beta, gamma)
+        result[f"phi_{period_label(period)}"] = np.arctan2(-gamma, beta)
+    result["r_squared"] = r_squared
+    if inference:
+        suffixes = [f"_{period_label(period)}" for period in periods]
+        result.update(
+            _cosinor_inference(xtx, coef, ss_res, ss_tot, solvable, suffixes, alpha)
+        )
+    return pd.DataFrame(result)
+
+
+def _offsets_and_ids(values, time_hours, offsets):
+    """Slice values/times to the span covered by offsets and label segments."""
+    offsets = np.asarray(offsets, dtype=np.int64)
+    ids = segment_ids_from_offsets(offsets)
+    start, stop = offsets[0], offsets[-1]
+    values = np.asarray(values, dtype=np.float64)[start:stop]
+    time_hours = np.asarray(time_hours, dtype=np.float64)[start:stop]
+    return values, time_hours, ids, offsets.size - 1
+
+
+def fit_multicosinor(
+    values: ArrayLike,
+    time_hours: ArrayLike,
+    offsets: Optional[ArrayLike] = None,
+    periods: Sequence[float] = (PERIOD_HOURS,),
+    inference: bool = False,
+    alpha: float = 0.05,
+) -> pd.DataFrame:
+    """
+    Fit a multi-component cosinor (e.g. 24, 12 and 8 h) to every segment.
+
+    A single period goes through the 3x3 fast path of fit_cosinor.
+
+    Args:
+        values: Observed temperatures for all segments, concatenated
+        time_hours: Time of each observation in hours
+        offsets: CSR-style boundaries of the segments. If None, one segment
+        periods: Period of every component in hours
+        inference: Also return standard errors, intervals and the F-test
+            (see solve_multicosinor_sums)
+        alpha: 1 - confidence level of the intervals
+
+    Returns:
+        DataFrame with columns n, M, A_<T>, phi_<T> per period and r_squared
+    """
+    periods = tuple(periods)
+    if len(periods) == 1:
+        fit = fit_cosinor(
+            values,
+            time_hours,
+            offsets,
+            period=periods[0],
+            inference=inference,
+            alpha=alpha,
+        )
+        label = f"_{period_label(periods[0])}"
+        renamed = {}
+        for name in ("A", "phi"):
+            renamed.update(
+                {
+                    name: f"{name}{label}",
+                    f"se_{name}": f"se_{name}{label}",
+                    f"{name}_lower": f"{name}{label}_lower",
+                    f"{name}_upper": f"{name}{label}_upper",
+                }
+            )
+        return fit.rename(columns=renamed)
+
+    if offsets is None:
+        sums = multicosinor_sums(values, time_hours, periods=periods)
+    else:
+        values, time_hours, ids, n_segments = _offsets_and_ids(
+            values, time_hours, offsets
+        )
+        sums = multicosinor_sums(values, time_hours, ids, n_segments, periods)
+    return solve_multicosinor_sums(sums, inference, alpha)
+
+
+def fit_cosinor_periods(
+    values: ArrayLike,
+    time_hours: ArrayLike,
+    offsets: Optional[ArrayLike] = None,
+    periods: Sequence[float] = (PERIOD_HOURS,),
+) -> pd.DataFrame:
+    """
+    Fit a separate single-component cosinor for each candidate period.
+
+    Args:
+        values: Observed temperatures for all segments, concatenated
+        time_hours: Time of each observation in hours
+        offsets: CSR-style boundaries of the segments. If None, one segment
+        periods: Candidate periods in hours
+
+    Returns:
+        Long DataFrame with columns segment, period, n, M, A, phi, r_squared
+    """
+    fits = []
+    for period in periods:
+        fit = fit_cosinor(values, time_hours, offsets, period=period)
+        fit.insert(0, "period", float(period))
+        fit.insert(0, "segment", np.arange(len(fit)))
+        fits.append(fit)
+    return pd.concat(fits, ignore_index=True)
+
+
+def rolling_multicosinor(
+    values: ArrayLike,
+    time_hours: ArrayLike,
+    offsets: ArrayLike,
+    window: int,
+    periods: Sequence[float] = (PERIOD_HOURS,),
+    step: int = 1,
+    inference: bool = False,
+) -> pd.DataFrame:
+    """
+    Fit the cosinor over rolling windows of consecutive segments (e.g. days).
+
+    The per-segment sufficient statistics are computed once; every window's
+    sums are the difference of two running (cumulative) sums, so moving the
+    window by one day costs one small solve rather than a refit of all its
+    readings.
+
+    Args:
+        values: Observed temperatures, concatenated by segment
+        time_hours: Time of each observation in hours; use continuous time
+            for periods that do not divide 24 h
+        offsets: CSR-style boundaries of the segments
+        window: Number of segments per window
+        periods: Period of every component in hours
+        step: Segments between the starts of consecutive windows
+        inference: Also return standard errors, intervals and the F-test
+
+    Returns:
+        DataFrame with columns first_segment, last_segment followed by the
+        solve_multicosinor_sums columns, one row per window
+    """
+    if window < 1 or step < 1:
+        raise ValueError("window and step must be positive")
+    values, time_hours, ids, n_segments = _offsets_and_ids(values, time_hours, offsets)
+    sums = multicosinor_sums(values, time_hours, ids, n_segments, periods)
+
+    starts = np.arange(0, n_segments - window + 1, step)
+    window_sums = {"shift": sums["shift"], "periods": sums["periods"]}
+    for key in ("xtx", "xty", "yy"):
+        running = np.cumsum(sums[key], axis=0)
+        running = np.concatenate([np.zeros_like(running[:1]), running])
+        window_sums[key] = running[starts + window] - running[starts]
+
+    fits = solve_multicosinor_sums(window_sums, inference)
+    fits.insert(0, "last_segment", starts + window - 1)
+    fits.insert(0, "first_segment", starts)
+    return fits
+
+
+def multicosinor_curve(
+    time_hours: ArrayLike,
+    M: ArrayLike,
+    amplitudes: Sequence[ArrayLike],
+    acrophases: Sequence[ArrayLike],
+    periods: Sequence[float],
+) -> np.ndarray:
+    """
+    Evaluate multi-component cosinor curves.
+
+    Args:
+        time_hours: Times at which to evaluate the curves
+        M: Mesor(s)
+        amplitudes: One amplitude (or array of amplitudes) per period
+        acrophases: One acrophase (or array) per period, in radians
+        periods: Period of every component in hours
+
+    Returns:
+        Array of fitted values
+    """
+    curve = np.asarray(M, dtype=np.float64)
+    for A, phi, period in zip(amplitudes, acrophases, periods):
+        curve = curve + cosinor_curve(time_hours, 0.0, A, phi, period)
+    return curve
@@ -0,0 +1,422 @@
+"""
+Vectorized drinking-event detection on rumen temperature series
+
+NumPy counterparts of extraction.drink_detection and
+extraction.remove_outliers_interpolate_drink. Drop candidates come from
+segment-aware diffs over the whole series, and the local minimum and the
+recovery maxima around every drop are found with one windowed argmin/argmax
+over an (n_events x window) index matrix instead of a pandas .loc slice per
+event. Series may hold several days back to back; segment offsets keep every
+diff and window inside its own day, exactly like the per-day pandas code.
+"""
+
+from typing import Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from disco_baa_01.cosinor import ArrayLike, segment_ids_from_offsets
+
+SAMPLE_MINUTES = 5
+
+# drink_detection only considers readings at or above this temperature
+MIN_DRINK_TEMP = 30
+
+DRINK_COLUMNS = [
+    "DT",
+    "drink_temp",
+    "before_5min_temp",
+    "before_10min_temp",
+    "before_drink_temp",
+    "after_drink_recover",
+    "recover_time",
+    "drop_time",
+    "logger_code",
+]
+
+
+def _segment_bounds(n: int, offsets: Optional[ArrayLike]):
+    """Per-position [lo, hi) bounds of the segment each observation belongs to."""
+    if offsets is None:
+        return (
+            np.zeros(n, dtype=np.int64),
+            np.full(n, n, dtype=np.int64),
+            np.zeros(n, dtype=np.int64),
+        )
+    offsets = np.asarray(offsets, dtype=np.int64)
+    if offsets[0] != 0 or offsets[-1] != n:
+        raise ValueError(f"offsets must span the whole series (0 to {n})")
+    ids = segment_ids_from_offsets(offsets)
+    return offsets[:-1][ids], offsets[1:][ids], ids
+
+
+def drop_event_intervals(
+    values: ArrayLike,
+    min_temp: float = MIN_DRINK_TEMP,
+    offsets: Optional[ArrayLike] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Threshold-independent form of the drop-event rule.
+
+    With m[i] the smaller of the 1- and 2-step changes into reading i and
+    f[i] the smallest m of the next two readings (same segment, readings
+    >= min_temp), reading i is an event for temp_thresh exactly when
+    m[i] < temp_thresh <= f[i]. Computing (m, f) once lets any number of
+    thresholds be evaluated with two comparisons each.
+
+    Args:
+        values: Temperatures of one or more back-to-back segments
+        min_temp: Readings below this are ignored when computing changes
+        offsets: CSR-style segment boundaries. If None, one segment
+
+    Returns:
+        (positions, lower, upper): candidate positions into values and the
+        open/closed threshold interval (lower, upper] of each
+    """
+    values = np.asarray(values, dtype=np.float64)
+    _, _, ids = _segment_bounds(values.size, offsets)
+
+    kept = np.flatnonzero(values >= min_temp)
+    v = values[kept]
+    seg = ids[kept]
+
+    drop = np.full(v.size, np.inf)
+    for lag in (1, 2):
+        if v.size > lag:
+            same = seg[lag:] == seg[:-lag]
+            drop[lag:] = np.minimum(
+                drop[lag:], np.where(same, v[lag:] - v[:-lag], np.inf)
+            )
+
+    following = np.full(v.size, np.inf)
+    for lag in (1, 2):
+        if v.size > lag:
+            same = seg[lag:] == seg[:-lag]
+            following[:-lag] = np.minimum(
+                following[:-lag], np.where(same, drop[lag:], np.inf)
+            )
+
+    candidate = drop < following
+    return kept[candidate], drop[candidate], following[candidate]
+
+
+def find_drop_events(
+    values: ArrayLike,
+    temp_thresh: float,
+    min_temp: float = MIN_DRINK_TEMP,
+    offsets: Optional[ArrayLike] = None,
+) -> np.ndarray:
+    """
+    Find the positions of significant temperature drops that end a drop run.
+
+    Mirrors the pandas rule: among readings >= min_temp (per segment), a drop
+    is significant when the 1- or 2-step change is below temp_thresh, and an
+    event is a significant drop not followed by another one within 2 steps.
+
+    Args:
+        values: Temperatures of one or more back-to-back segments
+        temp_thresh: Change (negative, in degrees) that counts as a drop
+        min_temp: Readings below this are ignored when computing changes
+        offsets: CSR-style segment boundaries. If None, one segment
+
+    Returns:
+        Sorted integer positions (into values) of the detected events
+    """
+    positions, lower, upper = drop_event_intervals(values, min_temp, offsets)
+    return positions[(lower < temp_thresh) & (temp_thresh <= upper)]
+
+
+def window_arg_extreme(
+    values: np.ndarray,
+    centers: np.ndarray,
+    before: int,
+    after: int,
+    lo: np.ndarray,
+    hi: np.ndarray,
+    find_max: bool = False,
+) -> np.ndarray:
+    """
+    Position of the first minimum (or maximum) in [center - before, center + after].
+
+    Windows are clipped to [lo, hi) of each center's segment and NaNs are
+    skipped, like pandas idxmin/idxmax over a .loc label slice.
+
+    Returns:
+        Positions into values; -1 where a window holds no valid reading
+    """
+    if centers.size == 0:
+        return np.empty(0, dtype=np.int64)
+    pos = centers[:, None] + np.arange(-before, after + 1)
+    valid = (pos >= lo[:, None]) & (pos < hi[:, None])
+    window = values[np.clip(pos, 0, values.size - 1)]
+    valid &= ~np.isnan(window)
+    fill = -np.inf if find_max else np.inf
+    window = np.where(valid, window, fill)
+    arg = window.argmax(axis=1) if find_max else window.argmin(axis=1)
+    found = pos[np.arange(centers.size), arg]
+    return np.where(valid.any(axis=1), found, -1)
+
+
+def _single_arg_extreme(
+    values: np.ndarray,
+    center: int,
+    before: int,
+    after: int,
+    lo: int,
+    hi: int,
+    find_max: bool = False,
+) -> int:
+    """window_arg_extreme for one center, on a slice instead of an index matrix."""
+    start = max(center - before, lo)
+    window = values[start : min(center + after + 1, hi)]
+    valid = ~np.isnan(window)
+    if not valid.any():
+        return -1
+    if find_max:
+        return start + int(np.where(valid, window, -np.inf).argmax())
+    return start + int(np.where(valid, window, np.inf).argmin())
+
+
+def detect_drinking_events(
+    values: ArrayLike,
+    timestamps: ArrayLike,
+    temp_thresh: float = -1.0,
+    min_temp: float = MIN_DRINK_TEMP,
+    offsets: Optional[ArrayLike] = None,
+) -> dict:
+    """
+    Detect drinking events and their features for a whole sheep series.
+
+    Args:
+        values: Temperatures of one or more back-to-back days
+        timestamps: Timestamp of each reading
+        temp_thresh: Change (negative, in degrees) that counts as a drop
+        min_temp: Readings below this are ignored when finding drops
+        offsets: CSR-style day boundaries. If None, one segment
+
+    Returns:
+        Columnar dict with the DRINK_COLUMNS fields (except logger_code) plus
+        "position", the index of the drink minimum in values
+    """
+    values = np.asarray(values, dtype=np.float64)
+    timestamps = np.asarray(timestamps)
+    lo, hi, _ = _segment_bounds(values.size, offsets)
+
+    events = find_drop_events(values, temp_thresh, min_temp, offsets)
+    features = event_features(values, timestamps, events, lo, hi)
+    del features["event"]
+    return features
+
+
+def event_features(
+    values: np.ndarray,
+    timestamps: np.ndarray,
+    events: np.ndarray,
+    lo: np.ndarray,
+    hi: np.ndarray,
+) -> dict:
+    """
+    Features of drop events at the given positions.
+
+    Args:
+        values: Temperatures of the whole series
+        timestamps: Timestamp of each reading
+        events: Drop positions (from find_drop_events / drop_event_intervals)
+        lo: Per-position segment start (from _segment_bounds)
+        hi: Per-position segment end
+
+    Returns:
+        Columnar dict as detect_drinking_events, plus "event", the index into
+        events each row came from (events without a valid minimum are dropped)
+    """
+    min_pos = window_arg_extreme(values, events, 5, 20, lo[events], hi[events])
+    event = np.flatnonzero(min_pos >= 0)
+    min_pos = min_pos[event]
+    seg_lo = lo[min_pos]
+    seg_hi = hi[min_pos]
+
+    # Readings 5 and 10 minutes before the minimum, or the minimum itself near the
+    # day start
+    has_history = (min_pos - seg_lo) >= 2
+    before_5 = np.where(has_history, min_pos - 1, min_pos)
+    before_10 = np.where(has_history, min_pos - 2, min_pos)
+
+    start_max = window_arg_extreme(values, min_pos, 3, 0, seg_lo, seg_hi, find_max=True)
+    end_max = window_arg_extreme(values, min_pos, 0, 30, seg_lo, seg_hi, find_max=True)
+
+    return {
+        "event": event,
+        "position": min_pos,
+        "DT": timestamps[min_pos],
+        "drink_temp": values[min_pos],
+        "before_5min_temp": values[before_5],
+        "before_10min_temp": values[before_10],
+        "before_drink_temp": values[start_max],
+        "after_drink_recover": values[end_max],
+        "recover_time": SAMPLE_MINUTES * (end_max - min_pos),
+        "drop_time": SAMPLE_MINUTES * (min_pos - start_max),
+    }
+
+
+def drink_detection_vectorized(
+    data: pd.DataFrame, col_name: str, temp_thresh: float = -1.0
+) -> pd.DataFrame:
+    """
+    Drop-in NumPy replacement for extraction.drink_detection.
+
+    Args:
+        data: One day of readings with 'DT' and col_name columns
+        col_name: Logger column name of the sheep
+        temp_thresh: Change (negative, in degrees) that counts as a drop
+
+    Returns:
+        DataFrame with the DRINK_COLUMNS, one row per event (empty if none)
+    """
+    events = detect_drinking_events(
+        data[col_name].to_numpy(dtype=np.float64), data["DT"].to_numpy(), temp_thresh
+    )
+    if events["position"].size == 0:
+        return pd.DataFrame()
+    del events["position"]
+    events["logger_code"] = col_name
+    return pd.DataFrame(events, columns=DRINK_COLUMNS)
+
+
+def mask_drinking_events(
+    values: ArrayLike,
+    abnormal_temp_thresh: float = 35,
+    temp_thresh: float = -0.5,
+    offsets: Optional[ArrayLike] = None,
+) -> np.ndarray:
+    """
+    Blank out (NaN) the readings inside every detected drink dip.
+
+    The dip around each event spans from the pre-drink maximum to the recovery
+    maximum, exclusive. Windows are evaluated in one vectorized pass; an event
+    whose windows overlap a dip already blanked by an earlier event is
+    re-evaluated on the partially blanked series, which is what the sequential
+    pandas loop sees.
+
+    Returns:
+        Float64 copy of values with the dips set to NaN
+    """
+    values = np.asarray(values, dtype=np.float64)
+    lo, hi, _ = _segment_bounds(values.size, offsets)
+    events = find_drop_events(values, temp_thresh, abnormal_temp_thresh, offsets)
+    return blank_event_dips(
+        values, events, *dip_windows(values, events, lo, hi), lo, hi
+    )
+
+
+def dip_windows(values: np.ndarray, events: np.ndarray, lo: np.ndarray, hi: np.ndarray):
+    """
+    Minimum and surrounding maxima of every event's dip, on the unmasked series.
+
+    Returns:
+        (min_pos, start_max, end_max) position arrays; min_pos is -1 where the
+        event window holds no valid reading
+    """
+    min_pos = window_arg_extreme(values, events, 10, 20, lo[events], hi[events])
+    safe_min = np.maximum(min_pos, 0)
+    start_max = window_arg_extreme(
+        values, safe_min, 10, 5, lo[events], hi[events], find_max=True
+    )
+    end_max = window_arg_extreme(
+        values, safe_min, 0, 20, lo[events], hi[events], find_max=True
+    )
+    return min_pos, start_max, end_max
+
+
+def blank_event_dips(
+    values: np.ndarray,
+    events: np.ndarray,
+    min_pos: np.ndarray,
+    start_max: np.ndarray,
+    end_max: np.ndarray,
+    lo: np.ndarray,
+    hi: np.ndarray,
+) -> np.ndarray:
+    """
+    Blank the dips of events in order, given their precomputed windows.
+
+    An event whose windows overlap a dip already blanked by an earlier event
+    is re-evaluated on the partially blanked series, as the sequential pandas
+    loop would.
+
+    Returns:
+        Float64 copy of values with the dips set to NaN
+    """
+    safe_min = np.maximum(min_pos, 0)
+    masked = values.copy()
+    blanked = np.zeros(values.size, dtype=bool)
+    for k, event in enumerate(events):
+        start, end = start_max[k], end_max[k]
+        # Span of every window this event looks at
+        reach_lo = max(lo[event], min(event - 10, safe_min[k] - 10))
+        reach_hi = min(hi[event], max(event + 20, safe_min[k] + 20) + 1)
+        if min_pos[k] < 0 or blanked[reach_lo:reach_hi].any():
+            bounds = (lo[event], hi[event])
+            m = _single_arg_extreme(masked, event, 10, 20, *bounds)
+            if m < 0:
+                continue
+            start = _single_arg_extreme(masked, m, 10, 5, *bounds, find_max=True)
+            end = _single_arg_extreme(masked, m, 0, 20, *bounds, find_max=True)
+        if end - 1 >= start + 1:
+            masked[start + 1 : end] = np.nan
+            blanked[start + 1 : end] = True
+    return masked
+
+
+def interpolate_segments(
+    values: ArrayLike, offsets: Optional[ArrayLike] = None
+) -> np.ndarray:
+    """
+    Linearly interpolate NaNs by position within each segment.
+
+    Matches pandas Series.interpolate(method='linear') applied per segment:
+    interior gaps are interpolated, trailing NaNs take the last valid value
+    and leading NaNs stay NaN.
+
+    Returns:
+        Float64 array of interpolated values
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = values.size
+    lo, hi, _ = _segment_bounds(n, offsets)
+    positions = np.arange(n)
+    valid = ~np.isnan(values)
+
+    prev_valid = np.maximum.accumulate(np.where(valid, positions, -1))
+    next_valid = np.minimum.accumulate(np.where(valid, positions, n)[::-1])[::-1]
+    has_prev = prev_valid >= lo
+    has_next = (next_valid < hi) & has_prev
+
+    prev_idx = np.clip(prev_valid, 0, n - 1)
+    next_idx = np.clip(next_valid, 0, n - 1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        weight = (positions - prev_idx) / (next_idx - prev_idx)
+    interpolated = values[prev_idx] + (values[next_idx] - values[prev_idx]) * weight
+
+    out = np.where(has_prev, values[prev_idx], np.nan)
+    out = np.where(has_next, interpolated, out)
+    return np.where(valid, values, out)
+
+
+def remove_outliers_interpolate_drink_vectorized(
+    data: pd.DataFrame,
+    col_name: str,
+    abnormal_temp_thresh: float = 35,
+    temp_thresh: float = -0.5,
+) -> pd.DataFrame:
+    """
+    Drop-in NumPy replacement for extraction.remove_outliers_interpolate_drink.
+
+    Returns:
+        data with its index reset and the drink dips in col_name interpolated
+    """
+    data = data.reset_index()
+    masked = mask_drinking_events(
+        data[col_name].to_numpy(dtype=np.float64), abnormal_temp_thresh, temp_thresh
+    )
+    data[col_name] = interpolate_segments(masked)
+    return data
@@ -0,0 +1,664 @@
+"""
+Per-sheep cosinor and drinking-behaviour extraction from rumen temperature
+
+Ported from dev/examples/luoyang/cosinor_drink_extracion_single_process.py so
+the analyses can be imported by the batch runners. Each sheep's series is
+loaded once with load_sheep_series and then passed to the extractors.
+
+Progress and problems are reported through the "disco_baa_01.extraction"
+logger (per sheep-day detail at DEBUG) and, while a RunStats is collecting,
+as stage timings and counters (see disco_baa_01.instrumentation).
+"""
+
+import logging
+import os
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from disco_baa_01.cache import SeriesCache
+from disco_baa_01.cosinor import (
+    PERIOD_HOURS,
+    cosinor_curve,
+    fit_cosinor,
+    segment_ids_from_offsets,
+)
+from disco_baa_01.drinking import (
+    DRINK_COLUMNS,
+    detect_drinking_events,
+    interpolate_segments,
+    mask_drinking_events,
+)
+from disco_baa_01.instrumentation import Progress, active_stats, count, stage
+from disco_baa_01.percentiles import pointed_temp_values_segments
+from disco_baa_01.resampling import resample_to_grid
+from disco_baa_01.segments import segment_days, time_of_day_hours
+from disco_baa_01.store import TemperatureStore, is_temperature_store
+
+# Days with fewer readings than this are skipped
+MIN_DAILY_RECORDS = 280
+
+PERCENT_LIST = [1, 5, 10, 20, 30, 40, 45]
+
+log = logging.getLogger(__name__)
+
+
+# Cosinor model function
+def cosinor_model(t, M, A, phi):
+    return cosinor_curve(t, M, A, phi, period=PERIOD_HOURS)
+
+
+# Function to perform cosinor analysis
+def perform_cosinor_analysis(temp_data, time_hours):
+    try:
+        # Closed-form least squares; equivalent to curve_fit on cosinor_model
+        time_hours = (
+            time_hours.loc[temp_data.index]
+            if hasattr(time_hours, "loc")
+            else time_hours
+        )
+        fit = fit_cosinor(temp_data.to_numpy(), np.asarray(time_hours)).iloc[0]
+        return fit["M"], fit["A"], fit["phi"], fit["r_squared"]
+    except Exception as e:
+        log.warning("Cosinor analysis failed: %s", e)
+        return np.nan, np.nan, np.nan, np.nan
+
+
+# Function to remove outliers and interpolate data
+def remove_outliers_interpolate_drink(
+    data, col_name, abnormal_temp_thresh=35, temp_thresh=-0.5
+):
+    data = data.reset_index()
+    filtered_data = data[data[col_name] >= abnormal_temp_thresh].copy()
+    filtered_data["Temp_Change"] = filtered_data[col_name].diff()
+    filtered_data["Temp_Change_2"] = filtered_data[col_name].diff(2)
+    filtered_data["Significant_Drop"] = (filtered_data["Temp_Change"] < temp_thresh) | (
+        filtered_data["Temp_Change_2"] < temp_thresh
+    )
+    filtered_data["Follows_Drop"] = filtered_data["Significant_Drop"].shift(
+        -1, fill_value=False
+    ) | filtered_data["Significant_Drop"].shift(-2, fill_value=False)
+    drinking_events = filtered_data[
+        (filtered_data["Significant_Drop"]) & (~filtered_data["Follows_Drop"])
+    ]
+
+    for idx in drinking_events.index:
+        try:
+            tmp_drop_data = data.loc[idx - 10 : idx + 20][["DT", col_name]].copy()
+            if not tmp_drop_data.empty:
+                min_index = tmp_drop_data[col_name].idxmin()
+                start_max_index = (
+                    data.loc[min_index - 10 : min_index + 5, col_name]
+                ).idxmax()
+                end_max_index = (
+                    data.loc[min_index : min_index + 20, col_name]
+                ).idxmax()
+                data.loc[(start_max_index + 1) : (end_max_index - 1), col_name] = np.nan
+        except Exception as e:
+            log.warning(
+                "Error in outlier removal/interpolation for drinking event "
+                "at index %s: %s",
+                idx,
+                e,
+            )
+
+    data[col_name] = data[col_name].interpolate(method="linear")
+    return data
+
+
+def extract_pointed_temp_value(temp_data, percentage_split):
+    try:
+        temp_sorted = temp_data.sort_values(ascending=True).reset_index(drop=True)
+        temp_sorted_inverse = temp_data.sort_values(ascending=False).reset_index(
+            drop=True
+        )
+        n = len(temp_data)
+        if n > 0:
+            indice = int(percentage_split * n)
+            if indice < n:
+                return temp_sorted.iloc[indice], temp_sorted_inverse.iloc[indice]
+            else:
+                return np.nan, np.nan
+        else:
+            return np.nan, np.nan
+    except Exception as e:
+        log.warning(
+            "Error extracting pointed temperature value at %s: %s", percentage_split, e
+        )
+        return np.nan, np.nan
+
+
+def drink_detection(data, col_name, temp_thresh=-1.0):
+    data = data.reset_index()
+    # Filter out abnormal data, keeping records where temperature is >= 30 degrees
+    filtered_data = data[data[col_name] >= 30].copy()
+
+    # Calculate temperature changes to help identify drinking events
+    filtered_data["Temp_Change"] = filtered_data[col_name].diff()
+
+    # Define a significant temperature drop (>1 degree within 5 to 10 minutes)
+    # This accounts for consecutive readings, considering the data sampling rate
+    # (every 5 minutes)
+    # Change over 10 minutes
+    filtered_data["Temp_Change_2"] = filtered_data[col_name].diff(2)
+    filtered_data["Significant_Drop"] = (filtered_data["Temp_Change"] < temp_thresh) | (
+        filtered_data["Temp_Change_2"] < temp_thresh
+    )
+
+    # Identify rows immediately following a significant drop, implying temperature
+    # begins to stabilize
+    filtered_data["Follows_Drop"] = filtered_data["Significant_Drop"].shift(
+        -1, fill_value=False
+    ) | filtered_data["Significant_Drop"].shift(-2, fill_value=False)
+
+    # Select events that represent a significant drop followed by a stabilization
+    drinking_events = filtered_data[
+        (filtered_data["Significant_Drop"]) & (~filtered_data["Follows_Drop"])
+    ]
+
+    res_data_list = []
+
+    for idx in drinking_events.index:
+        tmp_drop_data = data.loc[idx - 5 : idx + 20][["DT", col_name]]
+        # find the minimum value index in a window
+        min_index = tmp_drop_data[col_name].idxmin()
+
+        if min_index >= 2:
+            temp_before_5min = data.loc[min_index - 1][col_name]
+            temp_before_10min = data.loc[min_index - 2][col_name]
+        else:
+            temp_before_5min = data.loc[min_index][col_name]
+            temp_before_10min = data.loc[min_index][col_name]
+
+        start_max_index = (data.loc[min_index - 3 : min_index][col_name]).idxmax()
+        temp_before_drink = data.loc[start_max_index][col_name]
+
+        end_max_index = (data.loc[min_index : min_index + 30][col_name]).idxmax()
+        temp_after_drink_rec = data.loc[end_max_index][col_name]
+
+        tmp_res_df = pd.DataFrame(
+            {
+                "DT": [data.loc[min_index]["DT"]],
+                "drink_temp": [data.loc[min_index][col_name]],
+                "before_5min_temp": [temp_before_5min],
+                "before_10min_temp": [temp_before_10min],
+                "before_drink_temp": [temp_before_drink],
+                "after_drink_recover": [temp_after_drink_rec],
+                "recover_time": [5 * (end_max_index - min_index)],
+                "drop_time": [5 * (min_index - start_max_index)],
+                "logger_code": [col_name],
+            }
+        )
+
+        res_data_list.append(tmp_res_df)
+
+    if len(res_data_list) == 0:
+        return pd.DataFrame()
+
+    res_data = pd.concat(res_data_list)
+
+    return res_data
+
+
+def add_time_helper_columns(sheep_data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add the date/hour helper columns and index a 'DT' series by timestamp.
+
+    'date' ('YYYY-MM-DD') and 'hour' ('0'..'23') are categoricals built from
+    integer day and hour codes, so no per-row strings are formatted.
+    """
+    sheep_data["DT"] = pd.to_datetime(sheep_data["DT"])
+    timestamps = sheep_data["DT"].to_numpy(dtype="datetime64[ns]")
+    missing = np.isnat(timestamps)
+    days, day_codes = np.unique(timestamps.astype("datetime64[D]"), return_inverse=True)
+    day_codes = np.where(missing, -1, day_codes.ravel())
+    days = days[~np.isnat(days)]
+    sheep_data["date"] = pd.Categorical.from_codes(
+        day_codes, categories=np.datetime_as_string(days, unit="D")
+    )
+    hours = np.where(
+        missing, -1, timestamps.astype("datetime64[h]").view(np.int64) % 24
+    )
+    sheep_data["hour"] = pd.Categorical.from_codes(
+        hours, categories=[str(h) for h in range(24)]
+    )
+    sheep_data["DataTime"] = sheep_data["DT"]
+    sheep_data.set_index("DataTime", inplace=True)
+    return sheep_data
+
+
+def load_sheep_series(
+    source: Union[str, Path, TemperatureStore],
+    sheep_id: str,
+    start=None,
+    end=None,
+    cache: Optional[Union[str, Path, SeriesCache]] = None,
+) -> Optional[pd.DataFrame]:
+    """
+    Load one sheep's series and add the date/hour helper columns.
+
+    Args:
+        source: A TemperatureStore (or its root directory), or the path to the
+            sheep's split CSV with 'DT' and sheep_id columns
+        sheep_id: Logger column name of the sheep
+        start: Inclusive lower bound on 'DT' (store and cached sources only)
+        end: Exclusive upper bound on 'DT' (store and cached sources only)
+        cache: SeriesCache (or its root directory). When given, the series is
+            read from the memory-mapped cache, which is built or refreshed
+            from source as needed
+
+    Returns:
+        DataFrame indexed by timestamp, or None if the sheep's data is missing
+    """
+    if cache is not None:
+        cache = cache if isinstance(cache, SeriesCache) else SeriesCache(cache)
+        source_path = source.root if isinstance(source, TemperatureStore) else source
+        try:
+            sheep_data = cache.frame(source_path, sheep_id, start, end)
+        except (FileNotFoundError, KeyError) as e:
+            log.warning("%s. Skipping.", e)
+            return None
+        if sheep_data.empty:
+            log.warning("No readings for '%s' in %s. Skipping.", sheep_id, source_path)
+            return None
+        return add_time_helper_columns(sheep_data)
+
+    if not isinstance(source, TemperatureStore) and is_temperature_store(source):
+        source = TemperatureStore(source)
+
+    if isinstance(source, TemperatureStore):
+        sheep_data = source.read_sheep_series(sheep_id, start, end)
+        if sheep_data.empty:
+            log.warning(
+                "No readings for '%s' in store %s. Skipping.", sheep_id, source.root
+            )
+            return None
+        return add_time_helper_columns(sheep_data)
+
+    sheep_data = pd.read_csv(source)
+    if "DT" not in sheep_data.columns or sheep_id not in sheep_data.columns:
+        log.warning("Missing 'DT' or '%s' column in %s. Skipping.", sheep_id, source)
+        return None
+    return add_time_helper_columns(sheep_data)
+
+
+def _skip_short_days(segments, lengths, sheep_id):
+    """Drop days with fewer than MIN_DAILY_RECORDS readings, counting them."""
+    complete = lengths >= MIN_DAILY_RECORDS
+    n_short = int((~complete).sum())
+    if n_short:
+        count("days_skipped_short", n_short)
+        if log.isEnabledFor(logging.DEBUG):
+            for current_date in segments.date_strings()[~complete]:
+                log.debug(
+                    "Insufficient data points (< %d) for %s on %s. Skipping.",
+                    MIN_DAILY_RECORDS,
+                    sheep_id,
+                    current_date,
+                )
+    return segments.select(complete), lengths[complete]
+
+
+def _segment_sheep_days(
+    sheep_data, sheep_id, abnormal_temp_thresh, max_gap_minutes=None
+):
+    """
+    Kept readings of a sheep split into its complete days.
+
+    With max_gap_minutes the series is first aligned to the 5-minute grid
+    (resampling.resample_to_grid): days then hold every slot, NaN where a gap
+    was longer than max_gap_minutes, so positions are time and the drink
+    windows and durations are exact. A day's length counts its non-NaN slots.
+
+    Returns:
+        (values, timestamps, segments, lengths) with one length per kept day
+    """
+    with stage("segment"):
+        values = sheep_data[sheep_id].to_numpy(dtype=np.float64)
+        if max_gap_minutes is None:
+            timestamps = sheep_data["DT"].to_numpy()
+            segments = segment_days(timestamps, keep=values >= abnormal_temp_thresh)
+            lengths = segments.lengths
+        else:
+            grid = resample_to_grid(
+                sheep_data["DT"],
+                values,
+                max_gap_minutes=max_gap_minutes,
+                min_value=abnormal_temp_thresh,
+            )
+            values, timestamps = grid.values, grid.timestamps
+            segments = segment_days(timestamps)
+            filled = segments.take(~np.isnan(values))
+            day_ids = segment_ids_from_offsets(segments.offsets)
+            lengths = np.bincount(
+                day_ids, weights=filled, minlength=segments.n_days
+            ).astype(np.int64)
+        segments, lengths = _skip_short_days(segments, lengths, sheep_id)
+        return values, timestamps, segments, lengths
+
+
+def extract_cosinor_features(
+    sheep_data,
+    sheep_id,
+    abnormal_temp_thresh=35,
+    temp_thresh=-0.5,
+    extract_min_max_temp=True,
+    max_gap_minutes=None,
+):
+    """
+    Fit a daily cosinor to a loaded sheep series.
+
+    The series is split into days once (segment_days); drink dips are masked
+    and interpolated, and the fits and percentiles computed, for all days
+    together. With max_gap_minutes the series is aligned to the 5-minute grid
+    first and gaps longer than that stay out of the fit.
+
+    Returns:
+        DataFrame with one row per valid day (empty if no day qualified)
+    """
+    values, timestamps, segments, lengths = _segment_sheep_days(
+        sheep_data, sheep_id, abnormal_temp_thresh, max_gap_minutes
+    )
+    if segments.n_days == 0:
+        return pd.DataFrame()
+
+    with stage("clean"):
+        day_values = segments.take(values)
+        cleaned = interpolate_segments(
+            mask_drinking_events(
+                day_values, abnormal_temp_thresh, temp_thresh, segments.offsets
+            ),
+            segments.offsets,
+        )
+        # Drink dips are interpolated; grid gaps left unfilled stay NaN
+        cleaned[np.isnan(day_values)] = np.nan
+    with stage("fit"):
+        time_hours = time_of_day_hours(segments.take(timestamps))
+        fits = fit_cosinor(cleaned, time_hours, segments.offsets)
+    count("days_fitted", segments.n_days)
+    count("failed_fits", int(fits["M"].isna().sum()))
+
+    cosinor_df = pd.DataFrame(
+        {
+            "group": sheep_id[0],
+            "sheep_id": sheep_id,
+            "record_date": segments.date_strings(),
+            "record_num": lengths,
+            "M": fits["M"].to_numpy(),
+            "A": fits["A"].to_numpy(),
+            "phi": fits["phi"].to_numpy(),
+            "r_squared": fits["r_squared"].to_numpy(),
+        }
+    )
+
+    if extract_min_max_temp:
+        with stage("fit"):
+            min_vals, max_vals = pointed_temp_values_segments(
+                cleaned, segments.offsets, [percent / 100.0 for percent in PERCENT_LIST]
+            )
+        for k, percent in enumerate(PERCENT_LIST):
+            cosinor_df[f"percent_{percent}_min"] = min_vals[:, k]
+            cosinor_df[f"percent_{percent}_max"] = max_vals[:, k]
+
+    if log.isEnabledFor(logging.DEBUG):
+        for row in cosinor_df.itertuples(index=False):
+            log.debug(
+                "Processed %s | Date: %s | M: %.2f, A: %.2f, phi: %.2f, R2: %.2f",
+                sheep_id,
+                row.record_date,
+                row.M,
+                row.A,
+                row.phi,
+                row.r_squared,
+            )
+
+    return cosinor_df
+
+
+def extract_drinking_behavior(
+    sheep_data,
+    sheep_id,
+    abnormal_temp_thresh=35,
+    temp_thresh=-0.5,
+    max_gap_minutes=None,
+):
+    """
+    Detect drinking events, day by day, in a loaded sheep series.
+
+    Days come from one segment_days pass and are searched together, with the
+    day offsets keeping every lag and window inside its own day. With
+    max_gap_minutes the windows run over the 5-minute grid, so recover_time
+    and drop_time are true minutes even where readings are missing.
+
+    Returns:
+        DataFrame with one row per drinking event (empty if none were found)
+    """
+    values, timestamps, segments, _ = _segment_sheep_days(
+        sheep_data, sheep_id, abnormal_temp_thresh, max_gap_minutes
+    )
+    if segments.n_days == 0:
+        return pd.DataFrame()
+
+    with stage("detect"):
+        events = detect_drinking_events(
+            segments.take(values),
+            segments.take(timestamps),
+            temp_thresh=temp_thresh,
+            offsets=segments.offsets,
+        )
+    count("drink_events", events["position"].size)
+    if events["position"].size == 0:
+        return pd.DataFrame()
+
+    if log.isEnabledFor(logging.DEBUG):
+        event_days = (
+            np.searchsorted(segments.offsets, events["position"], side="right") - 1
+        )
+        drink_counts = np.bincount(event_days, minlength=segments.n_days)
+        for current_date, drink_count in zip(segments.date_strings(), drink_counts):
+            if drink_count:
+                log.debug(
+                    "Extracted %s | Date: %s | Drink count: %d",
+                    sheep_id,
+                    current_date,
+                    drink_count,
+                )
+
+    drink_df = pd.DataFrame(
+        {col: events[col] for col in DRINK_COLUMNS if col != "logger_code"}
+    )
+    drink_df["logger_code"] = sheep_id
+    drink_df["hour"] = drink_df["DT"].dt.hour
+    return drink_df
+
+
+def save_cosinor_features(cosinor_df, sheep_id, output_dir):
+    """Write a sheep's cosinor features to <output_dir>/<id>_cosinor_features.csv."""
+    if cosinor_df.empty:
+        log.warning("No valid cosinor features extracted for %s.", sheep_id)
+        return None
+    output_file = os.path.join(output_dir, f"{sheep_id}_cosinor_features.csv")
+    with stage("write"):
+        cosinor_df.to_csv(output_file, index=False)
+    log.debug("Saved cosinor features for %s to %s", sheep_id, output_file)
+    return output_file
+
+
+def save_drinking_behavior(drink_df, sheep_id, output_dir):
+    """Write a sheep's drinking events to <output_dir>/<id>_drinking_behavior.csv."""
+    if drink_df.empty:
+        log.warning("No valid drinking events extracted for %s.", sheep_id)
+        return None
+    output_file = os.path.join(output_dir, f"{sheep_id}_drinking_behavior.csv")
+    with stage("write"):
+        drink_df.to_csv(output_file, index=False)
+    log.debug("Saved drinking behavior for %s to %s", sheep_id, output_file)
+    return output_file
+
+
+def process_single_sheep_cosinor(
+    file_path,
+    sheep_id,
+    abnormal_temp_thresh=35,
+    temp_thresh=-0.5,
+    extract_min_max_temp=True,
+    output_dir=None,
+    cache_dir=None,
+):
+    """
+    Process data for a single sheep from a split CSV or a TemperatureStore.
+
+    The features are written to output_dir when it is given and returned.
+    With cache_dir the series is read through a SeriesCache there.
+    """
+    try:
+        with stage("load"):
+            sheep_data = load_sheep_series(file_path, sheep_id, cache=cache_dir)
+        if sheep_data is None:
+            count("sheep_skipped")
+            return None
+        cosinor_df = extract_cosinor_features(
+            sheep_data,
+            sheep_id,
+            abnormal_temp_thresh,
+            temp_thresh,
+            extract_min_max_temp,
+        )
+        if output_dir is not None:
+            save_cosinor_features(cosinor_df, sheep_id, output_dir)
+        count("sheep_processed")
+        return cosinor_df
+    except Exception as e:
+        count("sheep_failed")
+        log.error("Error processing sheep %s from %s: %s", sheep_id, file_path, e)
+        return None
+
+
+def process_single_sheep_drinking(
+    file_path,
+    sheep_id,
+    abnormal_temp_thresh=35,
+    temp_thresh=-0.5,
+    extract_min_max_temp=True,
+    output_dir=None,
+    cache_dir=None,
+):
+    """
+    Process data for a single sheep from a split CSV or a TemperatureStore.
+
+    The drinking events are written to output_dir when it is given and returned.
+    With cache_dir the series is read through a SeriesCache there.
+    """
+    try:
+        with stage("load"):
+            sheep_data = load_sheep_series(file_path, sheep_id, cache=cache_dir)
+        if sheep_data is None:
+            count("sheep_skipped")
+            return None
+        drink_df = extract_drinking_behavior(
+            sheep_data, sheep_id, abnormal_temp_thresh, temp_thresh
+        )
+        if output_dir is not None:
+            save_drinking_behavior(drink_df, sheep_id, output_dir)
+        count("sheep_processed")
+        return drink_df
+    except Exception as e:
+        count("sheep_failed")
+        log.error("Error processing sheep %s from %s: %s", sheep_id, file_path, e)
+        return None
+
+
+def split_data_by_sheep(
+    input_excel_path, sheet_name="Sheet1", splitted_data_dir="splitted_data_file"
+):
+    """
+    Loads the Excel file and splits the data into individual CSV files for each sheep.
+    """
+    try:
+        sheep_data_all = pd.read_excel(input_excel_path, sheet_name=sheet_name)
+        sheep_data_columns = [
+            col
+            for col in sheep_data_all.columns
+            if "DT" not in col and "hour" not in col and "date" not in col
+        ]
+
+        for sheep_id in sheep_data_columns:
+            sheep_df = sheep_data_all[["DT", sheep_id]].copy()
+            output_csv_path = os.path.join(splitted_data_dir, f"{sheep_id}.csv")
+            sheep_df.to_csv(output_csv_path, index=False)
+            log.info("Created splitted file for %s: %s", sheep_id, output_csv_path)
+
+        return sheep_data_columns
+
+    except FileNotFoundError:
+        log.error("Excel file not found at %s", input_excel_path)
+        return []
+    except Exception as e:
+        log.error("Error during data splitting: %s", e)
+        return []
+
+
+def list_splitted_files(splitted_data_dir):
+    """
+    List the sheep of a data directory as (sheep_id, source) pairs, sorted by sheep_id.
+
+    For a directory of split CSVs the source is each CSV's path; for a
+    TemperatureStore it is the store root.
+    """
+    if is_temperature_store(splitted_data_dir):
+        return [
+            (sheep_id, str(splitted_data_dir))
+            for sheep_id in TemperatureStore(splitted_data_dir).sheep_ids()
+        ]
+    splitted_files = sorted(
+        f for f in os.listdir(splitted_data_dir) if f.endswith(".csv")
+    )
+    return [
+        (f[: -len(".csv")], os.path.join(splitted_data_dir, f)) for f in splitted_files
+    ]
+
+
+def process_all_splitted_data(
+    splitted_data_dir,
+    abnormal_temp_thresh=35,
+    temp_thresh=-0.5,
+    extract_min_max_temp=True,
+    output_dir=None,
+    output_drink_dir=None,
+):
+    """
+    Processes all the splitted CSV files (or the TemperatureStore) in the specified
+    directory.
+
+    Every sheep goes through parallel.analyse_sheep_file in this process, so a
+    sheep that fails to load or analyse is logged and reported in the summary
+    instead of aborting the batch.
+
+    Returns:
+        DataFrame with one row per sheep (parallel.RESULT_COLUMNS), in sheep_id order
+    """
+    from disco_baa_01.parallel import RESULT_COLUMNS, analyse_sheep_file
+
+    sheep_files = list_splitted_files(splitted_data_dir)
+    progress = Progress(len(sheep_files))
+    stats = active_stats()
+    results = []
+    for sheep_id, file_path in sheep_files:
+        log.debug("Processing sheep: %s from %s", sheep_id, file_path)
+        result = analyse_sheep_file(
+            sheep_id,
+            file_path,
+            abnormal_temp_thresh,
+            temp_thresh,
+            extract_min_max_temp,
+            output_dir=output_dir,
+            output_drink_dir=output_drink_dir,
+        )
+        task_stats = result.pop("stats")
+        if stats is not None:
+            stats.merge(task_stats)
+        results.append(result)
+        progress.update(failed=int(result["status"] == "failed"))
+    return pd.DataFrame(results, columns=RESULT_COLUMNS)
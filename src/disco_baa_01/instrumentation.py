@@ -0,0 +1,267 @@
+"""
+Logging, stage timers, progress counters and run reports for batch runs
+
+The library logs through the standard logging module under the
+"disco_baa_01" logger: per sheep-day detail at DEBUG, per-run progress at
+INFO, skipped or failed sheep at WARNING/ERROR. Nothing is printed unless the
+application configures logging (configure_logging does it in one call).
+
+Timings and counts are collected into a RunStats while one is active
+(see collecting); collectors are per thread, so pipeline stages running
+side by side keep separate tallies. Instrumented code calls the module-level stage() and
+count(), which cost a perf_counter pair or a dict update when a collector is
+active and nothing otherwise. Worker processes collect their own RunStats
+and the parent merges the to_dict() snapshots into one run report.
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+
+PACKAGE_LOGGER = "disco_baa_01"
+
+# Stages timed by the per-sheep processors, in pipeline order
+STAGES = ("load", "segment", "clean", "fit", "detect", "write")
+
+DEFAULT_FORMAT = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+
+REPORT_FORMAT_VERSION = 1
+
+log = logging.getLogger(__name__)
+
+
+def configure_logging(
+    level: Union[int, str] = logging.INFO,
+    log_file: Optional[Union[str, Path]] = None,
+    fmt: str = DEFAULT_FORMAT,
+) -> logging.Logger:
+    """
+    Send the package's log records to stderr (or a file) at the given level.
+
+    Calling it again replaces the handler installed by the previous call.
+
+    Args:
+        level: Logging level, e.g. "DEBUG" for per sheep-day detail
+        log_file: Append to this file instead of writing to stderr
+        fmt: logging.Formatter format string
+
+    Returns:
+        The package logger
+    """
+    logger = logging.getLogger(PACKAGE_LOGGER)
+    for handler in [h for h in logger.handlers if getattr(h, "_disco_baa_01", False)]:
+        logger.removeHandler(handler)
+        handler.close()
+    handler = (
+        logging.FileHandler(log_file)
+        if log_file is not None
+        else logging.StreamHandler(sys.stderr)
+    )
+    handler.setFormatter(logging.Formatter(fmt))
+    handler._disco_baa_01 = True
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    return logger
+
+
+class RunStats:
+    """
+    Counters and accumulated per-stage wall time of a run (or one worker's share).
+    """
+
+    def __init__(self):
+        self.counters: Dict[str, int] = {}
+        self.stage_seconds: Dict[str, float] = {}
+        self.stage_calls: Dict[str, int] = {}
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + int(n)
+
+    def add_stage(self, name: str, seconds: float, calls: int = 1) -> None:
+        self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + seconds
+        self.stage_calls[name] = self.stage_calls.get(name, 0) + calls
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the enclosed block under the stage name."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage(name, time.perf_counter() - start)
+
+    def merge(self, other: Union["RunStats", dict]) -> "RunStats":
+        """Add another RunStats (or its to_dict() snapshot) into this one."""
+        if isinstance(other, RunStats):
+            other = other.to_dict()
+        for name, n in other.get("counters", {}).items():
+            self.count(name, n)
+        for name, entry in other.get("stages", {}).items():
+            self.add_stage(name, entry["seconds"], entry["calls"])
+        return self
+
+    def to_dict(self) -> dict:
+        """JSON-serialisable snapshot; stages are listed in STAGES order first."""
+        order = [name for name in STAGES if name in self.stage_seconds]
+        order += sorted(name for name in self.stage_seconds if name not in STAGES)
+        return {
+            "counters": dict(sorted(self.counters.items())),
+            "stages": {
+                name: {
+                    "seconds": self.stage_seconds[name],
+                    "calls": self.stage_calls[name],
+                }
+                for name in order
+            },
+        }
+
+
+_local = threading.local()
+
+
+def _stack() -> List[RunStats]:
+    """This thread's stack of collectors."""
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+@contextmanager
+def collecting(stats: Optional[RunStats] = None) -> Iterator[RunStats]:
+    """
+    Make stats the active collector for the enclosed block.
+
+    Args:
+        stats: Collector to fill. A new RunStats if None
+
+    Yields:
+        The active RunStats
+    """
+    stats = RunStats() if stats is None else stats
+    stack = _stack()
+    stack.append(stats)
+    try:
+        yield stats
+    finally:
+        stack.pop()
+
+
+def active_stats() -> Optional[RunStats]:
+    """The innermost active collector of this thread, or None."""
+    stack = _stack()
+    return stack[-1] if stack else None
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time the enclosed block into the active collector, if any."""
+    stats = active_stats()
+    if stats is None:
+        yield
+        return
+    with stats.stage(name):
+        yield
+
+
+def count(name: str, n: int = 1) -> None:
+    """Add n to a counter of the active collector, if any."""
+    stats = active_stats()
+    if stats is not None:
+        stats.count(name, n)
+
+
+class Progress:
+    """
+    Aggregated progress of a batch, logged at INFO at most every interval_s.
+
+    Args:
+        total: Number of items expected
+        label: What the items are, for the log line
+        interval_s: Minimum seconds between two progress lines
+        logger: Logger to write to. Defaults to this module's logger
+    """
+
+    def __init__(
+        self,
+        total: int,
+        label: str = "sheep",
+        interval_s: float = 10.0,
+        logger: Optional[logging.Logger] = None,
+    ):
+        self.total = total
+        self.label = label
+        self.interval_s = interval_s
+        self.logger = logger or log
+        self.done = 0
+        self.failed = 0
+        self.started = time.perf_counter()
+        self._last_report = self.started
+
+    @property
+    def elapsed_s(self) -> float:
+        return time.perf_counter() - self.started
+
+    def update(self, n: int = 1, failed: int = 0) -> None:
+        """Record n finished items, of which `failed` failed."""
+        self.done += n
+        self.failed += failed
+        now = time.perf_counter()
+        if self.done >= self.total or now - self._last_report >= self.interval_s:
+            self._last_report = now
+            self.report()
+
+    def report(self) -> None:
+        elapsed = self.elapsed_s
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        remaining = (self.total - self.done) / rate if rate > 0 else float("nan")
+        self.logger.info(
+            "%s %d/%d (%.0f%%), %d failed, %.1f/s, ~%.0fs left",
+            self.label,
+            self.done,
+            self.total,
+            100.0 * self.done / max(self.total, 1),
+            self.failed,
+            rate,
+            remaining,
+        )
+
+
+def build_run_report(stats: RunStats, elapsed_s: float, **extra) -> dict:
+    """
+    Machine-readable summary of a run.
+
+    Args:
+        stats: Merged collector of the run
+        elapsed_s: Wall time of the whole run; stage seconds are summed over
+            workers and can exceed it
+        **extra: Additional top-level fields (e.g. parameters)
+
+    Returns:
+        Dictionary with format, created, elapsed_s, counters, stages and extra
+    """
+    report = {
+        "format": REPORT_FORMAT_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "elapsed_s": elapsed_s,
+    }
+    report.update(stats.to_dict())
+    report.update(extra)
+    return report
+
+
+def write_run_report(report: dict, path: Union[str, Path]) -> str:
+    """Write a run report as JSON (atomically) and return its path."""
+    path = str(path)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, default=str)
+    os.replace(tmp_path, path)
+    return path
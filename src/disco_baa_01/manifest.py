@@ -0,0 +1,152 @@
+"""
+Content-hashed manifest for incremental pipeline steps
+
+Each step (e.g. masterfile ingestion or filtering) records the SHA-256 of its
+input files, its parameters (sheet name, rule versions, ...) and its output
+paths. On the next run the step is skipped when the fingerprint is unchanged
+and all outputs still exist. File hashes are cached by size and mtime, so an
+untouched multi-MB workbook is not even re-read to be hashed.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Union
+
+PathLike = Union[str, Path]
+
+HASH_CHUNK_BYTES = 1 << 20
+
+
+def file_sha256(path: PathLike) -> str:
+    """
+    Hash a file in fixed-size chunks.
+
+    Args:
+        path: File to hash
+
+    Returns:
+        Hex digest of the file's SHA-256
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def params_digest(params: dict) -> str:
+    """Stable hash of JSON-serialisable step parameters."""
+    payload = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class Manifest:
+    """
+    JSON manifest of step fingerprints, stored at `path`.
+
+    Args:
+        path: Location of the manifest file (created on first record)
+    """
+
+    def __init__(self, path: PathLike):
+        self.path = Path(path)
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._data = json.load(f)
+        else:
+            self._data = {}
+        self._data.setdefault("steps", {})
+        self._data.setdefault("hashes", {})
+
+    def file_hash(self, path: PathLike) -> str:
+        """SHA-256 of a file, reusing the cached digest while size and mtime match."""
+        path = Path(path).resolve()
+        stat = path.stat()
+        key = str(path)
+        cached = self._data["hashes"].get(key)
+        if (
+            cached
+            and cached["size"] == stat.st_size
+            and cached["mtime_ns"] == stat.st_mtime_ns
+        ):
+            return cached["sha256"]
+        digest = file_sha256(path)
+        self._data["hashes"][key] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": digest,
+        }
+        return digest
+
+    def fingerprint(
+        self, inputs: Dict[str, PathLike], params: Optional[dict] = None
+    ) -> dict:
+        """
+        Fingerprint of a step from its named input files and parameters.
+        """
+        return {
+            "inputs": {
+                name: self.file_hash(path) for name, path in sorted(inputs.items())
+            },
+            "params": params_digest(params or {}),
+        }
+
+    def is_current(
+        self,
+        step: str,
+        inputs: Dict[str, PathLike],
+        params: Optional[dict] = None,
+        outputs: Iterable[PathLike] = (),
+    ) -> bool:
+        """
+        Whether a step can be skipped.
+
+        Args:
+            step: Name of the step
+            inputs: Named input files of the step
+            params: Parameters the step's outputs depend on
+            outputs: Files the step produces
+
+        Returns:
+            True if the recorded fingerprint matches and every output exists
+        """
+        entry = self._data["steps"].get(step)
+        if entry is None:
+            return False
+        if any(not Path(p).exists() for p in outputs):
+            return False
+        if sorted(entry.get("outputs", [])) != sorted(str(p) for p in outputs):
+            return False
+        return entry["fingerprint"] == self.fingerprint(inputs, params)
+
+    def record(
+        self,
+        step: str,
+        inputs: Dict[str, PathLike],
+        params: Optional[dict] = None,
+        outputs: Iterable[PathLike] = (),
+    ) -> None:
+        """Store the fingerprint of a step that has just run and save the manifest."""
+        self._data["steps"][step] = {
+            "fingerprint": self.fingerprint(inputs, params),
+            "params": params or {},
+            "outputs": sorted(str(p) for p in outputs),
+            "recorded_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        self.save()
+
+    def invalidate(self, step: str) -> None:
+        """Forget a step so it runs on the next call."""
+        if self._data["steps"].pop(step, None) is not None:
+            self.save()
+
+    def save(self) -> None:
+        """Write the manifest atomically."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._data, f, indent=2, default=str)
+        os.replace(tmp_path, self.path)
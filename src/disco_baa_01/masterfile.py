@@ -0,0 +1,716 @@
+"""
+Heat Stress masterfile ingestion, cleaning and filtering
+
+The masterfile workbook is slow to parse, so run_masterfile_pipeline parses
+the sheet once and chains ingest -> clean -> filter -> persist on the same
+in-memory frame. When only the filter is stale, filter_parquet starts from the
+ingested Parquet artifact and reads just the columns that survive the filter.
+Both paths record their steps in the pipeline manifest (see
+disco_baa_01.manifest), so unchanged steps are skipped.
+
+load_masterfile reads the artifacts back by column group and row predicate,
+touching only the selected columns (and, through the Parquet statistics, row
+groups), either eagerly or as a lazy pyarrow / Polars scan.
+
+pandas is imported by the functions that read or build frames, so the rule
+constants and artifact paths are available without loading it.
+"""
+
+from __future__ import annotations
+
+import logging
+import operator
+import re
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from disco_baa_01.manifest import Manifest
+from disco_baa_01.utils import optimize_dtypes
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+log = logging.getLogger(__name__)
+
+PathLike = Union[str, Path]
+
+SHEET_NAME = "RF Ewe.ram data"
+
+# Bump whenever clean() (or the functions it calls) or the Parquet dtypes
+# change, so previously ingested artifacts are rebuilt
+CLEANING_RULES_VERSION = 2
+
+# Bump whenever ROWS_TO_DROP_CONDITIONS changes (lambdas can't be fingerprinted)
+FILTER_RULES_VERSION = 1
+
+ROWS_TO_DROP_CONDITIONS = [
+    # Drop males (i.e. rows were sex == 'm' or 'M')
+    lambda df: (df["sex"].str.lower() == "m"),
+]
+
+# Columns read by ROWS_TO_DROP_CONDITIONS; loaded even if they are dropped afterwards
+ROW_FILTER_COLUMNS = ["sex"]
+
+COLUMNS_TO_DROP = [
+    # Columns with only 1 unique value
+    "State",
+    "Breed",
+    # "Sensor serial 3 2022",
+    # "date start of joining 2023",
+    # "sensor serial 3 off 2023",
+    "wet_dry_marking_2023",
+    "Sensor serial 1 2024",
+    "GPS # 2024",
+    "LWC_during_joining_2024",
+    "sensor serial 3 off 2024",
+    "Site",
+    "sex",
+    "Weaning date 2022",
+    "Sensor serial 3 2023",
+    "2024 treatment (males)",
+    "Sensor serial 2 2024",
+    "Date temp logger insterted 2024",
+    "Sensor serial 1 off 2024",
+    "WT_lambing_2024",
+    "WT_marking _2024",
+    "Farm",
+    "Paddock for 2022 (rams only)",
+    "Paddock for 2023 (rams only)",
+    "Date end of joining 2023",
+    "BLOOD TAKEN 2023",
+    "date start of joining 2024",
+    "Sensor serial 3 2024",
+    "Sensor serial 2 off 2024",
+    "BLOOD TAKEN 2024",
+    "paddock_lambing_2024",
+    "wet_dry_marking_2024",
+]
+
+
+# Catalogued in dev/notes/interesting_columns.md
+REPRODUCTIVE_COLUMNS = [
+    "Date end of joining 2024",
+    "WT start of joining 2024",
+    "CS at end of joining 2024",
+    "WT end of joining 2024",
+    "Preg scan 2024",
+    "CS start of joining 2024",
+    "WT at preg scanning 2024",
+    "CS at preg scanning 2024",
+    "date of preg scanning 2023",
+    "Preg scan 2023",
+    "WT start of joining 2023",
+    "WT end of joining 2023",
+    "WT start of joining 2022",
+    "date start of joining 2022",
+    "WT at preg scanning 2023",
+    "date of preg scanning 2022",
+    "CS start of joining 2023",
+    "Date end of joining 2022",
+    "CS start of joining 2022",
+    "CS at preg scanning 2023",
+    "CS at end of joining 2022",
+    "WT end of joining 2022",
+    "CS at end of joining 2023",
+    "CS at preg scanning 2022",
+    "Preg scan 2022",
+    "WT at preg scanning 2022",
+    "LWC_during_joining_2023",
+    "LWC_during_joining_2022",
+    "paddock_lambing_2023",
+    "CS_lambing_2023",
+    "WT_lambing_2023",
+    "wet/dry 2023",
+    "CS_marking 2023",
+    "WT_marking _2023",
+    "date of preg scanning 2024",
+    "wet/dry 2022",
+    "CS_lambing_2024",
+    "CS_marking 2024",
+]
+
+# Column groups for load_masterfile: explicit lists or regular expressions
+# matched against the artifact's column names
+COLUMN_GROUPS = {
+    "ids": ["EID"],
+    "reproductive": REPRODUCTIVE_COLUMNS,
+    "weights": re.compile(r"^WT[ _]"),
+    "condition": re.compile(r"^CS[ _]"),
+    "pregnancy": re.compile(r"^(Preg scan|date of preg scanning) "),
+    "joining": re.compile(r"joining", re.IGNORECASE),
+    "loggers": re.compile(r"^Temp logger # "),
+    "sensors": re.compile(r"^sensor serial", re.IGNORECASE),
+}
+
+
+def clean_temp_logger_ids(df):
+    import pandas as pd
+
+    columns = [
+        "Temp logger # 2022",
+        "Temp logger # 2023",
+        "Temp logger # 2024",
+    ]
+
+    # Values that should be ignored when checking for unexpected fractional values
+    allowed_fractional_values = [
+        0.7,  # Known data entry artifact; row will be dropped
+    ]
+
+    def _to_nullable_int(col_name: str, series: pd.Series) -> pd.Series:
+        numeric = pd.to_numeric(series, errors="coerce")
+
+        # Alert on fractional values before conversion (excluding allowed values)
+        fractional_mask = numeric.notna() & (numeric % 1 != 0)
+        fractional_mask = fractional_mask & ~numeric.isin(allowed_fractional_values)
+
+        if fractional_mask.any():
+            sample_indices = numeric.loc[fractional_mask].head(5).index.tolist()
+            sample_values = numeric.loc[fractional_mask].head(5).tolist()
+            raise ValueError(
+                f"Column '{col_name}' has {fractional_mask.sum()} fractional values; "
+                "first examples (index -> value): "
+                f"{list(zip(sample_indices, sample_values))}"
+            )
+
+        return numeric.astype("Int64")
+
+    # Identify rows with allowed fractional values (to be dropped)
+    rows_to_drop = pd.Series([False] * len(df), index=df.index)
+    for col in columns:
+        if col in df.columns:
+            numeric = pd.to_numeric(df[col], errors="coerce")
+            rows_to_drop |= numeric.isin(allowed_fractional_values)
+
+    dropped_rows = df[rows_to_drop].copy()
+    df = df[~rows_to_drop].reset_index(drop=True)
+
+    # convert columns to nullable int
+    for col in columns:
+        if col in df.columns:
+            df[col] = _to_nullable_int(col, df[col])
+
+    return df, dropped_rows
+
+
+def clean(df) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    df, dropped_rows = clean_temp_logger_ids(df)
+
+    return df, dropped_rows
+
+
+def document_anomalies(df: pd.DataFrame, anomalies_path: Path) -> None:
+    """Analyze dataframe for known anomalies and write details to a text file.
+
+    Current checks:
+    - Rows with a 2023 pregnancy scan result but missing 2023 scan date.
+    - Specific EID "940 110009540002" flagged if present with the above condition.
+    """
+    lines: list[str] = []
+    lines.append("Data Ingestion Anomalies\n")
+    lines.append("=========================\n\n")
+
+    # Check: 2023 preg scan has result but no date
+    preg_result_col = "Preg scan 2023"
+    preg_date_col = "date of preg scanning 2023"
+    eid_col = "EID"
+
+    if preg_result_col in df.columns and preg_date_col in df.columns:
+        mask = (
+            df[preg_result_col].astype(str).str.strip().ne("")
+            & df[preg_date_col].isna()
+        )
+        count = int(mask.sum())
+        lines.append(
+            f"Rows with '{preg_result_col}' present but missing '{preg_date_col}': "
+            f"{count}\n"
+        )
+        if count:
+            # Include a small sample for quick inspection
+            cols_to_show = [
+                c for c in [eid_col, preg_result_col, preg_date_col] if c in df.columns
+            ]
+            sample = df.loc[mask, cols_to_show].head(10)
+            lines.append("Sample (up to 10 rows):\n")
+            lines.append(sample.to_string(index=True) + "\n\n")
+
+            # Specific EID of interest
+            if eid_col in df.columns:
+                specific_eid = "940 110009540002"
+                specific_mask = mask & (df[eid_col] == specific_eid)
+                if specific_mask.any():
+                    lines.append(
+                        f"Specific EID '{specific_eid}' exhibits anomaly. Details:\n"
+                    )
+                    lines.append(
+                        df.loc[specific_mask, cols_to_show].to_string(index=True)
+                        + "\n\n"
+                    )
+    else:
+        lines.append(
+            "Columns not found to check preg-scan anomaly: "
+            f"present={preg_result_col in df.columns}, "
+            f"date_col_present={preg_date_col in df.columns}\n\n"
+        )
+
+    # Write anomalies report if there is any content
+    if lines:
+        with open(anomalies_path, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+
+
+def document_dropped_rows(dropped_rows: pd.DataFrame, comments_path: Path) -> None:
+    """Write the rows removed by clean() to a text file (nothing if none dropped)."""
+    if dropped_rows.empty:
+        return
+    with open(comments_path, "w", encoding="utf-8") as f:
+        f.write("Rows Dropped During Data Ingestion\n")
+        f.write("===================================\n\n")
+        f.write(f"Total rows dropped: {len(dropped_rows)}\n\n")
+        f.write("Reason: Rows with invalid fractional values in temp logger columns\n")
+        f.write(
+            "- 0.7: Known data entry artifact; row(s) removed as data quality issue\n\n"
+        )
+        f.write("Dropped row details:\n")
+        f.write(dropped_rows.to_string())
+
+
+def to_parquet_compatible(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Copy of df with compact, Parquet-safe dtypes.
+
+    Mixed-type object columns become strings (or categoricals when they have
+    few distinct values) with missing values kept as nulls, numbers stored as
+    text become numeric and integral floats become nullable ints.
+    """
+    return optimize_dtypes(df)
+
+
+def write_artifacts(
+    df: pd.DataFrame,
+    csv_path: PathLike,
+    parquet_path: PathLike,
+    optimized: Optional[pd.DataFrame] = None,
+) -> Tuple[Path, Path]:
+    """
+    Persist a masterfile frame to CSV and Parquet.
+
+    Args:
+        df: Masterfile frame; the CSV is written from it as is
+        csv_path: CSV artifact
+        parquet_path: Parquet artifact
+        optimized: to_parquet_compatible(df), if the caller already has it
+    """
+    csv_path, parquet_path = Path(csv_path), Path(parquet_path)
+    csv_path.parent.mkdir(parents=True, exist_ok=True)
+    parquet_path.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(csv_path, index=False)
+    if optimized is None:
+        optimized = to_parquet_compatible(df)
+    optimized.to_parquet(parquet_path, index=False)
+    return csv_path, parquet_path
+
+
+def filter_frame(
+    df: pd.DataFrame,
+    columns_to_drop: Optional[Sequence[str]] = None,
+    row_filter_functions: Optional[Sequence[Callable]] = None,
+) -> pd.DataFrame:
+    """
+    Drop rows matching any row filter, then drop the listed columns.
+
+    Args:
+        df: Masterfile frame
+        columns_to_drop: Column names to drop
+        row_filter_functions: Functions that take a dataframe and return a
+            boolean series indicating which rows to drop (True = drop)
+
+    Returns:
+        The filtered frame
+    """
+    if row_filter_functions is not None:
+        for condition in row_filter_functions:
+            df = df[~condition(df)]
+    if columns_to_drop is not None:
+        df = df.drop(columns=list(columns_to_drop))
+    return df
+
+
+def read_parquet_projected(
+    parquet_path: PathLike,
+    columns_to_drop: Optional[Sequence[str]] = None,
+    extra_columns: Optional[Sequence[str]] = None,
+) -> pd.DataFrame:
+    """
+    Read a masterfile Parquet artifact without loading the dropped columns.
+
+    Args:
+        parquet_path: Ingested masterfile Parquet
+        columns_to_drop: Columns that are never loaded...
+        extra_columns: ...unless listed here (e.g. columns read by row filters)
+
+    Returns:
+        Frame with the projected columns, in file order
+    """
+    import pandas as pd
+
+    import pyarrow.parquet as pq
+
+    file_columns = pq.read_schema(str(parquet_path)).names
+    excluded = set(columns_to_drop or []) - set(extra_columns or [])
+    columns = [c for c in file_columns if c not in excluded]
+    return pd.read_parquet(parquet_path, columns=columns)
+
+
+def resolve_column_groups(
+    available: Sequence[str],
+    groups: Optional[Sequence[str]] = None,
+    columns: Optional[Sequence[str]] = None,
+) -> List[str]:
+    """
+    Columns selected by COLUMN_GROUPS names and explicit column names.
+
+    Args:
+        available: Columns of the artifact, in file order
+        groups: Names of COLUMN_GROUPS to include
+        columns: Additional column names
+
+    Returns:
+        The selected columns that exist, in file order
+
+    Raises:
+        KeyError: On an unknown group or an explicit column that does not exist
+    """
+    selected = set(columns or [])
+    missing = selected - set(available)
+    if missing:
+        raise KeyError(f"Columns not in the masterfile: {sorted(missing)}")
+    for group in groups or []:
+        if group not in COLUMN_GROUPS:
+            raise KeyError(
+                f"Unknown column group '{group}', "
+                f"expected one of {sorted(COLUMN_GROUPS)}"
+            )
+        members = COLUMN_GROUPS[group]
+        if isinstance(members, re.Pattern):
+            selected.update(c for c in available if members.search(c))
+        else:
+            selected.update(c for c in members if c in available)
+    return [c for c in available if c in selected]
+
+
+def _prefer_parquet(path: Path) -> Path:
+    """The Parquet artifact next to a CSV artifact, when it exists."""
+    if path.suffix.lower() == ".csv" and path.with_suffix(".parquet").exists():
+        return path.with_suffix(".parquet")
+    return path
+
+
+_COMPARISONS = {
+    "==": operator.eq,
+    "=": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+def _predicate(column, op: str, value, isin: Callable):
+    """One (column, op, value) filter for a pandas Series or a Polars expression."""
+    if op in _COMPARISONS:
+        return _COMPARISONS[op](column, value)
+    if op in ("in", "not in"):
+        mask = isin(column, list(value))
+        return ~mask if op == "not in" else mask
+    raise ValueError(f"Unsupported filter operator '{op}'")
+
+
+def load_masterfile(
+    path: PathLike,
+    groups: Optional[Sequence[str]] = None,
+    columns: Optional[Sequence[str]] = None,
+    filters: Optional[Sequence[tuple]] = None,
+    lazy: Optional[str] = None,
+):
+    """
+    Load selected columns and rows of a masterfile artifact.
+
+    The Parquet artifact is preferred (a .csv path is swapped for its .parquet
+    sibling when there is one): only the selected columns are read, and
+    filters are pushed down so row groups whose statistics exclude them are
+    skipped. A CSV is read with usecols and filtered afterwards.
+
+    Args:
+        path: Masterfile artifact (.parquet or .csv)
+        groups: COLUMN_GROUPS to load, e.g. ["ids", "weights"]
+        columns: Additional column names
+        filters: Row predicates as (column, op, value) tuples, all of which
+            must hold; op is one of ==, !=, <, <=, >, >=, in, not in.
+            Filter columns need not be among the loaded columns
+        lazy: None for a DataFrame, "pyarrow" for a pyarrow.dataset.Scanner,
+            "polars" for a polars.LazyFrame (Parquet only)
+
+    Returns:
+        DataFrame, or the lazy scan; all columns if no group or column is given
+    """
+    import pandas as pd
+
+    path = _prefer_parquet(Path(path))
+    filters = [tuple(f) for f in filters or []]
+    is_parquet = path.suffix.lower() == ".parquet"
+
+    if is_parquet:
+        import pyarrow.parquet as pq
+
+        available = pq.read_schema(str(path)).names
+    else:
+        available = list(pd.read_csv(path, nrows=0).columns)
+    selected = (
+        resolve_column_groups(available, groups, columns)
+        if groups or columns
+        else list(available)
+    )
+
+    if lazy is not None:
+        if not is_parquet:
+            raise ValueError("Lazy scans need the Parquet artifact")
+        if lazy == "pyarrow":
+            import pyarrow.dataset as ds
+            import pyarrow.parquet as pq
+
+            expression = pq.filters_to_expression(filters) if filters else None
+            return ds.dataset(str(path), format="parquet").scanner(
+                columns=selected, filter=expression
+            )
+        if lazy == "polars":
+            import polars as pl
+
+            scan = pl.scan_parquet(str(path))
+            for column, op, value in filters:
+                scan = scan.filter(
+                    _predicate(pl.col(column), op, value, lambda c, v: c.is_in(v))
+                )
+            return scan.select(selected)
+        raise ValueError(
+            f"Unknown lazy engine '{lazy}', expected 'pyarrow' or 'polars'"
+        )
+
+    if is_parquet:
+        return pd.read_parquet(path, columns=selected, filters=filters or None)
+
+    filter_columns = [column for column, _, _ in filters if column not in selected]
+    df = pd.read_csv(path, usecols=selected + filter_columns)
+    for column, op, value in filters:
+        df = df[_predicate(df[column], op, value, lambda c, v: c.isin(v))]
+    return df[selected].reset_index(drop=True)
+
+
+def filter_step_params(
+    columns_to_drop: Optional[Sequence[str]],
+    row_filter_functions: Optional[Sequence[Callable]],
+) -> dict:
+    """Manifest parameters of the filter step."""
+    return {
+        "columns_to_drop": sorted(columns_to_drop or []),
+        "row_filters": len(row_filter_functions or []),
+        "filter_rules_version": FILTER_RULES_VERSION,
+    }
+
+
+def filter_parquet(
+    parquet_path: PathLike,
+    output_stem: PathLike,
+    columns_to_drop: Optional[Sequence[str]] = COLUMNS_TO_DROP,
+    row_filter_functions: Optional[Sequence[Callable]] = ROWS_TO_DROP_CONDITIONS,
+    row_filter_columns: Optional[Sequence[str]] = ROW_FILTER_COLUMNS,
+    manifest_path: Optional[PathLike] = None,
+    force: bool = False,
+) -> Tuple[Path, Path]:
+    """
+    Filter the ingested masterfile Parquet without re-parsing the workbook.
+
+    Only columns that survive the filter (plus row_filter_columns) are read.
+
+    Args:
+        parquet_path: Ingested masterfile Parquet
+        output_stem: Output path without suffix; .csv and .parquet are written
+        columns_to_drop: Column names to drop
+        row_filter_functions: Functions returning True for rows to drop
+        row_filter_columns: Columns the row filters need, loaded even if dropped
+        manifest_path: Pipeline manifest to check and update (None to always run)
+        force: Run even if the manifest says the outputs are current
+
+    Returns:
+        (csv_path, parquet_path) of the filtered artifacts
+    """
+    output_stem = Path(output_stem)
+    outputs = (output_stem.with_suffix(".csv"), output_stem.with_suffix(".parquet"))
+    manifest = Manifest(manifest_path) if manifest_path is not None else None
+    step = f"filter: {Path(parquet_path).name} -> {output_stem.name}"
+    step_inputs = {"masterfile": parquet_path}
+    step_params = filter_step_params(columns_to_drop, row_filter_functions)
+    if (
+        manifest is not None
+        and not force
+        and manifest.is_current(step, step_inputs, step_params, outputs)
+    ):
+        log.info("Filtered masterfile up to date, skipping: %s", output_stem)
+        return outputs
+
+    df = read_parquet_projected(parquet_path, columns_to_drop, row_filter_columns)
+    present = [c for c in (columns_to_drop or []) if c in df.columns]
+    df = filter_frame(df, present, row_filter_functions)
+    write_artifacts(df, *outputs)
+
+    if manifest is not None:
+        manifest.record(step, step_inputs, step_params, outputs)
+    return outputs
+
+
+def ingest_paths(
+    input_filepath: PathLike, output_dir: PathLike, sheet_name: str = SHEET_NAME
+) -> Dict[str, Path]:
+    """
+    Artifacts of the ingest step: csv, parquet, anomalies and dropped_rows.
+
+    Files are named "<workbook stem> - <sheet>.<ext>" inside output_dir.
+    """
+    prefix = Path(output_dir) / f"{Path(input_filepath).stem} - {sheet_name}"
+    return {
+        "csv": prefix.with_name(prefix.name + ".csv"),
+        "parquet": prefix.with_name(prefix.name + ".parquet"),
+        "anomalies": prefix.with_name(prefix.name + " - ANOMALIES.txt"),
+        "dropped_rows": prefix.with_name(prefix.name + " - DROPPED_ROWS.txt"),
+    }
+
+
+def ingest_workbook(
+    input_filepath: PathLike, output_dir: PathLike, sheet_name: str = SHEET_NAME
+) -> pd.DataFrame:
+    """
+    Parse, clean and persist one masterfile sheet (no manifest check).
+
+    Args:
+        input_filepath: Masterfile workbook (.xlsx)
+        output_dir: Directory for the artifacts (see ingest_paths)
+        sheet_name: Sheet to ingest
+
+    Returns:
+        The cleaned frame with its Parquet dtypes, i.e. the frame
+        filter_parquet reads back, for steps that continue in memory
+    """
+    import pandas as pd
+
+    paths = ingest_paths(input_filepath, output_dir, sheet_name)
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    df = pd.read_excel(str(input_filepath), sheet_name=sheet_name)
+    df, dropped_rows = clean(df)
+    document_dropped_rows(dropped_rows, paths["dropped_rows"])
+    document_anomalies(df, paths["anomalies"])
+    optimized = to_parquet_compatible(df)
+    write_artifacts(df, paths["csv"], paths["parquet"], optimized)
+    return optimized
+
+
+def run_masterfile_pipeline(
+    input_filepath: PathLike,
+    output_dir: PathLike,
+    filtered_stem: Optional[PathLike] = None,
+    sheet_name: str = SHEET_NAME,
+    columns_to_drop: Optional[Sequence[str]] = COLUMNS_TO_DROP,
+    row_filter_functions: Optional[Sequence[Callable]] = ROWS_TO_DROP_CONDITIONS,
+    row_filter_columns: Optional[Sequence[str]] = ROW_FILTER_COLUMNS,
+    manifest_path: Optional[PathLike] = None,
+    force: bool = False,
+) -> Dict[str, Path]:
+    """
+    Ingest, clean, filter and persist a masterfile sheet with a single Excel parse.
+
+    If the ingest step is current (per the manifest) the workbook is not
+    opened at all and a stale filter step runs from the Parquet artifact.
+
+    Args:
+        input_filepath: Masterfile workbook (.xlsx)
+        output_dir: Directory for the ingested artifacts and reports
+        filtered_stem: Output path (without suffix) of the filtered artifacts.
+            Defaults to <output_dir>/filtered/disco_baa_01_filtered_masterfile
+        sheet_name: Sheet to ingest
+        columns_to_drop: Column names dropped by the filter
+        row_filter_functions: Functions returning True for rows to drop
+        row_filter_columns: Columns the row filters need
+        manifest_path: Pipeline manifest to check and update (None to always run)
+        force: Run every step even if the manifest says it is current
+
+    Returns:
+        Dictionary of artifact paths: ingested_csv, ingested_parquet,
+        filtered_csv, filtered_parquet
+    """
+    input_filepath = Path(input_filepath)
+    output_dir = Path(output_dir)
+    prefix = f"{input_filepath.stem} - {sheet_name}"
+    ingested = ingest_paths(input_filepath, output_dir, sheet_name)
+    ingested_csv, ingested_parquet, anomalies_path = (
+        ingested["csv"],
+        ingested["parquet"],
+        ingested["anomalies"],
+    )
+    filtered_stem = Path(
+        filtered_stem or output_dir / "filtered" / "disco_baa_01_filtered_masterfile"
+    )
+    filtered_outputs = (
+        filtered_stem.with_suffix(".csv"),
+        filtered_stem.with_suffix(".parquet"),
+    )
+    paths = {
+        "ingested_csv": ingested_csv,
+        "ingested_parquet": ingested_parquet,
+        "filtered_csv": filtered_outputs[0],
+        "filtered_parquet": filtered_outputs[1],
+    }
+
+    manifest = Manifest(manifest_path) if manifest_path is not None else None
+    ingest_step = f"ingest: {prefix}"
+    ingest_inputs = {"masterfile": input_filepath}
+    ingest_params = {
+        "sheet_name": sheet_name,
+        "cleaning_rules_version": CLEANING_RULES_VERSION,
+    }
+    ingest_outputs = [ingested_csv, ingested_parquet, anomalies_path]
+
+    if (
+        manifest is not None
+        and not force
+        and manifest.is_current(
+            ingest_step, ingest_inputs, ingest_params, ingest_outputs
+        )
+    ):
+        log.info("Ingestion up to date, skipping: %s [%s]", input_filepath, sheet_name)
+        filter_parquet(
+            ingested_parquet,
+            filtered_stem,
+            columns_to_drop,
+            row_filter_functions,
+            row_filter_columns,
+            manifest_path,
+        )
+        return paths
+
+    # One parse feeds every downstream step; the frame has the Parquet dtypes,
+    # so the filtered artifacts match the ones filter_parquet writes
+    df = ingest_workbook(input_filepath, output_dir, sheet_name)
+    if manifest is not None:
+        manifest.record(ingest_step, ingest_inputs, ingest_params, ingest_outputs)
+
+    filtered = filter_frame(df, columns_to_drop, row_filter_functions)
+    write_artifacts(filtered, *filtered_outputs)
+    if manifest is not None:
+        # Same fingerprint filter_parquet would record, so later runs can skip it
+        manifest.record(
+            f"filter: {ingested_parquet.name} -> {filtered_stem.name}",
+            {"masterfile": ingested_parquet},
+            filter_step_params(columns_to_drop, row_filter_functions),
+            filtered_outputs,
+        )
+    return paths
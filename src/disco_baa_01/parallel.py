@@ -0,0 +1,290 @@
+"""
+Process-pool runner for per-sheep cosinor and drinking extraction
+
+Each task loads one sheep's series once, runs both analyses on it and writes
+the outputs. Tasks are submitted to a ProcessPoolExecutor in chunks and the
+results come back in the same (sorted) order as the inputs. A failure on one
+sheep is recorded in its result row and never stops the batch.
+
+Every task collects its own stage timings and counters (RunStats); the parent
+merges them as results arrive, logs aggregated progress and can write the
+totals as a JSON run report. With a sink_dir, workers return their feature
+frames and the parent appends them to consolidated Parquet files
+(disco_baa_01.sink) instead of writing one CSV per sheep.
+"""
+
+import logging
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+
+from disco_baa_01.extraction import (
+    extract_cosinor_features,
+    extract_drinking_behavior,
+    list_splitted_files,
+    load_sheep_series,
+    save_cosinor_features,
+    save_drinking_behavior,
+)
+from disco_baa_01.instrumentation import (
+    Progress,
+    RunStats,
+    build_run_report,
+    collecting,
+    count,
+    write_run_report,
+)
+from disco_baa_01.sink import DEFAULT_BATCH_ROWS, SINK_KINDS, FeatureSink
+
+RESULT_COLUMNS = [
+    "sheep_id",
+    "file_path",
+    "status",
+    "cosinor_days",
+    "drink_events",
+    "elapsed_s",
+    "error",
+]
+
+log = logging.getLogger(__name__)
+
+
+def analyse_sheep_file(
+    sheep_id: str,
+    file_path: Union[str, Path],
+    abnormal_temp_thresh: float = 35,
+    temp_thresh: float = -0.5,
+    extract_min_max_temp: bool = True,
+    output_dir: Optional[Union[str, Path]] = None,
+    output_drink_dir: Optional[Union[str, Path]] = None,
+    cache_dir: Optional[Union[str, Path]] = None,
+    return_frames: bool = False,
+    analyses: Sequence[str] = SINK_KINDS,
+    max_gap_minutes: Optional[float] = None,
+) -> dict:
+    """
+    Load one sheep's series and run the cosinor and drinking analyses on it.
+
+    Never raises; errors are reported through the returned status.
+
+    Args:
+        sheep_id: Logger column name of the sheep
+        file_path: Path to the sheep's split CSV, or a TemperatureStore root
+        abnormal_temp_thresh: Readings below this are treated as abnormal
+        temp_thresh: Temperature change that counts as a significant drop
+        extract_min_max_temp: Whether to add the percentile temperature columns
+        output_dir: Directory for the cosinor features CSV (not written if None)
+        output_drink_dir: Directory for the drinking events CSV (not written if None)
+        cache_dir: SeriesCache directory; the series is memory-mapped from
+            there instead of being parsed (built on first use)
+        return_frames: Also return the feature frames, under "frames" keyed
+            by sink kind, for the parent to write
+        analyses: Sink kinds to compute ('cosinor_features',
+            'drinking_behavior'); the others are skipped
+        max_gap_minutes: Align the series to the 5-minute grid first,
+            interpolating gaps up to this long (see disco_baa_01.resampling)
+
+    Returns:
+        Dictionary with the RESULT_COLUMNS fields, plus "stats", the task's
+        RunStats snapshot
+    """
+    start = time.perf_counter()
+    result = {
+        "sheep_id": sheep_id,
+        "file_path": str(file_path),
+        "status": "ok",
+        "cosinor_days": 0,
+        "drink_events": 0,
+        "elapsed_s": 0.0,
+        "error": None,
+    }
+    with collecting() as stats:
+        try:
+            with stats.stage("load"):
+                sheep_data = load_sheep_series(file_path, sheep_id, cache=cache_dir)
+            if sheep_data is None:
+                result["status"] = "skipped"
+            else:
+                frames = {}
+                if "cosinor_features" in analyses:
+                    frames["cosinor_features"] = cosinor_df = extract_cosinor_features(
+                        sheep_data,
+                        sheep_id,
+                        abnormal_temp_thresh,
+                        temp_thresh,
+                        extract_min_max_temp,
+                        max_gap_minutes,
+                    )
+                    if output_dir is not None:
+                        save_cosinor_features(cosinor_df, sheep_id, output_dir)
+                    result["cosinor_days"] = len(cosinor_df)
+                if "drinking_behavior" in analyses:
+                    frames["drinking_behavior"] = drink_df = extract_drinking_behavior(
+                        sheep_data,
+                        sheep_id,
+                        abnormal_temp_thresh,
+                        temp_thresh,
+                        max_gap_minutes,
+                    )
+                    if output_drink_dir is not None:
+                        save_drinking_behavior(drink_df, sheep_id, output_drink_dir)
+                    result["drink_events"] = len(drink_df)
+                if return_frames:
+                    result["frames"] = frames
+        except Exception as e:
+            result["status"] = "failed"
+            result["error"] = f"{type(e).__name__}: {e}\n{traceback.format_exc()}"
+            log.error("Error processing sheep %s from %s: %s", sheep_id, file_path, e)
+        count(f"sheep_{'processed' if result['status'] == 'ok' else result['status']}")
+    result["elapsed_s"] = time.perf_counter() - start
+    result["stats"] = stats.to_dict()
+    return result
+
+
+def _run_task(task: Tuple[str, str, dict]) -> dict:
+    sheep_id, file_path, kwargs = task
+    return analyse_sheep_file(sheep_id, file_path, **kwargs)
+
+
+def default_chunksize(n_tasks: int, workers: int) -> int:
+    """Aim for ~4 chunks per worker so stragglers can be rebalanced."""
+    return max(1, n_tasks // (workers * 4))
+
+
+def run_parallel(
+    sheep_files: Iterable[Tuple[str, Union[str, Path]]],
+    workers: Optional[int] = None,
+    chunksize: Optional[int] = None,
+    abnormal_temp_thresh: float = 35,
+    temp_thresh: float = -0.5,
+    extract_min_max_temp: bool = True,
+    output_dir: Optional[Union[str, Path]] = None,
+    output_drink_dir: Optional[Union[str, Path]] = None,
+    cache_dir: Optional[Union[str, Path]] = None,
+    report_path: Optional[Union[str, Path]] = None,
+    sink_dir: Optional[Union[str, Path]] = None,
+    sink_batch_rows: int = DEFAULT_BATCH_ROWS,
+    analyses: Sequence[str] = SINK_KINDS,
+    max_gap_minutes: Optional[float] = None,
+) -> pd.DataFrame:
+    """
+    Run analyse_sheep_file over many sheep with a pool of worker processes.
+
+    Args:
+        sheep_files: (sheep_id, source) pairs, where source is a split CSV or a
+            TemperatureStore root; processed in sorted sheep_id order
+        workers: Number of worker processes. Defaults to os.cpu_count().
+            With workers=1 everything runs in the calling process
+        chunksize: Tasks handed to a worker at a time. Defaults to
+            default_chunksize(n_tasks, workers)
+        abnormal_temp_thresh: Readings below this are treated as abnormal
+        temp_thresh: Temperature change that counts as a significant drop
+        extract_min_max_temp: Whether to add the percentile temperature columns
+        output_dir: Directory for the cosinor features CSVs
+        output_drink_dir: Directory for the drinking events CSVs
+        cache_dir: SeriesCache directory shared by the workers; each worker
+            memory-maps its sheep's arrays from there
+        report_path: Write the JSON run report (see build_run_report) here
+        sink_dir: Directory for consolidated cosinor_features.parquet and
+            drinking_behavior.parquet files (see disco_baa_01.sink)
+        sink_batch_rows: Rows buffered per Parquet row group
+        analyses: Sink kinds to compute and write; e.g. ('cosinor_features',)
+            skips drink detection
+        max_gap_minutes: Align every series to the 5-minute grid first,
+            interpolating gaps up to this long. If None, readings are used
+            as they are
+
+    Returns:
+        DataFrame with one row per sheep (RESULT_COLUMNS), in sheep_id order;
+        the run report is also kept in its attrs["run_report"]
+    """
+    start = time.perf_counter()
+    kwargs = {
+        "abnormal_temp_thresh": abnormal_temp_thresh,
+        "temp_thresh": temp_thresh,
+        "extract_min_max_temp": extract_min_max_temp,
+        "output_dir": output_dir,
+        "output_drink_dir": output_drink_dir,
+        "cache_dir": None if cache_dir is None else str(cache_dir),
+        "return_frames": sink_dir is not None,
+        "analyses": tuple(analyses),
+        "max_gap_minutes": max_gap_minutes,
+    }
+    tasks = [(sheep_id, str(path), kwargs) for sheep_id, path in sorted(sheep_files)]
+    workers = workers or os.cpu_count() or 1
+    workers = max(1, min(workers, len(tasks)))
+
+    stats = RunStats()
+    progress = Progress(len(tasks))
+    results = []
+    sinks = {}
+    if sink_dir is not None:
+        sinks = {
+            kind: FeatureSink(sink_dir, kind, sink_batch_rows) for kind in analyses
+        }
+
+    def _collect(result_iter):
+        for result in result_iter:
+            stats.merge(result.pop("stats"))
+            with stats.stage("write"):
+                for kind, frame in result.pop("frames", {}).items():
+                    sinks[kind].append(frame, result["sheep_id"])
+            results.append(result)
+            progress.update(failed=int(result["status"] == "failed"))
+
+    if workers == 1:
+        _collect(_run_task(task) for task in tasks)
+    else:
+        chunksize = chunksize or default_chunksize(len(tasks), workers)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # map() yields results in submission order regardless of completion order
+            _collect(executor.map(_run_task, tasks, chunksize=chunksize))
+    with stats.stage("write"):
+        for sink in sinks.values():
+            sink.close()
+
+    report = build_run_report(
+        stats,
+        time.perf_counter() - start,
+        workers=workers,
+        n_sheep=len(tasks),
+        parameters={
+            key: value
+            for key, value in kwargs.items()
+            if key not in ("cache_dir", "return_frames")
+        },
+    )
+    if report_path is not None:
+        write_run_report(report, report_path)
+    frame = pd.DataFrame(results, columns=RESULT_COLUMNS)
+    frame.attrs["run_report"] = report
+    return frame
+
+
+def process_all_splitted_data_parallel(
+    splitted_data_dir: Union[str, Path],
+    workers: Optional[int] = None,
+    chunksize: Optional[int] = None,
+    **kwargs,
+) -> pd.DataFrame:
+    """
+    Parallel counterpart of process_all_splitted_data for a directory of split CSVs.
+
+    Args:
+        splitted_data_dir: Directory holding one <sheep_id>.csv per sheep, or a
+            TemperatureStore root
+        workers: Number of worker processes
+        chunksize: Tasks handed to a worker at a time
+        **kwargs: Forwarded to run_parallel
+
+    Returns:
+        DataFrame with one row per sheep, in sheep_id order
+    """
+    return run_parallel(
+        list_splitted_files(splitted_data_dir), workers, chunksize, **kwargs
+    )
@@ -0,0 +1,137 @@
+"""
+Batched order-statistic ("pointed temperature") extraction
+
+extract_pointed_temp_value picks, for a fraction p of a day's n readings,
+the value at position int(p * n) of the ascending sort and of the descending
+sort. The functions here return the same values for every requested fraction
+with a single np.partition call per group of equally long days, instead of two
+full sorts per fraction and day.
+"""
+
+from typing import Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+ArrayLike = Union[np.ndarray, pd.Series, list]
+
+
+def order_statistic_positions(
+    n: int, fractions: Sequence[float]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Ascending positions of the lower and upper order statistics of n values.
+
+    Args:
+        n: Number of values
+        fractions: Fractions p; the lower statistic is at int(p * n) and the
+            upper one at int(p * n) of the descending order
+
+    Returns:
+        (low_positions, high_positions, valid); positions are clipped to a
+        valid index and valid is False where int(p * n) >= n
+    """
+    indices = np.array([int(p * n) for p in fractions], dtype=np.int64)
+    valid = (indices < n) & (indices >= 0)
+    low = np.clip(indices, 0, max(n - 1, 0))
+    high = np.clip(n - 1 - indices, 0, max(n - 1, 0))
+    return low, high, valid
+
+
+def pointed_temp_values(
+    values: ArrayLike, fractions: Sequence[float]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Lower and upper pointed values of one series for all fractions at once.
+
+    NaNs are ignored, like the dropna() the callers of
+    extract_pointed_temp_value apply first.
+
+    Args:
+        values: Readings of one day
+        fractions: Fractions p (e.g. percent / 100.0)
+
+    Returns:
+        (low, high) float arrays with one entry per fraction; NaN where
+        int(p * n) >= n or the series is empty
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    low, high = pointed_temp_values_matrix(values[np.newaxis, :], fractions)
+    return low[0], high[0]
+
+
+def pointed_temp_values_matrix(
+    values2d: ArrayLike, fractions: Sequence[float]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pointed values for many days (rows) of a NaN-padded matrix.
+
+    Each row's n is its number of non-NaN values. Rows are grouped by n and
+    every group is partitioned once with all its kth positions; numpy orders
+    NaN after every number, so the padding never lands on a requested kth.
+
+    Args:
+        values2d: Array of shape (n_days, max_samples), NaN-padded
+        fractions: Fractions p (e.g. percent / 100.0)
+
+    Returns:
+        (low, high) arrays of shape (n_days, len(fractions))
+    """
+    values2d = np.asarray(values2d, dtype=np.float64)
+    if values2d.ndim != 2:
+        raise ValueError("values2d must be a 2-D array")
+    n_rows = values2d.shape[0]
+    low = np.full((n_rows, len(fractions)), np.nan)
+    high = np.full((n_rows, len(fractions)), np.nan)
+
+    counts = (~np.isnan(values2d)).sum(axis=1)
+    for n in np.unique(counts):
+        if n == 0:
+            continue
+        rows = np.flatnonzero(counts == n)
+        low_pos, high_pos, valid = order_statistic_positions(int(n), fractions)
+        kth = np.unique(np.concatenate([low_pos, high_pos]))
+        part = np.partition(values2d[rows], kth, axis=1)
+        low[np.ix_(rows, np.flatnonzero(valid))] = part[:, low_pos[valid]]
+        high[np.ix_(rows, np.flatnonzero(valid))] = part[:, high_pos[valid]]
+    return low, high
+
+
+def pad_segments(
+    values: ArrayLike, offsets: ArrayLike, width: Optional[int] = None
+) -> np.ndarray:
+    """
+    Scatter a flat series with CSR offsets into a NaN-padded matrix.
+
+    Args:
+        values: Stacked values of all segments
+        offsets: Segment i covers values[offsets[i]:offsets[i + 1]]
+        width: Number of columns; defaults to the longest segment
+
+    Returns:
+        Array of shape (n_segments, width)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    lengths = np.diff(offsets)
+    width = int(lengths.max(initial=0)) if width is None else width
+    rows = np.repeat(np.arange(lengths.size), lengths)
+    cols = np.arange(offsets[-1] - offsets[0]) - np.repeat(
+        offsets[:-1] - offsets[0], lengths
+    )
+    padded = np.full((lengths.size, width), np.nan)
+    padded[rows, cols] = values[offsets[0] : offsets[-1]]
+    return padded
+
+
+def pointed_temp_values_segments(
+    values: ArrayLike, offsets: ArrayLike, fractions: Sequence[float]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pointed values for every segment of a stacked series (e.g. one per day).
+
+    Returns:
+        (low, high) arrays of shape (n_segments, len(fractions))
+    """
+    return pointed_temp_values_matrix(pad_segments(values, offsets), fractions)
@@ -0,0 +1,321 @@
+"""
+Least-squares periodograms and best-period search for many sheep at once
+
+For every candidate period T the floating-mean cosinor
+
+    y(t) = M + A * cos(2 * pi * t / T + phi)
+
+is fitted by least squares, and its R^2 is the periodogram power. This is the
+generalised (floating-mean) Lomb-Scargle periodogram, so unevenly spaced
+samples - the gaps left by the 35 C filter and by masked drink dips - are used
+as they are, without resampling.
+
+Series of many sheep (or of many windows per sheep) are stacked with CSR
+offsets and every period costs a few complex multiplications and segment sums
+over all of them, solved with the cosinor normal equations of
+disco_baa_01.cosinor.
+"""
+
+import os
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from disco_baa_01.cosinor import segment_ids_from_offsets, solve_cosinor_sums
+from disco_baa_01.drinking import mask_drinking_events
+from disco_baa_01.extraction import load_sheep_series
+from disco_baa_01.segments import elapsed_hours, segment_days
+
+ArrayLike = Union[np.ndarray, pd.Series, list]
+
+# Phasors are recomputed from scratch this often to bound rounding drift
+RESEED_EVERY = 32
+
+PERIODOGRAM_COLUMNS = [
+    "sheep_id",
+    "window_start",
+    "period",
+    "n",
+    "M",
+    "A",
+    "phi",
+    "power",
+]
+
+
+def period_grid(
+    min_hours: float = 6.0, max_hours: float = 36.0, n_periods: int = 121
+) -> np.ndarray:
+    """
+    Candidate periods evenly spaced in frequency, returned in ascending hours.
+
+    Args:
+        min_hours: Shortest period
+        max_hours: Longest period
+        n_periods: Number of candidates
+
+    Returns:
+        float64 array of periods in hours
+    """
+    frequencies = np.linspace(1.0 / max_hours, 1.0 / min_hours, n_periods)
+    return np.sort(1.0 / frequencies)
+
+
+def _segment_sums(
+    weights: np.ndarray, starts: np.ndarray, empty: np.ndarray
+) -> np.ndarray:
+    """Sum contiguous segments (np.add.reduceat), with 0 for empty segments."""
+    if weights.size == 0:
+        return np.zeros(starts.size, dtype=weights.dtype)
+    sums = np.add.reduceat(weights, np.minimum(starts, weights.size - 1))
+    sums[empty] = 0
+    return sums
+
+
+def least_squares_periodogram(
+    values: ArrayLike,
+    time_hours: ArrayLike,
+    periods: Sequence[float],
+    offsets: Optional[ArrayLike] = None,
+) -> dict:
+    """
+    Periodogram of every segment of a stacked series.
+
+    The cosine and sine of each reading are carried as one complex phasor
+    z = exp(2 pi i t / T); for candidate periods evenly spaced in frequency
+    (as from period_grid) the phasor of the next period is the current one
+    times a fixed step, so np.cos / np.sin are evaluated only every
+    RESEED_EVERY periods.
+
+    Args:
+        values: Readings of all segments, concatenated; NaN readings are skipped
+        time_hours: Continuous time of each reading in hours
+            (e.g. segments.elapsed_hours)
+        periods: Candidate periods in hours
+        offsets: CSR-style boundaries of the segments. If None, one segment
+
+    Returns:
+        Dictionary of (n_segments, n_periods) arrays: "power" (R^2), "M",
+        "A", "phi", and "n" readings per segment (n_segments,)
+    """
+    y = np.asarray(values, dtype=np.float64)
+    t = np.asarray(time_hours, dtype=np.float64)
+    periods = np.asarray(periods, dtype=np.float64)
+    if offsets is None:
+        offsets = np.array([0, y.size])
+    offsets = np.asarray(offsets, dtype=np.int64)
+    y, t = y[offsets[0] : offsets[-1]], t[offsets[0] : offsets[-1]]
+    ids = segment_ids_from_offsets(offsets)
+    n_segments = offsets.size - 1
+
+    mask = np.isfinite(y) & np.isfinite(t)
+    y, t, ids = y[mask], t[mask], ids[mask]
+    shift = float(y.mean()) if y.size else 0.0
+    y = y - shift
+
+    # Segments stay contiguous after masking, so they can be summed with reduceat
+    counts = np.bincount(ids, minlength=n_segments)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    empty = counts == 0
+
+    def _sum(weights):
+        return _segment_sums(weights, starts, empty)
+
+    # The value-only sums are shared by every period
+    shared = {
+        "n": counts.astype(np.float64),
+        "y": _sum(y),
+        "yy": _sum(y * y),
+        "shift": shift,
+    }
+
+    frequencies = 1.0 / periods
+    steps = np.diff(frequencies)
+    uniform = steps.size > 0 and np.allclose(steps, steps[0], rtol=1e-9, atol=0)
+    if uniform:
+        step_phasor = np.exp(2j * np.pi * steps[0] * t)
+
+    result = {
+        key: np.empty((n_segments, periods.size)) for key in ["power", "M", "A", "phi"]
+    }
+    z = None
+    for k, frequency in enumerate(frequencies):
+        if uniform and k % RESEED_EVERY:
+            z = z * step_phasor
+        else:
+            z = np.exp(2j * np.pi * frequency * t)
+        zz = z * z
+        sum_z, sum_zz, sum_yz = _sum(z), _sum(zz), _sum(y * z)
+        # cos^2 = (1 + cos 2a) / 2, sin^2 = (1 - cos 2a) / 2, cos * sin = sin 2a / 2
+        sums = dict(
+            shared,
+            c=sum_z.real,
+            s=sum_z.imag,
+            cc=(shared["n"] + sum_zz.real) / 2,
+            ss=(shared["n"] - sum_zz.real) / 2,
+            cs=sum_zz.imag / 2,
+            yc=sum_yz.real,
+            ys=sum_yz.imag,
+        )
+        fit = solve_cosinor_sums(sums)
+        result["power"][:, k] = fit["r_squared"].to_numpy()
+        for key in ["M", "A", "phi"]:
+            result[key][:, k] = fit[key].to_numpy()
+    result["n"] = counts.astype(np.int64)
+    return result
+
+
+def prepare_sheep_series(
+    sheep_data: pd.DataFrame,
+    sheep_id: str,
+    abnormal_temp_thresh: float = 35,
+    temp_thresh: Optional[float] = -0.5,
+    window_days: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Turn a loaded sheep series into periodogram inputs.
+
+    Readings below abnormal_temp_thresh are dropped (left as gaps), drink dips
+    are blanked day by day unless temp_thresh is None, and the series is cut
+    into windows of window_days calendar days.
+
+    Args:
+        sheep_data: Frame from load_sheep_series
+        sheep_id: Logger column name of the sheep
+        abnormal_temp_thresh: Readings below this are dropped
+        temp_thresh: Drop threshold for drink masking; None keeps the dips
+        window_days: Days per window. If None, the whole series is one window
+
+    Returns:
+        (values, time_hours, offsets, window_starts): readings in time order,
+        their continuous time, window boundaries and each window's first day
+    """
+    values = sheep_data[sheep_id].to_numpy(dtype=np.float64)
+    segments = segment_days(sheep_data["DT"], keep=values >= abnormal_temp_thresh)
+    values = segments.take(values)
+    timestamps = segments.take(sheep_data["DT"])
+    if temp_thresh is not None and values.size:
+        values = mask_drinking_events(
+            values, abnormal_temp_thresh, temp_thresh, segments.offsets
+        )
+
+    if segments.n_days == 0:
+        return (
+            values,
+            np.empty(0),
+            np.zeros(1, dtype=np.int64),
+            np.empty(0, dtype="datetime64[D]"),
+        )
+    if window_days is None:
+        window_of_day = np.zeros(segments.n_days, dtype=np.int64)
+    else:
+        window_of_day = (segments.day_codes - segments.day_codes[0]) // window_days
+    first_days = np.flatnonzero(np.diff(window_of_day, prepend=-1))
+    offsets = np.append(segments.offsets[first_days], segments.offsets[-1])
+    return values, elapsed_hours(timestamps), offsets, segments.dates[first_days]
+
+
+def herd_periodogram(
+    sheep_sources: Iterable[Tuple[str, Union[str, Path]]],
+    periods: Sequence[float] = None,
+    abnormal_temp_thresh: float = 35,
+    temp_thresh: Optional[float] = -0.5,
+    window_days: Optional[int] = None,
+    batch_size: int = 50,
+    cache_dir: Optional[Union[str, Path]] = None,
+) -> pd.DataFrame:
+    """
+    Periodograms of many sheep, computed batch by batch.
+
+    Each batch of sheep is loaded with load_sheep_series, stacked, and
+    searched over all periods together.
+
+    Args:
+        sheep_sources: (sheep_id, source) pairs as from list_splitted_files
+        periods: Candidate periods in hours. Defaults to period_grid()
+        abnormal_temp_thresh: Readings below this are dropped
+        temp_thresh: Drop threshold for drink masking; None keeps the dips
+        window_days: Days per window; None for one periodogram per sheep
+        batch_size: Sheep stacked per batch
+        cache_dir: Optional SeriesCache directory to read the series through
+
+    Returns:
+        Long DataFrame with PERIODOGRAM_COLUMNS, one row per
+        (sheep, window, period)
+    """
+    periods = (
+        period_grid() if periods is None else np.asarray(periods, dtype=np.float64)
+    )
+    sheep_sources = sorted(sheep_sources)
+    frames = []
+    for start in range(0, len(sheep_sources), batch_size):
+        values, times, offsets, window_starts, window_sheep = [], [], [0], [], []
+        for sheep_id, source in sheep_sources[start : start + batch_size]:
+            sheep_data = load_sheep_series(source, sheep_id, cache=cache_dir)
+            if sheep_data is None:
+                continue
+            v, t, o, w = prepare_sheep_series(
+                sheep_data, sheep_id, abnormal_temp_thresh, temp_thresh, window_days
+            )
+            values.append(v)
+            times.append(t)
+            offsets.extend(offsets[-1] + o[1:])
+            window_starts.append(w)
+            window_sheep.extend([sheep_id] * w.size)
+        if not window_sheep:
+            continue
+
+        result = least_squares_periodogram(
+            np.concatenate(values), np.concatenate(times), periods, offsets
+        )
+        n_windows = len(window_sheep)
+        frames.append(
+            pd.DataFrame(
+                {
+                    "sheep_id": np.repeat(window_sheep, periods.size),
+                    "window_start": np.repeat(
+                        np.concatenate(window_starts), periods.size
+                    ),
+                    "period": np.tile(periods, n_windows),
+                    "n": np.repeat(result["n"], periods.size),
+                    "M": result["M"].ravel(),
+                    "A": result["A"].ravel(),
+                    "phi": result["phi"].ravel(),
+                    "power": result["power"].ravel(),
+                }
+            )
+        )
+    if not frames:
+        return pd.DataFrame(columns=PERIODOGRAM_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def best_periods(periodogram: pd.DataFrame) -> pd.DataFrame:
+    """
+    Period with the highest power for every (sheep, window).
+
+    Windows whose power is NaN for every period are left out.
+    """
+    valid = periodogram.dropna(subset=["power"])
+    best = valid.loc[valid.groupby(["sheep_id", "window_start"])["power"].idxmax()]
+    return best.reset_index(drop=True)
+
+
+def save_periodograms(
+    periodogram: pd.DataFrame, output_dir: Union[str, Path]
+) -> List[str]:
+    """
+    Write one <output_dir>/<sheep_id>_periodogram.parquet per sheep.
+
+    Returns:
+        Paths of the written files
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    written = []
+    for sheep_id, sheep_periodogram in periodogram.groupby("sheep_id", sort=True):
+        output_file = os.path.join(output_dir, f"{sheep_id}_periodogram.parquet")
+        sheep_periodogram.reset_index(drop=True).to_parquet(output_file, index=False)
+        written.append(output_file)
+    return written
@@ -0,0 +1,592 @@
+"""
+Declared pipeline stages and a dependency-aware runner
+
+A Stage names the files it reads and writes and the parameters its outputs
+depend on. run_stages orders the stages by matching each stage's inputs to
+the outputs of the others, skips every stage whose fingerprint in the
+pipeline manifest (see disco_baa_01.manifest) is unchanged, and runs stale
+stages in a thread pool as soon as their upstream stages are done, so
+independent branches (masterfile ingest, feature extraction) overlap.
+Fingerprints hash file contents, so a stage whose upstream re-ran but wrote
+identical files is still skipped.
+
+Stage factories import the modules doing the work when the stage runs, so
+declaring the graph (and starting the CLI) loads no NumPy or pandas.
+
+herd_stages declares the standard graph over the data directory layout of
+definitions.py:
+
+    split -> extract -> join, plot
+    ingest -> filter
+           -> join
+
+The extract stage runs cosinor fitting and drink detection in one pass over
+the store, so every series is loaded once and a single process pool runs.
+"""
+
+import logging
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Union,
+)
+
+from disco_baa_01.manifest import Manifest
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+PathLike = Union[str, Path]
+
+STAGE_COLUMNS = ["stage", "status", "elapsed_s", "error"]
+
+# Sub-directories of the data directory, as in definitions.py
+INCOMING_DIR = "00_incoming"
+RAW_DIR = "01_raw"
+INTERIM_DIR = "02_interim"
+PROCESSED_DIR = "03_processed"
+MANIFEST_NAME = "pipeline_manifest.json"
+
+DEFAULT_MASTERFILE = "Heat Stress Masterfile May 2024.xlsx"
+
+log = logging.getLogger(__name__)
+
+
+class Stage:
+    """
+    One step of the pipeline.
+
+    Args:
+        name: Unique stage name (also its manifest key)
+        run: Callable doing the work; its return value is ignored
+        inputs: Named files or directories the stage reads. A directory
+            stands for every file below it
+        outputs: Files or directories the stage writes
+        params: JSON-serialisable parameters the outputs depend on
+        after: Names of stages that must finish first, in addition to the
+            producers of the inputs
+    """
+
+    def __init__(
+        self,
+        name: str,
+        run: Callable[[], object],
+        inputs: Optional[Dict[str, PathLike]] = None,
+        outputs: Sequence[PathLike] = (),
+        params: Optional[dict] = None,
+        after: Sequence[str] = (),
+    ):
+        self.name = name
+        self.run = run
+        self.inputs = {key: Path(path) for key, path in (inputs or {}).items()}
+        self.outputs = [Path(path) for path in outputs]
+        self.params = params or {}
+        self.after = list(after)
+
+    def __repr__(self) -> str:
+        return f"Stage({self.name!r})"
+
+
+def expand_inputs(inputs: Dict[str, Path]) -> Dict[str, Path]:
+    """Replace directory inputs by the files below them, keyed '<name>/<rel path>'."""
+    files = {}
+    for name, path in inputs.items():
+        if path.is_dir():
+            for file in sorted(p for p in path.rglob("*") if p.is_file()):
+                files[f"{name}/{file.relative_to(path).as_posix()}"] = file
+        else:
+            files[name] = path
+    return files
+
+
+def stage_dependencies(stages: Sequence[Stage]) -> Dict[str, List[str]]:
+    """
+    Upstream stages of every stage.
+
+    A stage depends on the stage writing one of its inputs (or a directory
+    containing it) and on the stages listed in its `after`.
+
+    Raises:
+        ValueError: On duplicate names or unknown `after` entries
+    """
+    names = [stage.name for stage in stages]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate stage names: {names}")
+    producers = {
+        output.resolve(): stage.name for stage in stages for output in stage.outputs
+    }
+    graph = {}
+    for stage in stages:
+        upstream = list(stage.after)
+        for path in stage.inputs.values():
+            path = path.resolve()
+            for candidate in [path, *path.parents]:
+                producer = producers.get(candidate)
+                if (
+                    producer is not None
+                    and producer != stage.name
+                    and producer not in upstream
+                ):
+                    upstream.append(producer)
+        unknown = [name for name in upstream if name not in names]
+        if unknown:
+            raise ValueError(
+                f"Stage '{stage.name}' runs after unknown stages {unknown}"
+            )
+        graph[stage.name] = upstream
+    return graph
+
+
+def topological_order(graph: Dict[str, List[str]]) -> List[str]:
+    """
+    Stage names with every stage after its upstream stages.
+
+    Raises:
+        ValueError: If the dependencies contain a cycle
+    """
+    order, done = [], set()
+    remaining = list(graph)
+    while remaining:
+        ready = [name for name in remaining if all(up in done for up in graph[name])]
+        if not ready:
+            raise ValueError(f"Dependency cycle among stages {remaining}")
+        order += ready
+        done.update(ready)
+        remaining = [name for name in remaining if name not in done]
+    return order
+
+
+def _upstream_closure(graph: Dict[str, List[str]], targets: Iterable[str]) -> set:
+    selected, stack = set(), list(targets)
+    while stack:
+        name = stack.pop()
+        if name not in graph:
+            raise KeyError(f"Unknown stage '{name}', expected one of {sorted(graph)}")
+        if name not in selected:
+            selected.add(name)
+            stack += graph[name]
+    return selected
+
+
+def _is_current(manifest: Optional[Manifest], stage: Stage) -> bool:
+    if manifest is None:
+        return False
+    try:
+        return manifest.is_current(
+            stage.name, expand_inputs(stage.inputs), stage.params, stage.outputs
+        )
+    except FileNotFoundError:
+        return False
+
+
+def _timed(run: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    run()
+    return time.perf_counter() - start
+
+
+def run_stages(
+    stages: Sequence[Stage],
+    manifest_path: Optional[PathLike] = None,
+    targets: Optional[Sequence[str]] = None,
+    jobs: Optional[int] = None,
+    force: bool = False,
+    dry_run: bool = False,
+) -> "pd.DataFrame":
+    """
+    Run the stale stages of a pipeline, independent ones concurrently.
+
+    Args:
+        stages: Declared stages
+        manifest_path: Pipeline manifest recording the stage fingerprints.
+            If None, every selected stage runs and nothing is recorded
+        targets: Run only these stages and their upstream stages
+        jobs: Stages running at the same time. Defaults to the number of
+            selected stages
+        force: Run the selected stages even if they are current
+        dry_run: Only report which stages are stale; a stage downstream of a
+            stale one is reported stale too
+
+    Returns:
+        DataFrame with one row per selected stage (STAGE_COLUMNS) in run
+        order; status is 'ran', 'skipped' (current), 'stale' (dry run),
+        'failed' or 'blocked' (an upstream stage failed)
+    """
+    by_name = {stage.name: stage for stage in stages}
+    graph = stage_dependencies(stages)
+    order = topological_order(graph)
+    if targets is not None:
+        selected = _upstream_closure(graph, targets)
+        order = [name for name in order if name in selected]
+    manifest = Manifest(manifest_path) if manifest_path is not None else None
+
+    rows: Dict[str, dict] = {}
+    pending = list(order)
+    running = {}
+
+    def _finish(name, status, elapsed_s=0.0, error=None):
+        rows[name] = {
+            "stage": name,
+            "status": status,
+            "elapsed_s": elapsed_s,
+            "error": error,
+        }
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs or len(order) or 1)) as executor:
+        while pending or running:
+            for name in list(pending):
+                upstream = [
+                    rows.get(up, {}).get("status") for up in graph[name] if up in order
+                ]
+                if any(status in ("failed", "blocked") for status in upstream):
+                    pending.remove(name)
+                    log.warning("Stage %s blocked by a failed upstream stage", name)
+                    _finish(name, "blocked")
+                    continue
+                if not all(
+                    status in ("ran", "skipped", "stale") for status in upstream
+                ):
+                    continue
+                pending.remove(name)
+                stage = by_name[name]
+                if dry_run:
+                    stale = (
+                        force or "stale" in upstream or not _is_current(manifest, stage)
+                    )
+                    _finish(name, "stale" if stale else "skipped")
+                elif not force and _is_current(manifest, stage):
+                    log.info("Stage %s is up to date, skipping", name)
+                    _finish(name, "skipped")
+                else:
+                    log.info("Stage %s started", name)
+                    running[executor.submit(_timed, stage.run)] = name
+            if not running:
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    elapsed_s = future.result()
+                except Exception as e:
+                    log.error("Stage %s failed: %s", name, e)
+                    _finish(
+                        name,
+                        "failed",
+                        error=f"{type(e).__name__}: {e}\n{traceback.format_exc()}",
+                    )
+                    continue
+                if manifest is not None:
+                    stage = by_name[name]
+                    manifest.record(
+                        name, expand_inputs(stage.inputs), stage.params, stage.outputs
+                    )
+                log.info("Stage %s finished in %.1fs", name, elapsed_s)
+                _finish(name, "ran", elapsed_s)
+
+    import pandas as pd
+
+    return pd.DataFrame([rows[name] for name in order], columns=STAGE_COLUMNS)
+
+
+def split_stage(
+    workbook: PathLike, store_dir: PathLike, sheet_name: str = "Sheet1"
+) -> Stage:
+    """Split a calibrated logger workbook into a TemperatureStore."""
+
+    def run():
+        from disco_baa_01.splitting import split_workbook_streaming
+
+        split_workbook_streaming(workbook, store_dir, sheet_name, output_format="store")
+
+    return Stage(
+        "split",
+        run,
+        inputs={"workbook": workbook},
+        outputs=[store_dir],
+        params={"sheet_name": sheet_name, "format": "store"},
+    )
+
+
+def extraction_stage(
+    kind: Union[str, Sequence[str]],
+    data_dir: PathLike,
+    sink_dir: PathLike,
+    workers: Optional[int] = None,
+    abnormal_temp_thresh: float = 35,
+    temp_thresh: float = -0.5,
+    extract_min_max_temp: bool = True,
+    cache_dir: Optional[PathLike] = None,
+    max_gap_minutes: Optional[float] = None,
+) -> Stage:
+    """
+    Cosinor ('cosinor_features') and/or drink ('drinking_behavior') extraction
+    over split CSVs or a TemperatureStore, into one consolidated Parquet file
+    per kind. Several kinds share one pass (one load per series, one process
+    pool) in a stage named 'extract'; a single kind gives the 'cosinor' or
+    'drink' stage. With max_gap_minutes the series are aligned to the 5-minute
+    grid first.
+    """
+    from disco_baa_01.sink import sink_path
+
+    kinds = (kind,) if isinstance(kind, str) else tuple(kind)
+    if len(kinds) > 1:
+        name = "extract"
+    else:
+        name = "cosinor" if kinds[0] == "cosinor_features" else "drink"
+
+    def run():
+        from disco_baa_01.extraction import list_splitted_files
+        from disco_baa_01.parallel import run_parallel
+
+        run_parallel(
+            list_splitted_files(data_dir),
+            workers,
+            abnormal_temp_thresh=abnormal_temp_thresh,
+            temp_thresh=temp_thresh,
+            extract_min_max_temp=extract_min_max_temp,
+            cache_dir=cache_dir,
+            report_path=Path(sink_dir) / "reports" / f"{name}_run.json",
+            sink_dir=sink_dir,
+            analyses=kinds,
+            max_gap_minutes=max_gap_minutes,
+        )
+
+    params = {"abnormal_temp_thresh": abnormal_temp_thresh, "temp_thresh": temp_thresh}
+    if "cosinor_features" in kinds:
+        params["extract_min_max_temp"] = extract_min_max_temp
+    if max_gap_minutes is not None:
+        params["max_gap_minutes"] = max_gap_minutes
+    return Stage(
+        name,
+        run,
+        inputs={"temperatures": data_dir},
+        outputs=[sink_path(sink_dir, k) for k in kinds],
+        params=params,
+    )
+
+
+def ingest_stage(
+    masterfile: PathLike, output_dir: PathLike, sheet_name: Optional[str] = None
+) -> Stage:
+    """Parse, clean and persist the masterfile sheet."""
+    from disco_baa_01.masterfile import (
+        CLEANING_RULES_VERSION,
+        SHEET_NAME,
+        ingest_paths,
+        ingest_workbook,
+    )
+
+    sheet_name = sheet_name or SHEET_NAME
+    paths = ingest_paths(masterfile, output_dir, sheet_name)
+    return Stage(
+        "ingest",
+        lambda: ingest_workbook(masterfile, output_dir, sheet_name),
+        inputs={"masterfile": masterfile},
+        outputs=[paths["csv"], paths["parquet"], paths["anomalies"]],
+        params={
+            "sheet_name": sheet_name,
+            "cleaning_rules_version": CLEANING_RULES_VERSION,
+        },
+    )
+
+
+def filter_stage(ingested_parquet: PathLike, output_stem: PathLike) -> Stage:
+    """Apply the masterfile filter rules to the ingested Parquet."""
+    from disco_baa_01.masterfile import (
+        COLUMNS_TO_DROP,
+        ROWS_TO_DROP_CONDITIONS,
+        filter_parquet,
+        filter_step_params,
+    )
+
+    output_stem = Path(output_stem)
+    return Stage(
+        "filter",
+        lambda: filter_parquet(ingested_parquet, output_stem),
+        inputs={"masterfile": ingested_parquet},
+        outputs=[output_stem.with_suffix(".csv"), output_stem.with_suffix(".parquet")],
+        params=filter_step_params(COLUMNS_TO_DROP, ROWS_TO_DROP_CONDITIONS),
+    )
+
+
+def join_traits(
+    features_path: PathLike, masterfile_parquet: PathLike, output_path: PathLike
+) -> Path:
+    """
+    Attach masterfile animal records to consolidated features (see animals.AnimalIndex).
+
+    Args:
+        features_path: Consolidated cosinor_features or drinking_behavior Parquet
+        masterfile_parquet: Ingested masterfile Parquet
+        output_path: Joined Parquet file
+
+    Returns:
+        output_path
+    """
+    import pandas as pd
+
+    from disco_baa_01.animals import AnimalIndex
+
+    features = pd.read_parquet(features_path)
+    # Cosinor rows are dated by record_date, drinking events by their timestamp
+    date_column = "record_date" if "record_date" in features.columns else "DT"
+    joined = AnimalIndex.from_parquet(masterfile_parquet).join(
+        features, "sheep_id", date_column
+    )
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    joined.to_parquet(output_path, index=False)
+    return output_path
+
+
+def join_stage(
+    features_path: PathLike, masterfile_parquet: PathLike, output_path: PathLike
+) -> Stage:
+    """Join animal records onto consolidated features."""
+    return Stage(
+        "join",
+        lambda: join_traits(features_path, masterfile_parquet, output_path),
+        inputs={"features": features_path, "masterfile": masterfile_parquet},
+        outputs=[output_path],
+    )
+
+
+def plot_stage(
+    features_path: PathLike,
+    output_path: PathLike,
+    rows: Optional[int] = None,
+    cols: Optional[int] = None,
+    workers: Optional[int] = None,
+) -> Stage:
+    """
+    Render the herd's daily cosinor curves as a paged panel grid
+    (plotting.DEFAULT_GRID if not given).
+    """
+
+    def run():
+        import pandas as pd
+
+        from disco_baa_01.plotting import DEFAULT_GRID, plot_herd_cosinor
+
+        features = pd.read_parquet(
+            features_path, columns=["sheep_id", "record_date", "M", "A", "phi"]
+        )
+        plot_herd_cosinor(
+            features,
+            output_path,
+            rows=rows or DEFAULT_GRID[0],
+            cols=cols or DEFAULT_GRID[1],
+            workers=workers,
+        )
+
+    return Stage(
+        "plot",
+        run,
+        inputs={"features": features_path},
+        outputs=[output_path],
+        params={"rows": rows, "cols": cols},
+    )
+
+
+def herd_stages(
+    data_dir: PathLike,
+    masterfile: Optional[PathLike] = None,
+    loggers: Optional[PathLike] = None,
+    logger_sheet: str = "Sheet1",
+    masterfile_sheet: Optional[str] = None,
+    workers: Optional[int] = None,
+    abnormal_temp_thresh: float = 35,
+    temp_thresh: float = -0.5,
+    cache_dir: Optional[PathLike] = None,
+    max_gap_minutes: Optional[float] = None,
+) -> List[Stage]:
+    """
+    The standard pipeline over a data directory laid out as in definitions.py.
+
+    Outputs go to 01_raw (ingested and filtered masterfile), 02_interim
+    (temperature_store) and 03_processed (consolidated features, joined
+    traits, figures).
+
+    Args:
+        data_dir: Root of the data directory
+        masterfile: Masterfile workbook. Defaults to
+            00_incoming/DEFAULT_MASTERFILE if it exists; without one the
+            ingest, filter and join stages are left out
+        loggers: Calibrated logger workbook to split. Without one there is no
+            split stage and 02_interim/temperature_store must already exist
+        logger_sheet: Sheet of the logger workbook
+        masterfile_sheet: Sheet of the masterfile. Defaults to masterfile.SHEET_NAME
+        workers: Worker processes of the extract and plot stages
+        abnormal_temp_thresh: Readings below this are treated as abnormal
+        temp_thresh: Temperature change that counts as a significant drop
+        cache_dir: SeriesCache directory for the extract stage
+        max_gap_minutes: Align the series to the 5-minute grid before
+            extraction, interpolating gaps up to this long
+
+    Returns:
+        List of stages for run_stages
+    """
+    from disco_baa_01.sink import SINK_KINDS, sink_path
+
+    data_dir = Path(data_dir)
+    raw, interim, processed = (
+        data_dir / RAW_DIR,
+        data_dir / INTERIM_DIR,
+        data_dir / PROCESSED_DIR,
+    )
+    store_dir = interim / "temperature_store"
+    if masterfile is None and (data_dir / INCOMING_DIR / DEFAULT_MASTERFILE).exists():
+        masterfile = data_dir / INCOMING_DIR / DEFAULT_MASTERFILE
+
+    stages = []
+    if loggers is not None:
+        stages.append(split_stage(loggers, store_dir, logger_sheet))
+    thresholds = {
+        "abnormal_temp_thresh": abnormal_temp_thresh,
+        "temp_thresh": temp_thresh,
+        "cache_dir": cache_dir,
+        "max_gap_minutes": max_gap_minutes,
+    }
+    # One pass over the store for both analyses: each series is loaded once
+    # and only one process pool runs at a time
+    stages.append(
+        extraction_stage(SINK_KINDS, store_dir, processed, workers, **thresholds)
+    )
+    cosinor_path = sink_path(processed, "cosinor_features")
+    if masterfile is not None:
+        ingest = ingest_stage(masterfile, raw, masterfile_sheet)
+        ingested_parquet = ingest.outputs[1]
+        stages.append(ingest)
+        stages.append(
+            filter_stage(
+                ingested_parquet, raw / "filtered" / "disco_baa_01_filtered_masterfile"
+            )
+        )
+        stages.append(
+            join_stage(
+                cosinor_path,
+                ingested_parquet,
+                processed / "cosinor_features_traits.parquet",
+            )
+        )
+    stages.append(
+        plot_stage(
+            cosinor_path, processed / "figures" / "cosinor_herd.pdf", workers=workers
+        )
+    )
+    return stages
+
+
+def default_manifest_path(data_dir: PathLike) -> Path:
+    """Manifest of a data directory (PIPELINE_MANIFEST_PATH in definitions.py)."""
+    return Path(data_dir) / MANIFEST_NAME
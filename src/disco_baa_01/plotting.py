@@ -0,0 +1,279 @@
+"""
+Batch rendering of fitted cosinor curves
+
+All daily curves of a sheep are evaluated in one broadcast (n_days x 240)
+array and drawn as a single LineCollection coloured by day, instead of one
+cosinor_curve call and one Line2D per day. plot_herd_cosinor lays many sheep
+out as a grid of panels per page and writes the pages as one multi-page PDF
+or as numbered PNGs; PNG pages are rendered by a pool of worker processes.
+
+Figures are built with matplotlib.figure.Figure rather than pyplot, so no GUI
+backend or global figure state is involved and pages can be rendered in any
+process.
+"""
+
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from disco_baa_01.cosinor import PERIOD_HOURS, cosinor_curve
+
+PathLike = Union[str, Path]
+
+# Points per curve over one period
+CURVE_POINTS = 240
+
+# Panels per page (rows, columns)
+DEFAULT_GRID = (4, 5)
+
+PARAMETER_COLUMNS = ["M", "A", "phi"]
+
+log = logging.getLogger(__name__)
+
+
+def curve_matrix(
+    M: np.ndarray,
+    A: np.ndarray,
+    phi: np.ndarray,
+    time_hours: Optional[np.ndarray] = None,
+    period: float = PERIOD_HOURS,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Evaluate n fitted curves at once.
+
+    Args:
+        M: Mesors, shape (n,)
+        A: Amplitudes, shape (n,)
+        phi: Acrophases in radians, shape (n,)
+        time_hours: Evaluation times. Defaults to CURVE_POINTS over one period
+        period: Period of the rhythm in hours
+
+    Returns:
+        (time_hours, curves) with curves of shape (n, len(time_hours))
+    """
+    if time_hours is None:
+        time_hours = np.linspace(0.0, period, CURVE_POINTS)
+    time_hours = np.asarray(time_hours, dtype=np.float64)
+    curves = cosinor_curve(
+        time_hours[None, :],
+        np.asarray(M, dtype=np.float64)[:, None],
+        np.asarray(A, dtype=np.float64)[:, None],
+        np.asarray(phi, dtype=np.float64)[:, None],
+        period,
+    )
+    return time_hours, curves
+
+
+def curve_segments(time_hours: np.ndarray, curves: np.ndarray) -> np.ndarray:
+    """(n, points, 2) vertex array of the curves, as LineCollection expects."""
+    return np.stack(np.broadcast_arrays(time_hours[None, :], curves), axis=-1)
+
+
+def draw_cosinor_panel(
+    ax,
+    parameters: np.ndarray,
+    period: float = PERIOD_HOURS,
+    cmap: str = "viridis",
+    linewidth: float = 0.8,
+    alpha: float = 0.6,
+):
+    """
+    Draw the daily curves of one sheep as a single LineCollection.
+
+    Args:
+        ax: Matplotlib Axes
+        parameters: (n_days, 3) array of M, A, phi in day order; rows with
+            missing values (failed fits) are skipped
+        period: Period of the rhythm in hours
+        cmap: Colormap over the day order
+        linewidth: Line width
+        alpha: Line transparency
+
+    Returns:
+        The LineCollection, or None if there was nothing to draw
+    """
+    from matplotlib.collections import LineCollection
+
+    parameters = np.asarray(parameters, dtype=np.float64).reshape(-1, 3)
+    days = np.flatnonzero(np.isfinite(parameters).all(axis=1))
+    ax.set_xlim(0.0, period)
+    if days.size == 0:
+        return None
+
+    time_hours, curves = curve_matrix(*parameters[days].T, period=period)
+    lines = LineCollection(
+        curve_segments(time_hours, curves), cmap=cmap, linewidths=linewidth, alpha=alpha
+    )
+    lines.set_array(days.astype(np.float64))
+    lines.set_clim(0, max(len(parameters) - 1, 1))
+    ax.add_collection(lines)
+
+    low, high = curves.min(), curves.max()
+    pad = 0.05 * (high - low) or 0.1
+    ax.set_ylim(low - pad, high + pad)
+    return lines
+
+
+def sheep_panels(
+    features: pd.DataFrame,
+    sheep_column: str = "sheep_id",
+    date_column: str = "record_date",
+) -> List[Tuple[str, np.ndarray]]:
+    """
+    Split a cosinor features frame into per-sheep parameter arrays.
+
+    The frame is sorted once by sheep and date; each panel is a view of one
+    contiguous block.
+
+    Args:
+        features: Rows with sheep, date, M, A and phi columns (e.g. a
+            consolidated cosinor_features.parquet)
+        sheep_column: Column identifying the sheep
+        date_column: Column giving the day order within a sheep
+
+    Returns:
+        List of (sheep_id, (n_days, 3) array of M, A, phi), sorted by sheep
+    """
+    order = (
+        [sheep_column, date_column]
+        if date_column in features.columns
+        else [sheep_column]
+    )
+    features = features.sort_values(order, kind="stable")
+    ids = features[sheep_column].astype(str).to_numpy()
+    parameters = features[PARAMETER_COLUMNS].to_numpy(dtype=np.float64)
+    if len(ids) == 0:
+        return []
+    starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+    ends = np.r_[starts[1:], len(ids)]
+    return [(ids[lo], parameters[lo:hi]) for lo, hi in zip(starts, ends)]
+
+
+def render_page(
+    panels: Sequence[Tuple[str, np.ndarray]],
+    rows: int = DEFAULT_GRID[0],
+    cols: int = DEFAULT_GRID[1],
+    title: Optional[str] = None,
+    period: float = PERIOD_HOURS,
+):
+    """
+    Build one page figure with a panel per sheep.
+
+    Args:
+        panels: Up to rows * cols (sheep_id, parameters) pairs
+        rows: Panel rows per page
+        cols: Panel columns per page
+        title: Page title
+        period: Period of the rhythm in hours
+
+    Returns:
+        matplotlib.figure.Figure
+    """
+    from matplotlib.figure import Figure
+
+    # Fixed margins: a layout engine would add an extra draw pass per page
+    fig = Figure(figsize=(3.0 * cols, 2.2 * rows))
+    fig.subplots_adjust(
+        left=0.05, right=0.98, bottom=0.07, top=0.92, wspace=0.25, hspace=0.45
+    )
+    axes = fig.subplots(rows, cols, sharex=True, squeeze=False).ravel()
+    for ax, (sheep_id, parameters) in zip(axes, panels):
+        draw_cosinor_panel(ax, parameters, period=period)
+        ax.set_title(f"{sheep_id} ({len(parameters)} days)", fontsize=8)
+        ax.tick_params(labelsize=7)
+        ax.grid(True, alpha=0.3)
+    for ax in axes[len(panels) :]:
+        ax.set_visible(False)
+    for ax in axes[(rows - 1) * cols :]:
+        ax.set_xlabel("Time (hours)", fontsize=8)
+    if title:
+        fig.suptitle(title, fontsize=10)
+    return fig
+
+
+def _render_png_page(task: tuple) -> str:
+    panels, rows, cols, title, period, path, dpi = task
+    render_page(panels, rows, cols, title, period).savefig(path, dpi=dpi)
+    return path
+
+
+def page_path(output: PathLike, page: int) -> Path:
+    """PNG file of a page: <stem>_p001.png next to output."""
+    output = Path(output)
+    return output.with_name(f"{output.stem}_p{page + 1:03d}.png")
+
+
+def plot_herd_cosinor(
+    features: pd.DataFrame,
+    output: PathLike,
+    rows: int = DEFAULT_GRID[0],
+    cols: int = DEFAULT_GRID[1],
+    workers: Optional[int] = None,
+    sheep: Optional[Sequence[str]] = None,
+    sheep_column: str = "sheep_id",
+    date_column: str = "record_date",
+    period: float = PERIOD_HOURS,
+    dpi: int = 150,
+) -> List[Path]:
+    """
+    Render the daily cosinor curves of many sheep as a paged panel grid.
+
+    Args:
+        features: Cosinor features of all sheep (sheep, date, M, A, phi)
+        output: '.pdf' for one multi-page PDF, '.png' for one file per page
+            (see page_path)
+        rows: Panel rows per page
+        cols: Panel columns per page
+        workers: Processes rendering PNG pages. Defaults to os.cpu_count().
+            PDF pages share one file and are rendered in the calling process
+        sheep: Only plot these sheep
+        sheep_column: Column identifying the sheep
+        date_column: Column giving the day order within a sheep
+        period: Period of the rhythm in hours
+        dpi: Resolution of PNG pages
+
+    Returns:
+        Paths of the written files
+    """
+    output = Path(output)
+    suffix = output.suffix.lower()
+    if suffix not in (".pdf", ".png"):
+        raise ValueError(
+            f"Unsupported output format '{output.suffix}', expected .pdf or .png"
+        )
+
+    if sheep is not None:
+        features = features[
+            features[sheep_column].astype(str).isin([str(s) for s in sheep])
+        ]
+    panels = sheep_panels(features, sheep_column, date_column)
+    per_page = rows * cols
+    pages = [panels[i : i + per_page] for i in range(0, len(panels), per_page)]
+    titles = [f"Cosinor fits {page[0][0]} - {page[-1][0]}" for page in pages]
+    output.parent.mkdir(parents=True, exist_ok=True)
+    log.info("Rendering %d sheep on %d pages to %s", len(panels), len(pages), output)
+
+    if suffix == ".pdf":
+        from matplotlib.backends.backend_pdf import PdfPages
+
+        with PdfPages(output) as pdf:
+            for page, title in zip(pages, titles):
+                pdf.savefig(render_page(page, rows, cols, title, period))
+        return [output]
+
+    tasks = [
+        (page, rows, cols, title, period, str(page_path(output, i)), dpi)
+        for i, (page, title) in enumerate(zip(pages, titles))
+    ]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(tasks)))
+    if workers == 1:
+        paths = [_render_png_page(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            paths = list(executor.map(_render_png_page, tasks))
+    return [Path(path) for path in paths]
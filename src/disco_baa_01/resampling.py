@@ -0,0 +1,276 @@
+"""
+Gap-aware alignment of logger series to an exact 5-minute grid
+
+The positional code downstream (drink windows, recover_time = 5 * positions)
+assumes one reading every SAMPLE_MINUTES. Readings dropped by the
+abnormal-temperature filter, logger outages and clock jitter break that.
+resample_to_grid snaps every reading to the nearest slot of a regular grid
+computed from the int64 timestamps, for one series or for a whole herd sharing
+a 'DT' column (one column per sheep) at once. Empty slots are filled by linear
+interpolation in time only when the run of empty slots is at most
+max_gap_minutes long; longer gaps stay NaN and are reported explicitly
+(GridSeries.gaps, gap_table). Regular, sorted input is placed with a single
+scatter (bincount averaging only when readings share a slot), and
+interpolation only touches the slots it fills.
+"""
+
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from disco_baa_01.drinking import SAMPLE_MINUTES
+from disco_baa_01.segments import NS_PER_SECOND, ArrayLike, _as_datetime64
+
+# Longest run of missing slots that is interpolated by default
+DEFAULT_MAX_GAP_MINUTES = 15
+
+GAP_COLUMNS = ["sheep_id", "gap_start", "gap_end", "gap_minutes"]
+
+_NAT = np.iinfo(np.int64).min
+
+
+class GridSeries:
+    """
+    Readings aligned to a regular time grid.
+
+    Args:
+        start_ns: Time of slot 0 as int64 nanoseconds since the epoch
+        step_ns: Grid step in nanoseconds
+        values: Array of shape (n_slots,) or (n_slots, n_series); NaN in gaps
+        observed: Boolean mask of the slots that received a reading
+    """
+
+    def __init__(
+        self, start_ns: int, step_ns: int, values: np.ndarray, observed: np.ndarray
+    ):
+        self.start_ns = start_ns
+        self.step_ns = step_ns
+        self.values = values
+        self.observed = observed
+
+    @property
+    def n_slots(self) -> int:
+        return self.values.shape[0]
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """Time of every slot as datetime64[ns]."""
+        ns = self.start_ns + self.step_ns * np.arange(self.n_slots, dtype=np.int64)
+        return ns.view("datetime64[ns]")
+
+    @property
+    def interpolated(self) -> np.ndarray:
+        """Slots filled by interpolation."""
+        return ~self.observed & ~np.isnan(self.values)
+
+    @property
+    def gaps(self) -> np.ndarray:
+        """Slots left empty (no reading and too far from one to interpolate)."""
+        return np.isnan(self.values)
+
+    def gap_runs(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Runs of empty slots.
+
+        Returns:
+            (series, start, stop): column of every run and its [start, stop)
+            slot range; series is all zeros for a 1-D grid
+        """
+        return missing_runs(self.gaps)
+
+
+def missing_runs(missing: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Runs of True along axis 0 of a (n,) or (n, k) mask.
+
+    Returns:
+        (series, start, stop) int64 arrays, sorted by series then start
+    """
+    missing = missing.reshape(missing.shape[0], -1)
+    padded = np.zeros((missing.shape[1], missing.shape[0] + 2), dtype=np.int8)
+    padded[:, 1:-1] = missing.T
+    edges = np.diff(padded, axis=1)
+    # Starts and stops alternate within a series, so they pair up in order
+    series, start = np.nonzero(edges == 1)
+    _, stop = np.nonzero(edges == -1)
+    return series, start, stop
+
+
+def fill_gaps(values: np.ndarray, max_gap_slots: int) -> int:
+    """
+    Linearly interpolate, in place, runs of at most max_gap_slots NaNs.
+
+    Only runs with a valid value on both sides are filled, so leading and
+    trailing NaNs stay NaN; interpolation is by position, which is time on a
+    regular grid.
+
+    Args:
+        values: Float array of shape (n,) or (n, k), C-contiguous
+        max_gap_slots: Longest run of NaNs to fill
+
+    Returns:
+        Number of values filled
+    """
+    n = values.shape[0]
+    grid = values.reshape(n, -1)
+    series, start, stop = missing_runs(np.isnan(grid))
+    inner = (start > 0) & (stop < n) & (stop - start <= max_gap_slots)
+    series, start, stop = series[inner], start[inner], stop[inner]
+    lengths = stop - start
+    if lengths.size == 0:
+        return 0
+
+    total = int(lengths.sum())
+    run = np.repeat(np.arange(lengths.size), lengths)
+    rows = (
+        start[run] + np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    )
+    cols = series[run]
+    before = grid[start - 1, series][run]
+    after = grid[stop, series][run]
+    weight = (rows - (start[run] - 1)) / (lengths[run] + 1)
+    grid[rows, cols] = before + (after - before) * weight
+    return total
+
+
+def resample_to_grid(
+    timestamps: ArrayLike,
+    values: ArrayLike,
+    step_minutes: float = SAMPLE_MINUTES,
+    max_gap_minutes: float = DEFAULT_MAX_GAP_MINUTES,
+    min_value: Optional[float] = None,
+) -> GridSeries:
+    """
+    Align one or many series sharing a timestamp column to a regular grid.
+
+    The grid starts at the first timestamp floored to the step (so a 5-minute
+    grid lies on :00, :05, ...) and ends at the slot of the last one. Each
+    reading goes to its nearest slot; readings sharing a slot are averaged.
+
+    Args:
+        timestamps: Reading times (datetime64 or anything pd.to_datetime accepts)
+        values: Readings of shape (n,) or (n, n_series); NaN is missing
+        step_minutes: Grid step
+        max_gap_minutes: Fill runs of empty slots lasting at most this long
+            (e.g. 15 fills up to 3 missing 5-minute readings); 0 only aligns
+        min_value: Readings below this are treated as missing, e.g.
+            abnormal_temp_thresh
+
+    Returns:
+        GridSeries with values of the same dimensionality as the input
+    """
+    ns = _as_datetime64(timestamps).view(np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    if values.shape[0] != ns.size:
+        raise ValueError(
+            "values and timestamps must have the same length, "
+            f"got {values.shape[0]} and {ns.size}"
+        )
+    step_ns = int(round(step_minutes * 60 * NS_PER_SECOND))
+    if step_ns <= 0:
+        raise ValueError("step_minutes must be positive")
+    flat = values.reshape(ns.size, -1)
+    n_series = flat.shape[1]
+
+    present = ns != _NAT
+    if not present.any():
+        empty = np.empty((0,) + values.shape[1:])
+        return GridSeries(0, step_ns, empty, np.zeros(empty.shape, dtype=bool))
+    start_ns = int(ns[present].min()) // step_ns * step_ns
+    slots = (ns - start_ns + step_ns // 2) // step_ns
+    n_slots = int(slots[present].max()) + 1
+
+    present_slots = slots[present]
+    if present_slots.size < 2 or (np.diff(present_slots) > 0).all():
+        # One reading per slot, already sorted: a single scatter
+        readings = flat[present]
+        if min_value is not None:
+            readings = np.where(readings >= min_value, readings, np.nan)
+        grid = np.full((n_slots, n_series), np.nan)
+        grid[present_slots] = readings
+        observed = ~np.isnan(grid)
+    else:
+        keep = present[:, None] & ~np.isnan(flat)
+        if min_value is not None:
+            keep &= flat >= min_value
+        rows, cols = np.nonzero(keep)
+        cell = slots[rows] * n_series + cols
+        counts = np.bincount(cell, minlength=n_slots * n_series)
+        sums = np.bincount(cell, weights=flat[rows, cols], minlength=n_slots * n_series)
+        observed = (counts > 0).reshape(n_slots, n_series)
+        grid = np.full((n_slots, n_series), np.nan)
+        np.divide(
+            sums.reshape(grid.shape),
+            counts.reshape(grid.shape),
+            out=grid,
+            where=observed,
+        )
+    grid = grid.reshape((n_slots,) + values.shape[1:])
+    observed = observed.reshape(grid.shape)
+    fill_gaps(grid, int(max_gap_minutes * 60 * NS_PER_SECOND // step_ns))
+    return GridSeries(start_ns, step_ns, grid, observed)
+
+
+def resample_frame(
+    frame: pd.DataFrame,
+    columns: Optional[Sequence[str]] = None,
+    step_minutes: float = SAMPLE_MINUTES,
+    max_gap_minutes: float = DEFAULT_MAX_GAP_MINUTES,
+    min_value: Optional[float] = None,
+) -> pd.DataFrame:
+    """
+    resample_to_grid for a wide frame ('DT' plus one column per sheep).
+
+    Args:
+        frame: Readings in the split-CSV / logger layout
+        columns: Sheep columns to resample. Defaults to all but 'DT'
+        step_minutes: Grid step
+        max_gap_minutes: Longest run of empty slots to interpolate
+        min_value: Readings below this are treated as missing
+
+    Returns:
+        Frame with one row per grid slot ('DT' plus the sheep columns), NaN
+        in the gaps; attrs["gaps"] holds the gap_table
+    """
+    columns = (
+        [c for c in frame.columns if c != "DT"] if columns is None else list(columns)
+    )
+    grid = resample_to_grid(
+        frame["DT"],
+        frame[columns].to_numpy(dtype=np.float64),
+        step_minutes,
+        max_gap_minutes,
+        min_value,
+    )
+    resampled = pd.DataFrame(grid.values, columns=columns)
+    resampled.insert(0, "DT", grid.timestamps)
+    resampled.attrs["gaps"] = gap_table(grid, columns)
+    return resampled
+
+
+def gap_table(grid: GridSeries, names: Sequence[str]) -> pd.DataFrame:
+    """
+    The unfilled gaps of a grid, one row per run of empty slots.
+
+    Args:
+        grid: Result of resample_to_grid
+        names: Name of every grid column (one name for a 1-D grid)
+
+    Returns:
+        DataFrame with GAP_COLUMNS; gap_end is the first slot after the gap
+    """
+    series, start, stop = grid.gap_runs()
+    slot_times = grid.timestamps
+    end_times = (grid.start_ns + grid.step_ns * stop.astype(np.int64)).view(
+        "datetime64[ns]"
+    )
+    return pd.DataFrame(
+        {
+            "sheep_id": np.asarray(names, dtype=object)[series],
+            "gap_start": slot_times[start],
+            "gap_end": end_times,
+            "gap_minutes": (stop - start) * grid.step_ns / (60 * NS_PER_SECOND),
+        },
+        columns=GAP_COLUMNS,
+    )
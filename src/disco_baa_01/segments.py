@@ -0,0 +1,166 @@
+"""
+Day segmentation of timestamped readings
+
+segment_days sorts a series once, derives integer day codes (days since the
+epoch) from its datetime64 values and returns CSR-style offsets, so that day i
+is positions offsets[i]:offsets[i + 1] of the sorted arrays. Slicing a sorted
+array by day is then a view, and the batched kernels (cosinor fitting, drink
+detection, percentiles) take the offsets directly.
+"""
+
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+
+ArrayLike = Union[np.ndarray, pd.Series, pd.Index, list]
+
+NS_PER_SECOND = 1_000_000_000
+SECONDS_PER_DAY = 86_400
+
+
+def _as_datetime64(timestamps: ArrayLike) -> np.ndarray:
+    if isinstance(timestamps, (pd.Series, pd.Index)):
+        timestamps = timestamps.to_numpy()
+    timestamps = np.asarray(timestamps)
+    if not np.issubdtype(timestamps.dtype, np.datetime64):
+        timestamps = pd.to_datetime(timestamps).to_numpy()
+    return timestamps.astype("datetime64[ns]")
+
+
+def time_of_day_hours(timestamps: ArrayLike) -> np.ndarray:
+    """
+    Hours since midnight (whole seconds, as in the per-day cosinor loop).
+
+    Returns:
+        float64 array in [0, 24)
+    """
+    ns = _as_datetime64(timestamps).view(np.int64)
+    seconds = (ns // NS_PER_SECOND) % SECONDS_PER_DAY
+    return seconds / 3600
+
+
+def elapsed_hours(
+    timestamps: ArrayLike, origin: Optional[ArrayLike] = None
+) -> np.ndarray:
+    """
+    Continuous time in hours since origin (default: midnight of the first day).
+
+    Needed by cosinor periods that do not divide 24 h, where time of day
+    would wrap the phase every midnight.
+
+    Returns:
+        float64 array of hours
+    """
+    timestamps = _as_datetime64(timestamps)
+    missing = np.isnat(timestamps)
+    ns = timestamps.view(np.int64)
+    if origin is not None:
+        origin_ns = pd.Timestamp(origin).as_unit("ns").value
+    elif missing.all():
+        origin_ns = 0
+    else:
+        ns_per_day = NS_PER_SECOND * SECONDS_PER_DAY
+        origin_ns = ns[~missing].min() // ns_per_day * ns_per_day
+    hours = (ns - origin_ns) / (NS_PER_SECOND * 3600)
+    hours[missing] = np.nan
+    return hours
+
+
+class DaySegments:
+    """
+    Readings grouped into calendar days.
+
+    Args:
+        index: Positions into the original arrays, in sorted order
+        day_codes: Day of each segment as days since 1970-01-01
+        offsets: Day i covers index[offsets[i]:offsets[i + 1]]
+    """
+
+    def __init__(self, index: np.ndarray, day_codes: np.ndarray, offsets: np.ndarray):
+        self.index = index
+        self.day_codes = day_codes
+        self.offsets = offsets
+
+    @property
+    def n_days(self) -> int:
+        return self.day_codes.size
+
+    @property
+    def lengths(self) -> np.ndarray:
+        """Number of readings of every day."""
+        return np.diff(self.offsets)
+
+    @property
+    def dates(self) -> np.ndarray:
+        """Day of every segment as datetime64[D]."""
+        return self.day_codes.astype("datetime64[D]")
+
+    def date_strings(self) -> np.ndarray:
+        """Day of every segment as 'YYYY-MM-DD' strings."""
+        return np.datetime_as_string(self.dates, unit="D")
+
+    def day_slice(self, i: int) -> slice:
+        """Slice of day i in arrays returned by take()."""
+        return slice(int(self.offsets[i]), int(self.offsets[i + 1]))
+
+    def take(self, values: ArrayLike) -> np.ndarray:
+        """Reorder (and filter) an array aligned with the original readings."""
+        if isinstance(values, (pd.Series, pd.Index)):
+            values = values.to_numpy()
+        return np.asarray(values)[self.index]
+
+    def select(self, days: ArrayLike) -> "DaySegments":
+        """
+        Keep a subset of days.
+
+        Args:
+            days: Boolean mask over the days, or day positions
+
+        Returns:
+            DaySegments holding only the selected days, in the same order
+        """
+        days = np.asarray(days)
+        if days.dtype == bool:
+            days = np.flatnonzero(days)
+        lengths = self.lengths[days]
+        starts = self.offsets[:-1][days]
+        positions = np.repeat(
+            starts - np.cumsum(np.concatenate([[0], lengths[:-1]])), lengths
+        )
+        positions += np.arange(lengths.sum())
+        offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        return DaySegments(self.index[positions], self.day_codes[days], offsets)
+
+
+def segment_days(
+    timestamps: ArrayLike, keep: Optional[ArrayLike] = None
+) -> DaySegments:
+    """
+    Sort readings once and split them into calendar days.
+
+    Args:
+        timestamps: Reading times (datetime64 or anything pd.to_datetime accepts)
+        keep: Optional boolean mask of readings to keep (e.g. temp >= threshold);
+            NaT timestamps are always dropped
+
+    Returns:
+        DaySegments over the kept readings, in chronological order
+    """
+    timestamps = _as_datetime64(timestamps)
+    kept = ~np.isnat(timestamps)
+    if keep is not None:
+        kept &= np.asarray(keep, dtype=bool)
+    index = np.flatnonzero(kept)
+
+    ns = timestamps[index].view(np.int64)
+    if ns.size > 1 and (np.diff(ns) < 0).any():
+        order = np.argsort(ns, kind="stable")
+        index, ns = index[order], ns[order]
+
+    days = ns // (NS_PER_SECOND * SECONDS_PER_DAY)
+    starts = np.flatnonzero(np.diff(days)) + 1
+    offsets = np.concatenate([[0], starts, [days.size]]).astype(np.int64)
+    if days.size == 0:
+        offsets = np.zeros(1, dtype=np.int64)
+    return DaySegments(index, days[offsets[:-1]], offsets)
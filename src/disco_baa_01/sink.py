@@ -0,0 +1,171 @@
+"""
+Consolidated Parquet output for per-sheep feature tables
+
+Instead of one <sheep_id>_cosinor_features.csv (and _drinking_behavior.csv)
+per sheep, a FeatureSink buffers the per-sheep frames and writes them as large
+row groups of a single Parquet file per kind,
+
+    <output_dir>/cosinor_features.parquet
+    <output_dir>/drinking_behavior.parquet
+
+with a sheep_id column. The sorted list of sheep in a file is stored in its
+footer key-value metadata, so sheep_ids() answers without reading any rows.
+Only the parent process writes; workers hand their frames back with their
+results.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional, Union
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+PathLike = Union[str, Path]
+
+SINK_KINDS = ("cosinor_features", "drinking_behavior")
+
+# Rows buffered before a row group is written
+DEFAULT_BATCH_ROWS = 100_000
+
+SHEEP_IDS_KEY = b"disco_baa_01.sheep_ids"
+KIND_KEY = b"disco_baa_01.kind"
+
+
+def sink_path(output_dir: PathLike, kind: str) -> Path:
+    """Consolidated file of a kind ('cosinor_features' or 'drinking_behavior')."""
+    if kind not in SINK_KINDS:
+        raise ValueError(f"Unknown sink kind '{kind}', expected one of {SINK_KINDS}")
+    return Path(output_dir) / f"{kind}.parquet"
+
+
+class FeatureSink:
+    """
+    Buffered writer of one consolidated Parquet file.
+
+    Frames are appended per sheep and written as one row group whenever
+    batch_rows rows are buffered. The file is written to a temporary name
+    and moved into place by close(), so readers never see a partial file.
+    Use as a context manager or call close().
+
+    Args:
+        output_dir: Directory of the consolidated files
+        kind: 'cosinor_features' or 'drinking_behavior'
+        batch_rows: Rows buffered per row group
+    """
+
+    def __init__(
+        self, output_dir: PathLike, kind: str, batch_rows: int = DEFAULT_BATCH_ROWS
+    ):
+        self.path = sink_path(output_dir, kind)
+        self.kind = kind
+        self.batch_rows = batch_rows
+        self.sheep_ids = set()
+        self.rows_written = 0
+        self._buffer: List["pd.DataFrame"] = []
+        self._buffered_rows = 0
+        self._writer = None
+        self._schema = None
+        self._tmp_path = self.path.with_name(self.path.name + ".tmp")
+
+    def __enter__(self) -> "FeatureSink":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def append(self, frame: Optional["pd.DataFrame"], sheep_id: str) -> None:
+        """
+        Buffer one sheep's rows; a sheep_id column is added if missing.
+
+        Empty frames and None are ignored.
+        """
+        if frame is None or frame.empty:
+            return
+        if "sheep_id" not in frame.columns:
+            frame = frame.copy()
+            frame.insert(0, "sheep_id", sheep_id)
+        self.sheep_ids.add(str(sheep_id))
+        self._buffer.append(frame)
+        self._buffered_rows += len(frame)
+        if self._buffered_rows >= self.batch_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the buffered rows as one row group."""
+        if not self._buffer:
+            return
+        import pandas as pd
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        frame = pd.concat(self._buffer, ignore_index=True)
+        self._buffer, self._buffered_rows = [], 0
+        if self._writer is None:
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            # The pandas metadata describes only the first batch; keep the schema plain
+            self._schema = table.schema.remove_metadata()
+            os.makedirs(self.path.parent, exist_ok=True)
+            self._writer = pq.ParquetWriter(self._tmp_path, self._schema)
+        table = pa.Table.from_pandas(frame, schema=self._schema, preserve_index=False)
+        self._writer.write_table(table, row_group_size=len(frame))
+        self.rows_written += len(frame)
+
+    def close(self) -> Optional[Path]:
+        """
+        Flush, record the sheep ids in the footer and move the file into place.
+
+        Returns:
+            Path of the written file, or None if nothing was appended
+        """
+        self.flush()
+        if self._writer is None:
+            return None
+        self._writer.add_key_value_metadata(
+            {
+                SHEEP_IDS_KEY: json.dumps(sorted(self.sheep_ids)).encode(),
+                KIND_KEY: self.kind.encode(),
+            }
+        )
+        self._writer.close()
+        self._writer = None
+        os.replace(self._tmp_path, self.path)
+        return self.path
+
+
+def sheep_ids(path: PathLike) -> List[str]:
+    """
+    Sheep in a consolidated file, read from its footer metadata.
+
+    Falls back to reading the sheep_id column for files written without it.
+    """
+    import pyarrow.parquet as pq
+
+    metadata = pq.read_metadata(path).metadata or {}
+    if SHEEP_IDS_KEY in metadata:
+        return json.loads(metadata[SHEEP_IDS_KEY])
+    ids = pq.read_table(path, columns=["sheep_id"]).column("sheep_id").to_pandas()
+    return sorted(ids.dropna().astype(str).unique())
+
+
+def read_features(
+    path: PathLike,
+    sheep: Optional[List[str]] = None,
+    columns: Optional[List[str]] = None,
+) -> "pd.DataFrame":
+    """
+    Load a consolidated file, optionally only some sheep and columns.
+
+    Args:
+        path: Consolidated Parquet file
+        sheep: Sheep ids to keep (pushed down as a filter)
+        columns: Columns to read
+
+    Returns:
+        DataFrame of the matching rows
+    """
+    import pandas as pd
+
+    filters = None if sheep is None else [("sheep_id", "in", [str(s) for s in sheep])]
+    return pd.read_parquet(path, columns=columns, filters=filters)
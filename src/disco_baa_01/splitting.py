@@ -0,0 +1,222 @@
+"""
+Streaming wide-to-long splitter for calibrated logger workbooks
+
+The calibrated workbooks hold one 'DT' column and one temperature column per
+logger. split_workbook_streaming walks the sheet row by row through openpyxl's
+read-only mode, buffers a fixed number of rows and flushes them to one shard
+per sheep, so peak memory depends on batch_rows and the number of loggers,
+never on the number of days in the file.
+"""
+
+from pathlib import Path
+from typing import Iterable, Iterator, List, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from disco_baa_01.store import MAX_OPEN_WRITERS, PartitionWriters, TemperatureStore
+
+TIME_COLUMN = "DT"
+
+# Header substrings marking non-logger columns (same rule as split_data_by_sheep)
+NON_SHEEP_MARKERS = ("DT", "hour", "date")
+
+DEFAULT_BATCH_ROWS = 10_000
+
+
+def sheep_columns(header: Sequence) -> List[str]:
+    """
+    Pick the logger columns out of a workbook header.
+
+    Args:
+        header: Column names of the sheet
+
+    Returns:
+        Column names (as strings) that are not DT/hour/date helpers
+    """
+    return [
+        str(col)
+        for col in header
+        if col is not None
+        and not any(marker in str(col) for marker in NON_SHEEP_MARKERS)
+    ]
+
+
+def iter_sheet_rows(input_path: Union[str, Path], sheet_name: str) -> Iterator[tuple]:
+    """
+    Yield the rows of a worksheet as value tuples, header first.
+
+    Uses openpyxl read-only mode so only the current row is held in memory.
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(str(input_path), read_only=True, data_only=True)
+    try:
+        for row in workbook[sheet_name].iter_rows(values_only=True):
+            if any(value is not None for value in row):
+                yield row
+    finally:
+        workbook.close()
+
+
+def iter_row_batches(
+    rows: Iterable[tuple], batch_rows: int = DEFAULT_BATCH_ROWS
+) -> Iterator[Tuple[list, pd.DataFrame]]:
+    """
+    Group streamed rows (header first) into wide DataFrame batches.
+
+    Yields:
+        (header, batch) pairs; batch has at most batch_rows rows
+    """
+    rows = iter(rows)
+    header = [str(col) if col is not None else "" for col in next(rows)]
+    buffer = []
+    for row in rows:
+        buffer.append(row)
+        if len(buffer) >= batch_rows:
+            yield header, pd.DataFrame.from_records(buffer, columns=header)
+            buffer = []
+    if buffer:
+        yield header, pd.DataFrame.from_records(buffer, columns=header)
+
+
+class CsvShardSink:
+    """
+    Append each sheep's readings to <output_dir>/<sheep_id>.csv.
+
+    The files have the same 'DT', <sheep_id> layout as split_data_by_sheep.
+    """
+
+    def __init__(self, output_dir: Union[str, Path]):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self._started = set()
+
+    def path_for(self, sheep_id: str) -> Path:
+        return self.output_dir / f"{sheep_id}.csv"
+
+    def write(self, sheep_id: str, timestamps: pd.Series, temps: np.ndarray) -> None:
+        new_file = sheep_id not in self._started
+        shard = pd.DataFrame({TIME_COLUMN: timestamps.to_numpy(), sheep_id: temps})
+        shard.to_csv(
+            self.path_for(sheep_id),
+            mode="w" if new_file else "a",
+            header=new_file,
+            index=False,
+        )
+        self._started.add(sheep_id)
+
+    def close(self) -> None:
+        pass
+
+
+class ParquetShardSink:
+    """
+    Write a long-format Parquet dataset partitioned by sheep_id.
+
+    Each sheep gets <output_dir>/sheep_id=<id>/part-<n>.parquet files with
+    'DT' and 'temp' columns, written through store.PartitionWriters so at most
+    max_open_writers files are open at once.
+    """
+
+    def __init__(
+        self, output_dir: Union[str, Path], max_open_writers: int = MAX_OPEN_WRITERS
+    ):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.max_open_writers = max_open_writers
+        self._writers = None
+
+    def partition_dir(self, sheep_id: str) -> Path:
+        return self.output_dir / f"sheep_id={sheep_id}"
+
+    def write(self, sheep_id: str, timestamps: pd.Series, temps: np.ndarray) -> None:
+        import pyarrow as pa
+
+        table = pa.table(
+            {
+                TIME_COLUMN: pa.array(timestamps.to_numpy(dtype="datetime64[us]")),
+                "temp": pa.array(temps, type=pa.float64()),
+            }
+        )
+        if self._writers is None:
+            self._writers = PartitionWriters(
+                table.schema, max_open=self.max_open_writers
+            )
+        self._writers.write(sheep_id, self.partition_dir(sheep_id), table)
+
+    def close(self) -> None:
+        if self._writers is not None:
+            self._writers.close()
+        self._writers = None
+
+
+def split_rows_streaming(
+    rows: Iterable[tuple],
+    sink,
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+) -> List[str]:
+    """
+    Split streamed wide rows (header first) into per-sheep shards.
+
+    Args:
+        rows: Iterable of row tuples; the first one is the header
+        sink: Object with write(sheep_id, timestamps, temps) and close()
+        batch_rows: Number of wide rows buffered before each flush
+
+    Returns:
+        The sheep ids found in the header, in column order
+    """
+    sheep_ids = []
+    try:
+        for header, batch in iter_row_batches(rows, batch_rows):
+            if not sheep_ids:
+                if TIME_COLUMN not in header:
+                    raise ValueError(f"No '{TIME_COLUMN}' column in header: {header}")
+                sheep_ids = sheep_columns(header)
+            timestamps = pd.to_datetime(batch[TIME_COLUMN], errors="coerce")
+            for sheep_id in sheep_ids:
+                temps = pd.to_numeric(batch[sheep_id], errors="coerce").to_numpy(
+                    dtype=np.float64
+                )
+                sink.write(sheep_id, timestamps, temps)
+    finally:
+        sink.close()
+    return sheep_ids
+
+
+def split_workbook_streaming(
+    input_path: Union[str, Path],
+    output_dir: Union[str, Path],
+    sheet_name: str = "Sheet1",
+    output_format: str = "csv",
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+) -> List[str]:
+    """
+    Split a calibrated logger workbook into per-sheep shards without loading it.
+
+    Args:
+        input_path: Path to the .xlsx workbook
+        output_dir: Directory for the shards
+        sheet_name: Worksheet holding the 'DT' and logger columns
+        output_format: "csv" for <sheep_id>.csv files (the split_data_by_sheep
+            layout), "parquet" for a dataset partitioned by sheep_id, or
+            "store" for a TemperatureStore at output_dir
+        batch_rows: Number of wide rows buffered before each flush
+
+    Returns:
+        The sheep ids found in the sheet
+    """
+    sinks = {
+        "csv": CsvShardSink,
+        "parquet": ParquetShardSink,
+        "store": TemperatureStore,
+    }
+    if output_format not in sinks:
+        raise ValueError(
+            f"output_format must be one of {sorted(sinks)}, got {output_format!r}"
+        )
+    sink = sinks[output_format](output_dir)
+    return split_rows_streaming(
+        iter_sheet_rows(input_path, sheet_name), sink, batch_rows
+    )
@@ -0,0 +1,362 @@
+"""
+Partitioned Parquet store for rumen temperature readings
+
+Readings live in a hive-partitioned dataset
+
+    <root>/year=<YYYY>/group=<G>/sheep_id=<ID>/part-<n>.parquet
+
+with a typed 'DT' timestamp column and a float64 'temp' column (float32 would
+move differences such as 36.9 - 37.7 across the drink thresholds). Readers pass
+sheep and date predicates to pyarrow.dataset, so only the matching partitions
+(and, through the 'DT' statistics, row groups) are read.
+
+Writes go through PartitionWriters, which buffers rows per partition and keeps
+at most MAX_OPEN_WRITERS files open, so a herd with more partitions than the
+file descriptor limit still splits in one streaming pass.
+"""
+
+import shutil
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+TIME_COLUMN = "DT"
+TEMP_COLUMN = "temp"
+
+# Roughly one month of 5-minute readings per row group, so date filters can skip
+ROW_GROUP_SIZE = 288 * 31
+
+# Most partition files held open at once (well below the usual ulimit -n of 1024)
+MAX_OPEN_WRITERS = 256
+
+DateLike = Union[str, pd.Timestamp, np.datetime64, None]
+
+
+def sheep_group(sheep_id: str) -> str:
+    """Group of a sheep, taken from the first character of its logger id."""
+    return str(sheep_id)[0]
+
+
+def is_temperature_store(path: Union[str, Path]) -> bool:
+    """Whether a directory holds a TemperatureStore (has year=* partitions)."""
+    path = Path(path)
+    return path.is_dir() and any(
+        p.is_dir() and p.name.startswith("year=") for p in path.iterdir()
+    )
+
+
+def _partitioning():
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    return ds.partitioning(
+        pa.schema(
+            [("year", pa.int16()), ("group", pa.string()), ("sheep_id", pa.string())]
+        ),
+        flavor="hive",
+    )
+
+
+def _file_schema():
+    import pyarrow as pa
+
+    return pa.schema([(TIME_COLUMN, pa.timestamp("us")), (TEMP_COLUMN, pa.float64())])
+
+
+class PartitionWriters:
+    """
+    Buffered Parquet writers for many partition directories.
+
+    Rows are buffered per partition and written in row groups of
+    row_group_size rows. At most max_open files are open at a time; when
+    another one is needed the least recently written file is finished, and a
+    later flush of its partition starts the next part-<n>.parquet file. With
+    fewer partitions than max_open every partition is a single part-0.parquet.
+
+    Args:
+        schema: pyarrow schema of every file
+        row_group_size: Rows buffered per partition before a write
+        max_open: Largest number of open files
+    """
+
+    def __init__(
+        self,
+        schema,
+        row_group_size: int = ROW_GROUP_SIZE,
+        max_open: int = MAX_OPEN_WRITERS,
+    ):
+        if max_open < 1:
+            raise ValueError("max_open must be at least 1")
+        self.schema = schema
+        self.row_group_size = row_group_size
+        self.max_open = max_open
+        self._buffers = {}
+        self._buffered_rows = {}
+        self._dirs = {}
+        self._parts = {}
+        self._open = OrderedDict()
+
+    @property
+    def n_open(self) -> int:
+        return len(self._open)
+
+    def write(self, key, directory: Union[str, Path], table) -> None:
+        """Buffer a table for the partition file(s) of key in directory."""
+        self._dirs[key] = Path(directory)
+        self._buffers.setdefault(key, []).append(table)
+        self._buffered_rows[key] = self._buffered_rows.get(key, 0) + table.num_rows
+        if self._buffered_rows[key] >= self.row_group_size:
+            self._flush(key)
+
+    def _flush(self, key) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        buffer = self._buffers.pop(key, None)
+        self._buffered_rows.pop(key, None)
+        if not buffer:
+            return
+        writer = self._open.pop(key, None)
+        if writer is None:
+            while len(self._open) >= self.max_open:
+                _, oldest = self._open.popitem(last=False)
+                oldest.close()
+            part = self._parts.get(key, 0)
+            self._parts[key] = part + 1
+            path = self._dirs[key] / f"part-{part}.parquet"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            writer = pq.ParquetWriter(str(path), self.schema)
+        self._open[key] = writer
+        writer.write_table(pa.concat_tables(buffer), row_group_size=self.row_group_size)
+
+    def close(self) -> None:
+        """Write every buffered row and finish all files."""
+        try:
+            for key in list(self._buffers):
+                self._flush(key)
+        finally:
+            for writer in self._open.values():
+                writer.close()
+            self._open = OrderedDict()
+            self._buffers = {}
+            self._buffered_rows = {}
+            self._parts = {}
+
+
+class TemperatureStore:
+    """
+    Read and write per-sheep temperature series in a partitioned Parquet dataset.
+
+    Args:
+        root: Directory of the dataset (created on first write)
+        max_open_writers: Most partition files open at once while writing
+    """
+
+    def __init__(
+        self, root: Union[str, Path], max_open_writers: int = MAX_OPEN_WRITERS
+    ):
+        self.root = Path(root)
+        self.max_open_writers = max_open_writers
+        self._writers = None
+        self._cleared = set()
+
+    def partition_dir(self, year: int, sheep_id: str) -> Path:
+        return (
+            self.root
+            / f"year={year}"
+            / f"group={sheep_group(sheep_id)}"
+            / f"sheep_id={sheep_id}"
+        )
+
+    def sheep_ids(self) -> List[str]:
+        """Sorted ids of all sheep in the store, read from the partition directories."""
+        if not self.root.is_dir():
+            return []
+        return sorted(
+            {
+                p.name[len("sheep_id=") :]
+                for p in self.root.glob("year=*/group=*/sheep_id=*")
+            }
+        )
+
+    def remove_sheep(self, sheep_id: str) -> None:
+        """Delete every partition of a sheep."""
+        for path in self.root.glob(f"year=*/group=*/sheep_id={sheep_id}"):
+            shutil.rmtree(path)
+
+    def append(self, sheep_id: str, timestamps, temps) -> None:
+        """
+        Append readings of one sheep, splitting them into year partitions.
+
+        The first append for a sheep on this store object replaces whatever the
+        store held for it before. Rows are buffered; call close() to write
+        them and finish the files.
+
+        Args:
+            sheep_id: Logger id of the sheep
+            timestamps: Reading times (anything pd.to_datetime accepts)
+            temps: Temperatures; NaN for missing readings
+        """
+        import pyarrow as pa
+
+        sheep_id = str(sheep_id)
+        if self._writers is None:
+            self._writers = PartitionWriters(
+                _file_schema(), max_open=self.max_open_writers
+            )
+        if sheep_id not in self._cleared:
+            self.remove_sheep(sheep_id)
+            self._cleared.add(sheep_id)
+
+        timestamps = pd.DatetimeIndex(pd.to_datetime(timestamps))
+        temps = np.asarray(temps, dtype=np.float64)
+        keep = ~timestamps.isna()
+        timestamps, temps = timestamps[keep], temps[keep]
+
+        years = timestamps.year.to_numpy()
+        for year in np.unique(years):
+            in_year = years == year
+            table = pa.table(
+                {
+                    TIME_COLUMN: pa.array(
+                        timestamps[in_year].to_numpy(dtype="datetime64[us]")
+                    ),
+                    TEMP_COLUMN: pa.array(temps[in_year], type=pa.float64()),
+                },
+                schema=_file_schema(),
+            )
+            self._writers.write(
+                (int(year), sheep_id), self.partition_dir(int(year), sheep_id), table
+            )
+
+    def close(self) -> None:
+        """Write the buffered readings and finish all partition files."""
+        if self._writers is not None:
+            self._writers.close()
+        self._writers = None
+        self._cleared = set()
+
+    def write_sheep(self, sheep_id: str, timestamps, temps) -> None:
+        """Replace the stored series of one sheep."""
+        self.append(sheep_id, timestamps, temps)
+        self.close()
+
+    def write(self, sheep_id: str, timestamps, temps) -> None:
+        """Sink interface used by splitting.split_rows_streaming."""
+        self.append(sheep_id, timestamps, temps)
+
+    def import_csv(self, file_path: Union[str, Path], sheep_id: str) -> None:
+        """Load a split <sheep_id>.csv ('DT', <sheep_id> columns) into the store."""
+        data = pd.read_csv(file_path, usecols=[TIME_COLUMN, sheep_id])
+        self.write_sheep(
+            sheep_id, data[TIME_COLUMN], pd.to_numeric(data[sheep_id], errors="coerce")
+        )
+
+    def import_csv_dir(self, splitted_data_dir: Union[str, Path]) -> List[str]:
+        """Load every split CSV of a directory into the store."""
+        sheep_ids = []
+        for file_path in sorted(Path(splitted_data_dir).glob("*.csv")):
+            self.import_csv(file_path, file_path.stem)
+            sheep_ids.append(file_path.stem)
+        return sheep_ids
+
+    def dataset(self):
+        """The store as a pyarrow.dataset.Dataset."""
+        import pyarrow.dataset as ds
+
+        # An explicit schema, so files written as float32 by older versions are
+        # read as float64 instead of narrowing the whole dataset
+        schema = _file_schema()
+        for field in _partitioning().schema:
+            schema = schema.append(field)
+        return ds.dataset(
+            str(self.root),
+            format="parquet",
+            partitioning=_partitioning(),
+            schema=schema,
+        )
+
+    def filter_expression(
+        self,
+        sheep_ids: Optional[Iterable[str]] = None,
+        start: DateLike = None,
+        end: DateLike = None,
+    ):
+        """
+        Build the pyarrow filter for sheep ids and a [start, end) date range.
+
+        Year bounds are added alongside the 'DT' bounds so whole year
+        partitions are pruned without opening their files.
+        """
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        conditions = []
+        if sheep_ids is not None:
+            sheep_ids = [str(s) for s in sheep_ids]
+            conditions.append(ds.field("sheep_id").isin(sheep_ids))
+            conditions.append(
+                ds.field("group").isin(sorted({sheep_group(s) for s in sheep_ids}))
+            )
+        if start is not None:
+            start = pd.Timestamp(start)
+            conditions.append(ds.field("year") >= start.year)
+            conditions.append(
+                ds.field(TIME_COLUMN)
+                >= pa.scalar(start.to_pydatetime(), pa.timestamp("us"))
+            )
+        if end is not None:
+            end = pd.Timestamp(end)
+            conditions.append(ds.field("year") <= end.year)
+            conditions.append(
+                ds.field(TIME_COLUMN)
+                < pa.scalar(end.to_pydatetime(), pa.timestamp("us"))
+            )
+
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        return expression
+
+    def read(
+        self,
+        sheep_ids: Optional[Iterable[str]] = None,
+        start: DateLike = None,
+        end: DateLike = None,
+        columns: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        Load readings in long format, only touching the requested partitions.
+
+        Args:
+            sheep_ids: Sheep to load. If None, all sheep
+            start: Inclusive lower bound on 'DT'
+            end: Exclusive upper bound on 'DT'
+            columns: Columns to load. Defaults to sheep_id, DT and temp
+
+        Returns:
+            DataFrame sorted by sheep_id and DT
+        """
+        columns = columns or ["sheep_id", TIME_COLUMN, TEMP_COLUMN]
+        if not self.root.is_dir():
+            return pd.DataFrame(columns=columns)
+        table = self.dataset().to_table(
+            columns=columns, filter=self.filter_expression(sheep_ids, start, end)
+        )
+        data = table.to_pandas()
+        sort_by = [c for c in ["sheep_id", TIME_COLUMN] if c in data.columns]
+        if sort_by:
+            data = data.sort_values(sort_by, kind="stable").reset_index(drop=True)
+        return data
+
+    def read_sheep_series(
+        self, sheep_id: str, start: DateLike = None, end: DateLike = None
+    ) -> pd.DataFrame:
+        """
+        Load one sheep in the split-CSV layout: a 'DT' column and a <sheep_id> column.
+        """
+        data = self.read([sheep_id], start, end, columns=[TIME_COLUMN, TEMP_COLUMN])
+        return data.rename(columns={TEMP_COLUMN: str(sheep_id)})
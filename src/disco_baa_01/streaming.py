@@ -0,0 +1,527 @@
+"""
+Online cosinor fitting and drink detection for live logger feeds
+
+A StreamingAnalyser takes rumen temperature readings in chunks (wide frames
+with a 'DT' column and one column per sheep, as the loggers export them) and
+keeps a small rolling state per sheep instead of the whole history:
+
+- the running cosinor sums (see cosinor.cosinor_sums) of the current day,
+  solved with solve_cosinor_sums once a reading from a later day arrives;
+- a ring buffer of the last RING_SIZE readings of the day, which covers the
+  drop/recovery windows of drinking.detect_drinking_events (8 readings before
+  to 50 after a drop) and of the drink-dip masking done before the fit (20
+  before to 40 after).
+
+A reading's cleaned (dip-masked and interpolated) value is final FINAL_LAG
+readings after it, when no later drop can reach back to it; it is then added
+to the day's sums and may leave the ring. Only the positions and times of
+masked readings still waiting for the next valid value are kept outside it.
+
+For readings in time order the day fits equal those of
+extraction.extract_cosinor_features (without the percentile columns, which
+need the whole day) and the drink events equal
+extraction.extract_drinking_behavior. Drink events are emitted as soon as
+their recovery window is complete, so unlike the batch run they are also
+reported on days that end up too short to fit. Readings older than the last
+one seen for the same sheep are dropped and counted as late_readings.
+
+read_feed yields the chunks of a file-based stand-in for the live feed.
+"""
+
+import io
+import logging
+import math
+import sys
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from disco_baa_01.cosinor import PERIOD_HOURS, solve_cosinor_sums
+from disco_baa_01.drinking import (
+    DRINK_COLUMNS,
+    MIN_DRINK_TEMP,
+    SAMPLE_MINUTES,
+    _single_arg_extreme,
+)
+from disco_baa_01.extraction import MIN_DAILY_RECORDS
+from disco_baa_01.instrumentation import count
+from disco_baa_01.segments import NS_PER_SECOND, SECONDS_PER_DAY, _as_datetime64
+from disco_baa_01.sink import SINK_KINDS
+
+# Readings of the current day held per sheep
+RING_SIZE = 64
+
+# Readings after a drop needed by its drink features (minimum +20, recovery +30)
+DRINK_LOOKAHEAD = 50
+
+# Readings after a drop needed by its dip mask (minimum +20, recovery +20)
+DIP_LOOKAHEAD = 40
+
+# A dip blanks readings from 19 before its drop, masked DIP_LOOKAHEAD + 1 later
+FINAL_LAG = 60
+
+NS_PER_DAY = NS_PER_SECOND * SECONDS_PER_DAY
+
+DAY_COLUMNS = [
+    "group",
+    "sheep_id",
+    "record_date",
+    "record_num",
+    "M",
+    "A",
+    "phi",
+    "r_squared",
+]
+
+EVENT_COLUMNS = ["sheep_id"] + DRINK_COLUMNS + ["hour"]
+
+_SUM_KEYS = ("n", "c", "s", "cc", "ss", "cs", "y", "yc", "ys", "yy")
+
+log = logging.getLogger(__name__)
+
+
+class _DropDetector:
+    """
+    drinking.find_drop_events for one day, one reading at a time.
+
+    A reading is an event once the next two readings show no further
+    significant drop; the decision is made when they arrive (or at day end).
+    """
+
+    def __init__(self, temp_thresh: float, min_temp: float):
+        self.temp_thresh = temp_thresh
+        self.min_temp = min_temp
+        self.recent = deque(maxlen=2)
+        # [position, drop into it, smallest drop of the next two, readings seen since]
+        self.pending = deque()
+
+    def push(self, pos: int, value: float) -> List[int]:
+        if not value >= self.min_temp:
+            return []
+        drop = min((value - previous for previous in self.recent), default=math.inf)
+        self.recent.append(value)
+        for item in self.pending:
+            item[2] = min(item[2], drop)
+            item[3] += 1
+        events = []
+        while self.pending and self.pending[0][3] == 2:
+            events.extend(self._decide(self.pending.popleft()))
+        self.pending.append([pos, drop, math.inf, 0])
+        return events
+
+    def finish(self) -> List[int]:
+        events = []
+        while self.pending:
+            events.extend(self._decide(self.pending.popleft()))
+        self.recent.clear()
+        return events
+
+    def _decide(self, item: list) -> List[int]:
+        pos, drop, following, _ = item
+        return [pos] if drop < self.temp_thresh <= following else []
+
+
+class _SheepStream:
+    """Rolling state of one sheep: open day sums, ring buffer and pending drops."""
+
+    def __init__(self, sheep_id: str, analyser: "StreamingAnalyser"):
+        self.sheep_id = sheep_id
+        self.analyser = analyser
+        self.last_ns = None
+        self.day = None
+        self.values = np.empty(RING_SIZE)
+        self.masked = np.empty(RING_SIZE)
+        self.time_hours = np.empty(RING_SIZE)
+        self.timestamps = np.empty(RING_SIZE, dtype="datetime64[ns]")
+
+    def _start_day(self, day: int) -> None:
+        self.day = day
+        self.length = 0
+        self.detector = _DropDetector(
+            self.analyser.temp_thresh, self.analyser.abnormal_temp_thresh
+        )
+        self.drinks = deque()
+        self.dips = deque()
+        # Next position to add to the sums, last valid cleaned reading and the gap
+        # after it
+        self.final = 0
+        self.last_valid = None
+        self.gap = []
+        self.shift = None
+        self.sums = dict.fromkeys(_SUM_KEYS, 0.0)
+
+    def extend(
+        self, ns: np.ndarray, values: np.ndarray, days: list, events: list
+    ) -> None:
+        """Consume readings in time order, appending finished days and drink events."""
+        abnormal = self.analyser.abnormal_temp_thresh
+        late = 0
+        for t, value in zip(ns.tolist(), values.tolist()):
+            if self.last_ns is not None and t < self.last_ns:
+                late += 1
+                continue
+            self.last_ns = t
+            if not value >= abnormal:
+                continue
+            day = t // NS_PER_DAY
+            if day != self.day:
+                if self.day is not None:
+                    self.finish_day(days, events)
+                self._start_day(day)
+            self._append(t, value, events)
+        if late:
+            count("late_readings", late)
+
+    def _append(self, t: int, value: float, events: list) -> None:
+        pos = self.length
+        slot = pos % RING_SIZE
+        self.values[slot] = self.masked[slot] = value
+        self.time_hours[slot] = (t // NS_PER_SECOND) % SECONDS_PER_DAY / 3600
+        self.timestamps[slot] = t
+        self.length += 1
+        self._queue(self.detector.push(pos, value))
+        self._advance(events, closing=False)
+
+    def _queue(self, drops: List[int]) -> None:
+        if self.analyser.detect_drinks:
+            self.drinks.extend(drops)
+        if self.analyser.fit_days:
+            self.dips.extend(drops)
+
+    def _advance(self, events: list, closing: bool) -> None:
+        while self.drinks and (
+            closing or self.length > self.drinks[0] + DRINK_LOOKAHEAD
+        ):
+            self._emit_drink(self.drinks.popleft(), events)
+        if self.analyser.fit_days:
+            while self.dips and (closing or self.length > self.dips[0] + DIP_LOOKAHEAD):
+                self._blank_dip(self.dips.popleft())
+            limit = self.length if closing else self.length - FINAL_LAG
+            while self.final < limit:
+                self._add_cleaned(self.final)
+                self.final += 1
+
+    def _arg_extreme(
+        self,
+        array: np.ndarray,
+        center: int,
+        before: int,
+        after: int,
+        find_max: bool = False,
+    ) -> int:
+        """drinking._single_arg_extreme over the ring, in day positions."""
+        start = max(center - before, 0)
+        stop = min(center + after + 1, self.length)
+        window = array[np.arange(start, stop) % RING_SIZE]
+        found = _single_arg_extreme(
+            window, center - start, before, after, 0, window.size, find_max
+        )
+        return found + start if found >= 0 else -1
+
+    def _emit_drink(self, drop: int, events: list) -> None:
+        values = self.values
+        low = self._arg_extreme(values, drop, 5, 20)
+        if low < 0:
+            return
+        before_5, before_10 = (low - 1, low - 2) if low >= 2 else (low, low)
+        start_max = self._arg_extreme(values, low, 3, 0, find_max=True)
+        end_max = self._arg_extreme(values, low, 0, 30, find_max=True)
+        timestamp = pd.Timestamp(self.timestamps[low % RING_SIZE])
+        events.append(
+            (
+                self.sheep_id,
+                timestamp,
+                values[low % RING_SIZE],
+                values[before_5 % RING_SIZE],
+                values[before_10 % RING_SIZE],
+                values[start_max % RING_SIZE],
+                values[end_max % RING_SIZE],
+                SAMPLE_MINUTES * (end_max - low),
+                SAMPLE_MINUTES * (low - start_max),
+                self.sheep_id,
+                timestamp.hour,
+            )
+        )
+
+    def _blank_dip(self, drop: int) -> None:
+        # Same windows as drinking.dip_windows, on the series with the earlier dips
+        # blanked
+        low = self._arg_extreme(self.masked, drop, 10, 20)
+        if low < 0:
+            return
+        start = self._arg_extreme(self.masked, low, 10, 5, find_max=True)
+        end = self._arg_extreme(self.masked, low, 0, 20, find_max=True)
+        if end - 1 >= start + 1:
+            self.masked[np.arange(start + 1, end) % RING_SIZE] = np.nan
+
+    def _add_cleaned(self, pos: int) -> None:
+        slot = pos % RING_SIZE
+        value = self.masked[slot]
+        if math.isnan(value):
+            # Interpolated once the next valid reading is known; leading gaps stay NaN
+            if self.last_valid is not None:
+                self.gap.append((pos, self.time_hours[slot]))
+            return
+        if self.gap:
+            previous_pos, previous = self.last_valid
+            for gap_pos, gap_hours in self.gap:
+                weight = (gap_pos - previous_pos) / (pos - previous_pos)
+                self._accumulate(previous + (value - previous) * weight, gap_hours)
+            self.gap = []
+        self._accumulate(value, self.time_hours[slot])
+        self.last_valid = (pos, value)
+
+    def _accumulate(self, value: float, time_hours: float) -> None:
+        if self.shift is None:
+            self.shift = value
+        y = value - self.shift
+        angle = 2 * math.pi * time_hours / self.analyser.period
+        c = math.cos(angle)
+        s = math.sin(angle)
+        sums = self.sums
+        sums["n"] += 1
+        sums["c"] += c
+        sums["s"] += s
+        sums["cc"] += c * c
+        sums["ss"] += s * s
+        sums["cs"] += c * s
+        sums["y"] += y
+        sums["yc"] += y * c
+        sums["ys"] += y * s
+        sums["yy"] += y * y
+
+    def finish_day(self, days: list, events: list) -> None:
+        """Close the open day: decide the last drops, flush the ring and fit."""
+        if self.day is None:
+            return
+        self._queue(self.detector.finish())
+        self._advance(events, closing=True)
+        day, self.day = self.day, None
+        if not self.analyser.fit_days:
+            return
+        if self.last_valid is not None:
+            # Trailing gaps take the last valid value, as in interpolate_segments
+            for _, gap_hours in self.gap:
+                self._accumulate(self.last_valid[1], gap_hours)
+        if self.length < MIN_DAILY_RECORDS:
+            count("days_skipped_short")
+            log.debug(
+                "Insufficient data points (< %d) for %s on day %d. Skipping.",
+                MIN_DAILY_RECORDS,
+                self.sheep_id,
+                day,
+            )
+            return
+
+        sums = {key: np.array([value]) for key, value in self.sums.items()}
+        sums["shift"] = self.shift or 0.0
+        fit = solve_cosinor_sums(sums).iloc[0]
+        count("days_fitted")
+        if np.isnan(fit["M"]):
+            count("failed_fits")
+        days.append(
+            (
+                self.sheep_id[0],
+                self.sheep_id,
+                str(np.datetime64(day, "D")),
+                self.length,
+                fit["M"],
+                fit["A"],
+                fit["phi"],
+                fit["r_squared"],
+            )
+        )
+
+
+class StreamingAnalyser:
+    """
+    Incremental daily cosinor fits and drink detection over a live feed.
+
+    Feed chunks with push() as they arrive; each call returns the days that
+    were finished and the drink events that were completed by it. close()
+    finishes every open day (e.g. at the end of a replay). Memory per sheep
+    is bounded by RING_SIZE readings, whatever the length of the feed.
+
+    Args:
+        abnormal_temp_thresh: Readings below this are ignored (as in the batch
+            extraction); must be at least MIN_DRINK_TEMP
+        temp_thresh: Temperature change that counts as a significant drop
+        period: Period of the cosinor in hours
+        analyses: Sink kinds to compute ('cosinor_features',
+            'drinking_behavior'); the others are skipped
+    """
+
+    def __init__(
+        self,
+        abnormal_temp_thresh: float = 35,
+        temp_thresh: float = -0.5,
+        period: float = PERIOD_HOURS,
+        analyses: Sequence[str] = SINK_KINDS,
+    ):
+        if abnormal_temp_thresh < MIN_DRINK_TEMP:
+            # Below it the drink and dip detectors would see different readings
+            raise ValueError(
+                f"abnormal_temp_thresh must be at least {MIN_DRINK_TEMP}, "
+                f"got {abnormal_temp_thresh}"
+            )
+        unknown = set(analyses) - set(SINK_KINDS)
+        if unknown:
+            raise ValueError(
+                f"Unknown analyses {sorted(unknown)}, expected some of {SINK_KINDS}"
+            )
+        self.abnormal_temp_thresh = abnormal_temp_thresh
+        self.temp_thresh = temp_thresh
+        self.period = period
+        self.analyses = tuple(analyses)
+        self.fit_days = "cosinor_features" in analyses
+        self.detect_drinks = "drinking_behavior" in analyses
+        self.sheep: Dict[str, _SheepStream] = {}
+
+    def push(self, frame: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+        """
+        Consume one chunk of readings.
+
+        Args:
+            frame: 'DT' column plus one temperature column per sheep. Rows need
+                not be sorted within the chunk, but readings older than the
+                last one already seen for a sheep are dropped
+
+        Returns:
+            Frames keyed by the requested kinds: finished days (DAY_COLUMNS)
+            and drink events (EVENT_COLUMNS), possibly empty
+        """
+        if "DT" not in frame.columns:
+            raise ValueError("Feed chunks need a 'DT' column")
+        ns = _as_datetime64(frame["DT"]).view(np.int64)
+        order = np.argsort(ns, kind="stable")
+        order = order[ns[order] != np.iinfo(np.int64).min]
+        ns = ns[order]
+
+        days, events = [], []
+        for sheep_id in frame.columns:
+            if sheep_id == "DT":
+                continue
+            stream = self.sheep.get(sheep_id)
+            if stream is None:
+                stream = self.sheep[sheep_id] = _SheepStream(str(sheep_id), self)
+            values = frame[sheep_id].to_numpy(dtype=np.float64)[order]
+            stream.extend(ns, values, days, events)
+        return self._outputs(days, events)
+
+    def close(self) -> Dict[str, pd.DataFrame]:
+        """Finish every open day and return what it completes, as push()."""
+        days, events = [], []
+        for stream in self.sheep.values():
+            stream.finish_day(days, events)
+        return self._outputs(days, events)
+
+    def _outputs(self, days: list, events: list) -> Dict[str, pd.DataFrame]:
+        if events:
+            count("drink_events", len(events))
+        outputs = {}
+        if self.fit_days:
+            outputs["cosinor_features"] = pd.DataFrame(days, columns=DAY_COLUMNS)
+        if self.detect_drinks:
+            drinks = pd.DataFrame(events, columns=EVENT_COLUMNS)
+            drinks["DT"] = drinks["DT"].astype("datetime64[ns]")
+            outputs["drinking_behavior"] = drinks
+        return outputs
+
+
+def append_outputs(
+    outputs: Dict[str, pd.DataFrame], output_dir: Union[str, Path]
+) -> None:
+    """
+    Append streamed rows to <output_dir>/<kind>.csv, writing the header once.
+
+    CSV rather than the consolidated Parquet of disco_baa_01.sink, so rows are
+    visible to readers while the feed is still running.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for kind, frame in outputs.items():
+        if frame.empty:
+            continue
+        path = output_dir / f"{kind}.csv"
+        frame.to_csv(path, mode="a", header=not path.exists(), index=False)
+
+
+def _follow_directory(
+    directory: Path, poll_interval: float, idle_timeout: Optional[float]
+) -> Iterator[pd.DataFrame]:
+    seen = set()
+    idle_since = time.monotonic()
+    while True:
+        new = sorted(path for path in directory.glob("*.csv") if path.name not in seen)
+        for path in new:
+            seen.add(path.name)
+            yield pd.read_csv(path)
+        if new:
+            idle_since = time.monotonic()
+        elif idle_timeout is not None and time.monotonic() - idle_since >= idle_timeout:
+            return
+        else:
+            time.sleep(poll_interval)
+
+
+def _follow_file(
+    path: Path, poll_interval: float, idle_timeout: Optional[float]
+) -> Iterator[pd.DataFrame]:
+    header = None
+    partial = ""
+    idle_since = time.monotonic()
+    with open(path, newline="") as f:
+        while True:
+            text = partial + f.read()
+            lines, _, partial = text.rpartition("\n")
+            if lines and header is None:
+                header, _, lines = lines.partition("\n")
+            if lines:
+                idle_since = time.monotonic()
+                yield pd.read_csv(io.StringIO(f"{header}\n{lines}\n"))
+            elif (
+                idle_timeout is not None
+                and time.monotonic() - idle_since >= idle_timeout
+            ):
+                return
+            else:
+                time.sleep(poll_interval)
+
+
+def read_feed(
+    source: Union[str, Path],
+    poll_interval: float = 1.0,
+    idle_timeout: Optional[float] = None,
+    chunk_rows: int = 288,
+) -> Iterator[pd.DataFrame]:
+    """
+    Chunks of a file-based stand-in for the live logger feed.
+
+    Each chunk is a frame with a 'DT' column and one column per sheep.
+
+    Args:
+        source: '-' for CSV on stdin (read until EOF); a directory, whose
+            *.csv files are read once each, in name order, as they appear
+            (write them under another name and rename them into place); or a
+            CSV file that keeps growing, whose complete lines are read as
+            they are appended
+        poll_interval: Seconds between checks for new files or lines
+        idle_timeout: Stop after this many seconds without new data. If None,
+            follow the directory or file until interrupted
+        chunk_rows: Rows per chunk read from stdin
+
+    Returns:
+        Iterator over the chunks
+    """
+    if str(source) == "-":
+        return iter(pd.read_csv(sys.stdin, chunksize=chunk_rows))
+    source = Path(source)
+    if source.is_dir():
+        return _follow_directory(source, poll_interval, idle_timeout)
+    if not source.exists():
+        raise FileNotFoundError(f"Feed source not found: {source}")
+    return _follow_file(source, poll_interval, idle_timeout)
@@ -0,0 +1,289 @@
+"""
+Threshold sweeps of drink detection and drink masking
+
+Choosing temp_thresh (and abnormal_temp_thresh) means re-running
+extract_drinking_behavior / extract_cosinor_features once per candidate value.
+Almost all of that work does not depend on the threshold: the lagged diffs,
+the drop candidates and the windowed minima and maxima around them. Here they
+are computed once per abnormal_temp_thresh (see
+drinking.drop_event_intervals) and every temp_thresh of the grid is then a
+pair of comparisons over the candidates, giving one tidy row per
+(sheep, day, abnormal_temp_thresh, temp_thresh).
+"""
+
+import os
+from pathlib import Path
+from typing import Iterable, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from disco_baa_01.cosinor import ArrayLike, segment_ids_from_offsets
+from disco_baa_01.drinking import (
+    MIN_DRINK_TEMP,
+    _segment_bounds,
+    blank_event_dips,
+    dip_windows,
+    drop_event_intervals,
+    event_features,
+)
+from disco_baa_01.extraction import MIN_DAILY_RECORDS, load_sheep_series
+from disco_baa_01.segments import segment_days
+
+DEFAULT_TEMP_THRESHES = (-1.5, -1.25, -1.0, -0.75, -0.5, -0.25)
+
+SWEEP_COLUMNS = [
+    "sheep_id",
+    "record_date",
+    "abnormal_temp_thresh",
+    "temp_thresh",
+    "drink_count",
+    "mean_drink_temp",
+    "mean_drop",
+    "mean_drop_time",
+    "mean_recover_time",
+    "masked_readings",
+]
+
+SWEEP_EVENT_COLUMNS = [
+    "sheep_id",
+    "record_date",
+    "abnormal_temp_thresh",
+    "temp_thresh",
+    "DT",
+    "drink_temp",
+    "before_5min_temp",
+    "before_10min_temp",
+    "before_drink_temp",
+    "after_drink_recover",
+    "recover_time",
+    "drop_time",
+]
+
+
+def _active(
+    lower: np.ndarray, upper: np.ndarray, temp_threshes: np.ndarray
+) -> np.ndarray:
+    """(n_candidates, n_thresholds) mask of the thresholds making each an event."""
+    return (lower[:, np.newaxis] < temp_threshes) & (
+        temp_threshes <= upper[:, np.newaxis]
+    )
+
+
+def sweep_segments(
+    values: ArrayLike,
+    timestamps: ArrayLike,
+    offsets: ArrayLike,
+    temp_threshes: Sequence[float],
+    abnormal_temp_thresh: float = 35,
+    include_masking: bool = True,
+) -> Tuple[dict, dict]:
+    """
+    Evaluate a grid of temp_thresh values on a day-segmented series.
+
+    Detection follows detect_drinking_events and masking follows
+    mask_drinking_events; both give, for every threshold, exactly what the
+    single-threshold functions return.
+
+    Args:
+        values: Temperatures of all days, back to back (as from DaySegments.take)
+        timestamps: Timestamp of each reading
+        offsets: CSR-style day boundaries
+        temp_threshes: Drop thresholds to evaluate
+        abnormal_temp_thresh: min_temp of the masking rule
+        include_masking: Also count the readings masked_drinking_events blanks
+
+    Returns:
+        (summary, events): summary holds (n_days, n_thresholds) arrays
+        "drink_count", "mean_drink_temp", "mean_drop", "mean_drop_time",
+        "mean_recover_time" and, with include_masking, "masked_readings";
+        events is the columnar event table with "day" and "threshold"
+        (index into temp_threshes) columns
+    """
+    values = np.asarray(values, dtype=np.float64)
+    timestamps = np.asarray(timestamps)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    temp_threshes = np.asarray(temp_threshes, dtype=np.float64)
+    n_days, n_thresh = offsets.size - 1, temp_threshes.size
+    lo, hi, _ = _segment_bounds(values.size, offsets)
+
+    # Detection: candidate windows are evaluated once, then shared by every threshold
+    positions, lower, upper = drop_event_intervals(values, MIN_DRINK_TEMP, offsets)
+    live = _active(lower, upper, temp_threshes).any(axis=1)
+    positions, lower, upper = positions[live], lower[live], upper[live]
+    features = event_features(values, timestamps, positions, lo, hi)
+    candidate = features.pop("event")
+    row, threshold = np.nonzero(
+        _active(lower[candidate], upper[candidate], temp_threshes)
+    )
+
+    events = {key: column[row] for key, column in features.items()}
+    events["day"] = np.searchsorted(offsets, events["position"], side="right") - 1
+    events["threshold"] = threshold
+
+    key = events["day"] * n_thresh + threshold
+    size = n_days * n_thresh
+    counts = np.bincount(key, minlength=size)
+
+    def _mean(weights):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return (np.bincount(key, weights=weights, minlength=size) / counts).reshape(
+                n_days, n_thresh
+            )
+
+    summary = {
+        "drink_count": counts.reshape(n_days, n_thresh),
+        "mean_drink_temp": _mean(events["drink_temp"]),
+        "mean_drop": _mean(events["before_drink_temp"] - events["drink_temp"]),
+        "mean_drop_time": _mean(events["drop_time"].astype(np.float64)),
+        "mean_recover_time": _mean(events["recover_time"].astype(np.float64)),
+    }
+
+    if include_masking:
+        # Masking: dip windows on the unmasked series are also threshold-independent
+        day_ids = segment_ids_from_offsets(offsets)
+        present = ~np.isnan(values)
+        positions, lower, upper = drop_event_intervals(
+            values, abnormal_temp_thresh, offsets
+        )
+        windows = dip_windows(values, positions, lo, hi)
+        active = _active(lower, upper, temp_threshes)
+        masked_readings = np.zeros((n_days, n_thresh), dtype=np.int64)
+        for k in range(n_thresh):
+            sel = active[:, k]
+            masked = blank_event_dips(
+                values, positions[sel], *(w[sel] for w in windows), lo, hi
+            )
+            masked_readings[:, k] = np.bincount(
+                day_ids[present & np.isnan(masked)], minlength=n_days
+            )
+        summary["masked_readings"] = masked_readings
+    return summary, events
+
+
+def sweep_drinking_thresholds(
+    sheep_data: pd.DataFrame,
+    sheep_id: str,
+    temp_threshes: Sequence[float] = DEFAULT_TEMP_THRESHES,
+    abnormal_temp_threshes: Sequence[float] = (35,),
+    include_masking: bool = True,
+    return_events: bool = False,
+) -> Union[pd.DataFrame, Tuple[pd.DataFrame, pd.DataFrame]]:
+    """
+    Drink-detection sweep of one loaded sheep series.
+
+    Days are segmented once per abnormal_temp_thresh and days with fewer than
+    MIN_DAILY_RECORDS readings are skipped, as in extract_drinking_behavior.
+
+    Args:
+        sheep_data: Frame from load_sheep_series
+        sheep_id: Logger column name of the sheep
+        temp_threshes: Drop thresholds to evaluate
+        abnormal_temp_threshes: Low-temperature cut-offs to evaluate
+        include_masking: Add the masked_readings column
+        return_events: Also return the per-event table
+
+    Returns:
+        DataFrame with SWEEP_COLUMNS, one row per (day, abnormal_temp_thresh,
+        temp_thresh) including days without events; with return_events, a
+        (summary, events) tuple where events has SWEEP_EVENT_COLUMNS
+    """
+    temp_threshes = np.asarray(temp_threshes, dtype=np.float64)
+    values = sheep_data[sheep_id].to_numpy(dtype=np.float64)
+    summaries, event_frames = [], []
+    for abnormal in abnormal_temp_threshes:
+        segments = segment_days(sheep_data["DT"], keep=values >= abnormal)
+        segments = segments.select(segments.lengths >= MIN_DAILY_RECORDS)
+        summary, events = sweep_segments(
+            segments.take(values),
+            segments.take(sheep_data["DT"]),
+            segments.offsets,
+            temp_threshes,
+            abnormal,
+            include_masking,
+        )
+        dates = segments.date_strings()
+        frame = pd.DataFrame(
+            {
+                "sheep_id": sheep_id,
+                "record_date": np.repeat(dates, temp_threshes.size),
+                "abnormal_temp_thresh": abnormal,
+                "temp_thresh": np.tile(temp_threshes, segments.n_days),
+            }
+        )
+        for column, array in summary.items():
+            frame[column] = array.ravel()
+        summaries.append(frame.reindex(columns=SWEEP_COLUMNS))
+
+        if return_events:
+            event_frame = pd.DataFrame(
+                {
+                    "sheep_id": sheep_id,
+                    "record_date": dates[events["day"]],
+                    "abnormal_temp_thresh": abnormal,
+                    "temp_thresh": temp_threshes[events["threshold"]],
+                }
+            )
+            for column in SWEEP_EVENT_COLUMNS[4:]:
+                event_frame[column] = events[column]
+            event_frames.append(event_frame)
+
+    summary = pd.concat(summaries, ignore_index=True)
+    if not return_events:
+        return summary
+    return summary, pd.concat(event_frames, ignore_index=True)
+
+
+def sweep_herd(
+    sheep_sources: Iterable[Tuple[str, Union[str, Path]]],
+    temp_threshes: Sequence[float] = DEFAULT_TEMP_THRESHES,
+    abnormal_temp_threshes: Sequence[float] = (35,),
+    include_masking: bool = True,
+    cache_dir: Optional[Union[str, Path]] = None,
+) -> pd.DataFrame:
+    """
+    Threshold sweep of many sheep.
+
+    Args:
+        sheep_sources: (sheep_id, source) pairs as from list_splitted_files
+        temp_threshes: Drop thresholds to evaluate
+        abnormal_temp_threshes: Low-temperature cut-offs to evaluate
+        include_masking: Add the masked_readings column
+        cache_dir: Optional SeriesCache directory to read the series through
+
+    Returns:
+        Concatenated sweep_drinking_thresholds tables, sheep in sorted order
+    """
+    frames = []
+    for sheep_id, source in sorted(sheep_sources):
+        sheep_data = load_sheep_series(source, sheep_id, cache=cache_dir)
+        if sheep_data is None:
+            continue
+        frames.append(
+            sweep_drinking_thresholds(
+                sheep_data,
+                sheep_id,
+                temp_threshes,
+                abnormal_temp_threshes,
+                include_masking,
+            )
+        )
+    if not frames:
+        return pd.DataFrame(columns=SWEEP_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def save_sweep(sweep: pd.DataFrame, output_path: Union[str, Path]) -> str:
+    """
+    Write a sweep table as Parquet, or as CSV when output_path ends in .csv.
+
+    Returns:
+        The written path
+    """
+    output_path = str(output_path)
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    if output_path.endswith(".csv"):
+        sweep.to_csv(output_path, index=False)
+    else:
+        sweep.to_parquet(output_path, index=False)
+    return output_path
@@ -0,0 +1,126 @@
+"""
+Synthetic rumen temperature series for benchmarks and tests
+
+Readings are sampled every 5 minutes and follow a daily cosine with
+per-sheep mesor, amplitude and acrophase, Gaussian noise, and injected drink
+drops: a sharp fall of 0.8-3 C followed by a recovery over roughly half an
+hour. The output uses the split-CSV layout ('DT' and a <sheep_id> column).
+"""
+
+from pathlib import Path
+from typing import List, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+SAMPLES_PER_DAY = 288
+
+# Relative depth of a drink drop over the samples following the drink
+DROP_SHAPE = np.array([1.0, 0.8, 0.55, 0.35, 0.2, 0.1])
+
+
+def synthetic_sheep_ids(n_sheep: int, group: str = "S") -> List[str]:
+    """Logger-like ids: group letter plus a zero-padded number."""
+    return [f"{group}{i:04d}" for i in range(1, n_sheep + 1)]
+
+
+def synthetic_temperatures(
+    n_days: int,
+    seed: int = 0,
+    drinks_per_day: float = 6.0,
+    noise_sd: float = 0.08,
+    missing_fraction: float = 0.0,
+) -> np.ndarray:
+    """
+    Generate one sheep's 5-minute temperatures.
+
+    Args:
+        n_days: Number of whole days
+        seed: Random seed; the same seed gives the same series
+        drinks_per_day: Mean number of drink drops per day (Poisson)
+        noise_sd: Standard deviation of the measurement noise (C)
+        missing_fraction: Fraction of readings replaced by NaN
+
+    Returns:
+        float64 array of n_days * SAMPLES_PER_DAY readings
+    """
+    rng = np.random.default_rng(seed)
+    n = n_days * SAMPLES_PER_DAY
+    hours = (np.arange(n) % SAMPLES_PER_DAY) * (24.0 / SAMPLES_PER_DAY)
+
+    mesor = rng.normal(39.3, 0.2)
+    amplitude = rng.uniform(0.2, 0.5)
+    acrophase = rng.uniform(-np.pi, np.pi)
+    temps = mesor + amplitude * np.cos(2 * np.pi * hours / 24.0 + acrophase)
+    temps += rng.normal(0.0, noise_sd, n)
+
+    n_drinks = rng.poisson(drinks_per_day * n_days)
+    starts = rng.integers(0, n - len(DROP_SHAPE), n_drinks)
+    depths = rng.uniform(0.8, 3.0, n_drinks)
+    drop = np.zeros(n)
+    for k, rel in enumerate(DROP_SHAPE):
+        np.add.at(drop, starts + k, depths * rel)
+    temps -= drop
+
+    if missing_fraction > 0:
+        temps[rng.random(n) < missing_fraction] = np.nan
+    return temps
+
+
+def synthetic_sheep_frame(
+    sheep_id: str,
+    n_days: int = 365,
+    start: str = "2023-01-01",
+    seed: int = 0,
+    **kwargs,
+) -> pd.DataFrame:
+    """
+    One sheep's readings in the split-CSV layout.
+
+    Args:
+        sheep_id: Column name of the temperature readings
+        n_days: Number of whole days
+        start: Date of the first reading (midnight)
+        seed: Random seed
+        **kwargs: Forwarded to synthetic_temperatures
+
+    Returns:
+        DataFrame with 'DT' and <sheep_id> columns
+    """
+    timestamps = pd.date_range(start, periods=n_days * SAMPLES_PER_DAY, freq="5min")
+    temps = synthetic_temperatures(n_days, seed=seed, **kwargs)
+    return pd.DataFrame({"DT": timestamps, sheep_id: temps})
+
+
+def write_synthetic_sheep_csvs(
+    output_dir: Union[str, Path],
+    n_sheep: int,
+    n_days: int = 365,
+    start: str = "2023-01-01",
+    seed: int = 0,
+    **kwargs,
+) -> List[Tuple[str, Path]]:
+    """
+    Write one <sheep_id>.csv per synthetic sheep.
+
+    Args:
+        output_dir: Directory for the CSVs (created if missing)
+        n_sheep: Number of sheep
+        n_days: Days per sheep
+        start: Date of the first reading
+        seed: Base seed; sheep i uses seed + i
+        **kwargs: Forwarded to synthetic_temperatures
+
+    Returns:
+        (sheep_id, path) pairs in sheep_id order
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    files = []
+    for i, sheep_id in enumerate(synthetic_sheep_ids(n_sheep)):
+        path = output_dir / f"{sheep_id}.csv"
+        synthetic_sheep_frame(sheep_id, n_days, start, seed + i, **kwargs).to_csv(
+            path, index=False
+        )
+        files.append((sheep_id, path))
+    return files
@@ -1,25 +1,47 @@
 """
 Utility functions for data science operations
+
+pandas and NumPy are imported inside the functions, so importing this module
+(and the masterfile helpers built on it) costs nothing until data is touched.
 """
 
-import pandas as pd
-import numpy as np
+from __future__ import annotations
+
 import random
 from pathlib import Path
-from typing import Union
+from typing import TYPE_CHECKING, Optional, Sequence, Union
+
+if TYPE_CHECKING:
+    import pandas as pd
 
+# Nullable integer dtypes and their NumPy counterparts, smallest first
+_NULLABLE_INTS = [
+    ("Int8", "int8"),
+    ("Int16", "int16"),
+    ("Int32", "int32"),
+    ("Int64", "int64"),
+]
 
-def load_data(filepath: Union[str, Path]) -> pd.DataFrame:
+
+def load_data(
+    filepath: Union[str, Path], columns: Optional[Sequence[str]] = None
+) -> pd.DataFrame:
     """
     Load data from a CSV file.
+
+    For masterfile artifacts, masterfile.load_masterfile reads column groups
+    from the Parquet artifact instead.
     
     Args:
         filepath: Path to the CSV file
+        columns: Only parse these columns. If None, all columns
         
     Returns:
         DataFrame containing the loaded data
     """
-    return pd.read_csv(filepath)
+    import pandas as pd
+
+    return pd.read_csv(filepath, usecols=columns)
 
 
 def save_data(df: pd.DataFrame, filepath: Union[str, Path]) -> None:
@@ -33,23 +55,172 @@ def save_data(df: pd.DataFrame, filepath: Union[str, Path]) -> None:
     df.to_csv(filepath, index=False)
 
 
-def describe_data(df: pd.DataFrame) -> dict:
+def describe_data(df: pd.DataFrame, compare_optimized: bool = False) -> dict:
     """
     Generate basic statistics about the dataset.
     
     Args:
         df: DataFrame to analyze
+        compare_optimized: Also report the memory usage after optimize_dtypes
         
     Returns:
         Dictionary with basic statistics
     """
-    return {
+    stats = {
         "shape": df.shape,
         "columns": df.columns.tolist(),
         "dtypes": df.dtypes.to_dict(),
         "missing_values": df.isnull().sum().to_dict(),
         "memory_usage": df.memory_usage(deep=True).sum()
     }
+    if compare_optimized:
+        optimized = optimize_dtypes(df)
+        stats["optimized_dtypes"] = optimized.dtypes.to_dict()
+        stats["memory_usage_optimized"] = optimized.memory_usage(deep=True).sum()
+        stats["memory_saved"] = stats["memory_usage"] - stats["memory_usage_optimized"]
+    return stats
+
+
+def _is_text_like(series: pd.Series) -> bool:
+    """Object or string columns (pandas 2 object, pandas 3 str)."""
+    import pandas as pd
+
+    return (
+        pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)
+    ) and not isinstance(series.dtype, pd.CategoricalDtype)
+
+
+def _smallest_int(series: pd.Series) -> Optional[pd.Series]:
+    """Cast integral numbers to the smallest nullable int, or None if not integral."""
+    import numpy as np
+
+    values = series.dropna()
+    if values.empty or not np.array_equal(values, np.round(values)):
+        return None
+    lo, hi = values.min(), values.max()
+    for name, np_type in _NULLABLE_INTS:
+        info = np.iinfo(np_type)
+        if info.min <= lo and hi <= info.max:
+            return series.astype(name)
+    return None
+
+
+def _smallest_float(series: pd.Series, float_tolerance: float) -> pd.Series:
+    """Cast to float32 when no value moves by more than float_tolerance."""
+    import numpy as np
+
+    values = series.astype("float64")
+    as_32 = values.astype("float32")
+    error = (as_32.astype("float64") - values).abs()
+    # NaN errors (missing values) compare False and are ignored; inf-inf too
+    same_inf = np.isinf(as_32).sum() == np.isinf(values).sum()
+    if not (error > float_tolerance).any() and same_inf:
+        return as_32
+    return values
+
+
+def _as_datetimes(values: pd.Series) -> Optional[pd.Series]:
+    """
+    Parse non-null values that are all dates/datetimes or ISO date strings.
+
+    Returns None when any value is not date-like.
+    """
+    import pandas as pd
+
+    kind = pd.api.types.infer_dtype(values, skipna=True)
+    if kind in ("datetime", "datetime64", "date"):
+        return pd.to_datetime(values)
+    if kind not in ("string", "mixed"):
+        return None
+    parsed = pd.to_datetime(values.astype(str), format="ISO8601", errors="coerce")
+    return parsed if parsed.notna().all() else None
+
+
+def optimize_dtypes(
+    df: pd.DataFrame,
+    max_category_ratio: float = 0.5,
+    float_tolerance: float = 1e-4,
+) -> pd.DataFrame:
+    """
+    Infer compact dtypes for a frame, keeping missing values missing.
+
+    - object columns of dates/datetimes or ISO date strings become datetime64
+    - numeric-like columns (including numbers stored as text) become the
+      smallest nullable int, or float32 when that changes no value by more
+      than float_tolerance, else float64
+    - text columns with few distinct values become categoricals (written to
+      Parquet as dictionary-encoded columns); other mixed text is cast to str
+      with missing values left as NaN (never the text "nan")
+
+    Args:
+        df: DataFrame to optimize
+        max_category_ratio: Largest distinct/non-null ratio for a categorical
+        float_tolerance: Largest absolute change allowed when downcasting
+            floats to float32; 0 only downcasts exactly representable columns
+
+    Returns:
+        A new DataFrame with optimized dtypes
+    """
+    import pandas as pd
+
+    optimized = {}
+    for col in df.columns:
+        series = df[col]
+        non_null = series.dropna()
+
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            categories = series.cat.remove_unused_categories()
+            try:
+                categories = categories.cat.reorder_categories(
+                    sorted(categories.cat.categories)
+                )
+            except TypeError:
+                pass
+            optimized[col] = categories
+            continue
+
+        types = pd.api.types
+        if types.is_bool_dtype(series) or types.is_datetime64_any_dtype(series):
+            optimized[col] = series
+            continue
+
+        if non_null.empty:
+            optimized[col] = series
+            continue
+
+        if _is_text_like(series):
+            numeric = pd.to_numeric(non_null, errors="coerce")
+            dates = None if numeric.notna().all() else _as_datetimes(non_null)
+            if dates is not None:
+                optimized[col] = dates.reindex(series.index)
+                continue
+            if numeric.notna().all() and not pd.api.types.is_bool_dtype(numeric):
+                series = pd.to_numeric(series, errors="coerce")
+            else:
+                # Keep NaN as missing instead of the text "nan"
+                text = series.astype(object).where(series.isna(), series.astype(str))
+                if non_null.nunique() <= max_category_ratio * len(non_null):
+                    categorical = text.astype("category")
+                    categorical = categorical.cat.reorder_categories(
+                        sorted(categorical.cat.categories)
+                    )
+                    # Tiny frames can be smaller without the categorical overhead
+                    text_bytes = text.memory_usage(deep=True)
+                    if categorical.memory_usage(deep=True) < text_bytes:
+                        text = categorical
+                optimized[col] = text
+                continue
+
+        if pd.api.types.is_numeric_dtype(series):
+            as_int = _smallest_int(series)
+            if as_int is None:
+                as_int = _smallest_float(series, float_tolerance)
+            optimized[col] = as_int
+            continue
+
+        optimized[col] = series
+
+    return pd.DataFrame(optimized, index=df.index)
 
 
 def set_random_seed(seed: int = 42) -> None:
@@ -59,5 +230,7 @@ def set_random_seed(seed: int = 42) -> None:
     Args:
         seed: Random seed value
     """
+    import numpy as np
+
     random.seed(seed)
     np.random.seed(seed)
@@ -0,0 +1,130 @@
+"""
+Tests for the logger + year -> animal record lookup
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from disco_baa_01.animals import (
+    AnimalIndex,
+    logger_numbers,
+    record_years,
+    trait_columns,
+)
+
+
+@pytest.fixture
+def masterfile():
+    """Four animals; logger 7 is shared by two animals in 2024"""
+    return pd.DataFrame(
+        {
+            "EID": ["940 1", "940 2", "940 3", "940 4"],
+            "Temp logger # 2023": pd.array([142, 13, None, 15], dtype="Int64"),
+            "Temp logger # 2024": pd.array([13, 142, 7, 7], dtype="Int64"),
+            "Preg scan 2023": ["P", "E", None, "P"],
+            "WT at preg scanning 2023": [61.5, 70.0, 58.0, 64.0],
+            "CS_lambing_2024": [3.0, 2.5, 3.0, 2.0],
+            "Farm": ["A", "A", "A", "A"],
+        }
+    )
+
+
+def test_trait_columns_and_id_parsing():
+    assert trait_columns(
+        ["EID", "Preg scan 2023", "WT_lambing_2023", "CS at end of joining 2022", "WTX"]
+    ) == [
+        "Preg scan 2023",
+        "WT_lambing_2023",
+        "CS at end of joining 2022",
+    ]
+    assert logger_numbers(["M0142", "N1222", "M0142", None, "X"]).tolist() == [
+        142,
+        1222,
+        142,
+        -1,
+        -1,
+    ]
+    assert record_years(["2023-05-01", "2024-01-02", None]).tolist() == [2023, 2024, -1]
+
+
+def test_join_uses_the_season_of_each_row(masterfile):
+    """The same logger maps to different animals in different years"""
+    index = AnimalIndex.from_frame(masterfile)
+    rows = pd.DataFrame(
+        {
+            "sheep_id": ["M0142", "M0142", "M0013", "M0007", "M0099"],
+            "record_date": [
+                "2023-06-01",
+                "2024-06-01",
+                "2023-06-01",
+                "2024-06-01",
+                "2023-06-01",
+            ],
+            "A": [0.1, 0.2, 0.3, 0.4, 0.5],
+        }
+    )
+
+    joined = index.join(rows)
+
+    assert joined["EID"].tolist()[:3] == ["940 1", "940 2", "940 2"]
+    assert joined["EID"].iloc[3:].isna().all()  # ambiguous logger 7, unknown logger 99
+    assert joined["WT at preg scanning 2023"].tolist()[:3] == [61.5, 70.0, 70.0]
+    assert "Farm" not in joined.columns
+    assert joined["A"].tolist() == rows["A"].tolist()
+    assert len(index.ambiguous) == 2
+
+
+def test_join_matches_pandas_merge_on_many_rows(masterfile):
+    """Vectorized join agrees with an explicit merge on a large frame"""
+    index = AnimalIndex.from_frame(masterfile)
+    rng = np.random.default_rng(0)
+    rows = pd.DataFrame(
+        {
+            "logger_code": rng.choice(["M0142", "M0013", "N0015", "M0007"], 10_000),
+            "DT": pd.Timestamp("2023-01-01")
+            + pd.to_timedelta(rng.integers(0, 700, 10_000), unit="D"),
+        }
+    )
+
+    joined = index.join(
+        rows, sheep_column="logger_code", date_column="DT", columns=["EID"]
+    )
+
+    keys = pd.DataFrame(
+        {"year": rows["DT"].dt.year, "logger": logger_numbers(rows["logger_code"])}
+    )
+    expected = keys.merge(
+        index.records[["year", "logger", "EID"]], on=["year", "logger"], how="left"
+    )
+    assert joined["EID"].fillna("-").tolist() == expected["EID"].fillna("-").tolist()
+
+
+def test_persisted_index_is_rebuilt_when_masterfile_changes(masterfile, tmp_path):
+    pytest.importorskip("pyarrow")
+    source = tmp_path / "masterfile.parquet"
+    masterfile.to_parquet(source, index=False)
+    index_path = tmp_path / "index" / "animals.parquet"
+
+    built = AnimalIndex.load_or_build(source, index_path)
+    loaded = AnimalIndex.load_or_build(source, index_path)
+    assert loaded.records.equals(built.records)
+    assert list(loaded.records.columns) == [
+        "year",
+        "logger",
+        "EID",
+        "Preg scan 2023",
+        "WT at preg scanning 2023",
+        "CS_lambing_2024",
+    ]
+
+    masterfile.loc[0, "Temp logger # 2023"] = 500
+    masterfile.to_parquet(source, index=False)
+    rebuilt = AnimalIndex.load_or_build(source, index_path)
+    assert rebuilt.lookup([2023], [500]).tolist() == [
+        rebuilt.records.index[rebuilt.records["logger"] == 500][0]
+    ]
@@ -0,0 +1,63 @@
+"""
+Tests for the synthetic data generator and the benchmark harness
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import json
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+
+from disco_baa_01.drinking import detect_drinking_events
+from disco_baa_01.synthetic import synthetic_sheep_frame, write_synthetic_sheep_csvs
+from run_benchmarks import CASES, compare_results, main
+
+
+def test_synthetic_frame_is_reproducible_and_has_drinks():
+    """Same seed gives the same series; drink drops are detectable"""
+    first = synthetic_sheep_frame("S0001", n_days=3, seed=7)
+    second = synthetic_sheep_frame("S0001", n_days=3, seed=7)
+
+    pd.testing.assert_frame_equal(first, second)
+    assert len(first) == 3 * 288
+    assert (first["DT"].diff().dropna() == pd.Timedelta("5min")).all()
+    events = detect_drinking_events(
+        first["S0001"].to_numpy(), first["DT"].to_numpy(), -0.5
+    )
+    assert len(events["DT"]) > 0
+
+
+def test_write_synthetic_sheep_csvs(tmp_path):
+    files = write_synthetic_sheep_csvs(tmp_path, n_sheep=3, n_days=1)
+
+    assert [sheep_id for sheep_id, _ in files] == ["S0001", "S0002", "S0003"]
+    assert pd.read_csv(files[1][1]).columns.tolist() == ["DT", "S0002"]
+
+
+def test_benchmark_run_writes_json(tmp_path):
+    """A tiny run of every case writes one result per case"""
+    output = tmp_path / "results.json"
+
+    assert (
+        main(["--sheep", "1", "--days", "2", "--repeat", "1", "--output", str(output)])
+        == 0
+    )
+
+    with open(output) as f:
+        report = json.load(f)
+    assert {r["name"] for r in report["results"]} == set(CASES)
+    assert all(r["median_s"] >= 0 for r in report["results"])
+    assert "numpy" in report["environment"]
+
+
+def test_compare_results_flags_slowdown():
+    baseline = {"results": [{"name": "a", "n_sheep": 1, "n_days": 2, "median_s": 1.0}]}
+    current = {"results": [{"name": "a", "n_sheep": 1, "n_days": 2, "median_s": 1.5}]}
+
+    comparison = compare_results(current, baseline)
+
+    assert comparison["ratio"].tolist() == [1.5]
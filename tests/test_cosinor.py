@@ -0,0 +1,234 @@
+"""
+Tests for the closed-form cosinor engine
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from disco_baa_01.cosinor import (
+    cosinor_curve,
+    fit_cosinor,
+    fit_cosinor_matrix,
+    fit_cosinor_periods,
+    fit_multicosinor,
+    multicosinor_curve,
+    multicosinor_sums,
+    rolling_multicosinor,
+    segment_ids_from_offsets,
+    solve_multicosinor_sums,
+)
+
+
+def _synthetic_day(rng, n=288, M=39.2, A=0.4, phi=1.1):
+    time_hours = np.arange(n) * 24 / n
+    values = cosinor_curve(time_hours, M, A, phi) + rng.normal(0, 0.05, n)
+    return time_hours, values
+
+
+@pytest.fixture
+def stacked_days():
+    """Three ragged sheep-days concatenated into one series"""
+    rng = np.random.default_rng(0)
+    days = [
+        _synthetic_day(rng, 288, 39.1, 0.35, 0.5),
+        _synthetic_day(rng, 281, 39.4, 0.60, -2.0),
+        _synthetic_day(rng, 300, 38.9, 0.20, 2.8),
+    ]
+    time_hours = np.concatenate([t for t, _ in days])
+    values = np.concatenate([v for _, v in days])
+    offsets = np.cumsum([0] + [len(t) for t, _ in days])
+    return time_hours, values, offsets
+
+
+def test_fit_matches_curve_fit(stacked_days):
+    """Closed-form fit agrees with scipy curve_fit on every segment"""
+    curve_fit = pytest.importorskip("scipy.optimize").curve_fit
+    time_hours, values, offsets = stacked_days
+
+    fits = fit_cosinor(values, time_hours, offsets)
+
+    assert len(fits) == 3
+    for i in range(3):
+        t = time_hours[offsets[i] : offsets[i + 1]]
+        y = values[offsets[i] : offsets[i + 1]]
+        params, _ = curve_fit(
+            lambda t, M, A, phi: cosinor_curve(t, M, A, phi),
+            t,
+            y,
+            p0=[y.mean(), (y.max() - y.min()) / 2, 0],
+        )
+        np.testing.assert_allclose(fits.loc[i, "M"], params[0], atol=1e-6)
+        np.testing.assert_allclose(fits.loc[i, "A"], abs(params[1]), atol=1e-6)
+        # Same curve, regardless of how curve_fit wrapped the phase
+        np.testing.assert_allclose(
+            cosinor_curve(t, *fits.loc[i, ["M", "A", "phi"]]),
+            cosinor_curve(t, *params),
+            atol=1e-6,
+        )
+        residuals = y - cosinor_curve(t, *params)
+        r_squared = 1 - np.sum(residuals**2) / np.sum((y - y.mean()) ** 2)
+        np.testing.assert_allclose(fits.loc[i, "r_squared"], r_squared, atol=1e-8)
+
+
+def test_matrix_with_nan_padding_matches_offsets(stacked_days):
+    """A NaN-padded day matrix gives the same fits as segment offsets"""
+    time_hours, values, offsets = stacked_days
+    lengths = np.diff(offsets)
+    width = lengths.max()
+    value_matrix = np.full((3, width), np.nan)
+    time_matrix = np.full((3, width), np.nan)
+    for i, length in enumerate(lengths):
+        value_matrix[i, :length] = values[offsets[i] : offsets[i + 1]]
+        time_matrix[i, :length] = time_hours[offsets[i] : offsets[i + 1]]
+
+    pd.testing.assert_frame_equal(
+        fit_cosinor_matrix(value_matrix, time_matrix),
+        fit_cosinor(values, time_hours, offsets),
+    )
+
+
+def test_degenerate_segments_are_nan():
+    """Empty and too-short segments produce NaN instead of raising"""
+    time_hours = np.array([1.0, 2.0, 3.0, 4.0, 5.0, 6.0])
+    values = np.array([38.0, 38.5, 39.0, 39.5, 39.0, 38.5])
+
+    fits = fit_cosinor(values, time_hours, offsets=[0, 2, 2, 6])
+
+    assert fits["n"].tolist() == [2, 0, 4]
+    assert fits.loc[[0, 1], ["M", "A", "phi", "r_squared"]].isna().all().all()
+    assert fits.loc[2, ["M", "A", "phi"]].notna().all()
+
+
+def test_segment_ids_from_offsets():
+    """Offsets expand to one id per observation"""
+    np.testing.assert_array_equal(
+        segment_ids_from_offsets([0, 2, 2, 5]), [0, 0, 2, 2, 2]
+    )
+
+    with pytest.raises(ValueError):
+        segment_ids_from_offsets([0, 3, 1])
+
+
+def test_multicosinor_recovers_harmonics():
+    """24 h + 12 h + 8 h components are recovered and match a dense lstsq fit"""
+    rng = np.random.default_rng(1)
+    time_hours = np.arange(288 * 2) * 24 / 288
+    periods = (24.0, 12.0, 8.0)
+    values = multicosinor_curve(
+        time_hours, 39.0, [0.4, 0.15, 0.05], [1.0, -0.5, 2.0], periods
+    )
+    values = values + rng.normal(0, 0.02, time_hours.size)
+
+    fit = fit_multicosinor(values, time_hours, periods=periods).iloc[0]
+
+    design = np.column_stack(
+        [np.ones_like(time_hours)]
+        + [f(2 * np.pi * time_hours / T) for T in periods for f in (np.cos, np.sin)]
+    )
+    coef = np.linalg.lstsq(design, values, rcond=None)[0]
+    assert fit["M"] == pytest.approx(coef[0], abs=1e-10)
+    for k, T in enumerate(periods):
+        assert fit[f"A_{T:g}"] == pytest.approx(
+            np.hypot(coef[1 + 2 * k], coef[2 + 2 * k]), abs=1e-10
+        )
+        assert fit[f"phi_{T:g}"] == pytest.approx(
+            np.arctan2(-coef[2 + 2 * k], coef[1 + 2 * k]), abs=1e-8
+        )
+    assert fit["A_12"] == pytest.approx(0.15, abs=0.01)
+
+
+def test_multicosinor_single_period_matches_fast_path(stacked_days):
+    time_hours, values, offsets = stacked_days
+
+    general = solve_multicosinor_sums(
+        multicosinor_sums(
+            values, time_hours, segment_ids_from_offsets(offsets), periods=(24.0,)
+        )
+    )
+    fast = fit_multicosinor(values, time_hours, offsets, periods=(24.0,))
+
+    pd.testing.assert_frame_equal(general, fast, rtol=1e-9)
+
+
+def test_rolling_windows_match_direct_fits(stacked_days):
+    """Windows built from running sums equal fitting each window's readings"""
+    time_hours, values, offsets = stacked_days
+
+    rolling = rolling_multicosinor(
+        values, time_hours, offsets, window=2, periods=(24.0, 12.0)
+    )
+
+    assert rolling["first_segment"].tolist() == [0, 1]
+    for row in rolling.to_dict("records"):
+        start, stop = offsets[row["first_segment"]], offsets[row["last_segment"] + 1]
+        direct = fit_multicosinor(
+            values[start:stop], time_hours[start:stop], periods=(24.0, 12.0)
+        ).iloc[0]
+        for col in ["n", "M", "A_24", "phi_24", "A_12", "phi_12", "r_squared"]:
+            assert row[col] == pytest.approx(direct[col], rel=1e-8, abs=1e-10)
+
+
+def test_fit_cosinor_periods_is_long_format(stacked_days):
+    time_hours, values, offsets = stacked_days
+
+    scan = fit_cosinor_periods(values, time_hours, offsets, periods=[24, 12, 8])
+
+    assert len(scan) == 9
+    assert (
+        scan.groupby("segment")["period"].apply(list).tolist()
+        == [[24.0, 12.0, 8.0]] * 3
+    )
+    best = scan.loc[scan.groupby("segment")["r_squared"].idxmax(), "period"]
+    assert (best == 24.0).all()
+
+
+def test_inference_matches_curve_fit_covariance(stacked_days):
+    """Standard errors agree with the covariance curve_fit estimates"""
+    curve_fit = pytest.importorskip("scipy.optimize").curve_fit
+    time_hours, values, offsets = stacked_days
+
+    fits = fit_cosinor(values, time_hours, offsets, inference=True)
+
+    for i in range(3):
+        t = time_hours[offsets[i] : offsets[i + 1]]
+        y = values[offsets[i] : offsets[i + 1]]
+        p0 = fits.loc[i, ["M", "A", "phi"]].to_numpy(dtype=float)
+        _, covariance = curve_fit(
+            lambda t, M, A, phi: cosinor_curve(t, M, A, phi), t, y, p0=p0
+        )
+        np.testing.assert_allclose(
+            fits.loc[i, ["se_M", "se_A", "se_phi"]].to_numpy(dtype=float),
+            np.sqrt(np.diag(covariance)),
+            rtol=1e-5,
+        )
+    assert (fits["A_lower"] < fits["A"]).all() and (fits["A"] < fits["A_upper"]).all()
+    assert (fits["p_value"] < 1e-10).all()
+
+
+def test_f_test_of_pure_noise_is_not_significant():
+    """Without a rhythm the zero-amplitude test keeps its nominal level"""
+    rng = np.random.default_rng(3)
+    n_days = 400
+    time_hours = np.tile(np.arange(288) * 24 / 288, n_days)
+    values = 39 + rng.normal(0, 0.1, time_hours.size)
+    offsets = np.arange(0, time_hours.size + 1, 288)
+
+    fits = fit_cosinor(values, time_hours, offsets, inference=True)
+
+    assert 0.02 < (fits["p_value"] < 0.05).mean() < 0.09
+    single = fit_multicosinor(
+        values, time_hours, offsets, periods=(24.0,), inference=True
+    )
+    general = solve_multicosinor_sums(
+        multicosinor_sums(
+            values, time_hours, np.repeat(np.arange(n_days), 288), n_days
+        ),
+        inference=True,
+    )
+    np.testing.assert_allclose(single["p_value"], general["p_value"], rtol=1e-6)
+    np.testing.assert_allclose(single["se_phi_24"], general["se_phi_24"], rtol=1e-6)
@@ -0,0 +1,93 @@
+"""
+Tests for the vectorized drinking-event detector
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from disco_baa_01.drinking import (
+    detect_drinking_events,
+    drink_detection_vectorized,
+    interpolate_segments,
+    remove_outliers_interpolate_drink_vectorized,
+)
+from disco_baa_01.extraction import drink_detection, remove_outliers_interpolate_drink
+
+
+def _day(seed, n=288, drops=12):
+    """One day of readings with many (sometimes overlapping) drink drops"""
+    rng = np.random.default_rng(seed)
+    dt = pd.date_range("2024-02-01", periods=n, freq="5min")
+    temp = 39 + 0.4 * np.cos(2 * np.pi * np.arange(n) / n) + rng.normal(0, 0.1, n)
+    for start in rng.integers(0, n - 6, drops):
+        temp[start : start + 5] -= rng.uniform(0.5, 3.0) * np.array(
+            [0.6, 1.0, 0.8, 0.5, 0.2]
+        )
+    data = pd.DataFrame({"DT": dt, "A0001": temp})
+    return data.set_index(data["DT"].rename("Datetime"))
+
+
+@pytest.mark.parametrize("seed", range(8))
+@pytest.mark.parametrize("temp_thresh", [-0.5, -1.0])
+def test_drink_detection_matches_pandas(seed, temp_thresh):
+    """Same events and fields as the per-event pandas loop"""
+    data = _day(seed)
+
+    expected = drink_detection(data, "A0001", temp_thresh=temp_thresh).reset_index(
+        drop=True
+    )
+    result = drink_detection_vectorized(data, "A0001", temp_thresh=temp_thresh)
+
+    assert not expected.empty
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_remove_outliers_matches_pandas(seed):
+    """Same dips blanked and interpolated as the sequential pandas loop"""
+    data = _day(seed, drops=25)
+
+    expected = remove_outliers_interpolate_drink(data.copy(), "A0001", 35, -0.5)
+    result = remove_outliers_interpolate_drink_vectorized(data, "A0001", 35, -0.5)
+
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_segments_match_per_day_detection():
+    """Detecting over stacked days with offsets equals detecting day by day"""
+    days = [_day(seed) for seed in range(3)]
+    values = np.concatenate([d["A0001"].to_numpy() for d in days])
+    timestamps = np.concatenate([d["DT"].to_numpy() for d in days])
+    offsets = np.cumsum([0] + [len(d) for d in days])
+
+    stacked = detect_drinking_events(values, timestamps, -0.5, offsets=offsets)
+
+    per_day = [
+        detect_drinking_events(d["A0001"].to_numpy(), d["DT"].to_numpy(), -0.5)
+        for d in days
+    ]
+    for col in ["DT", "drink_temp", "before_drink_temp", "recover_time", "drop_time"]:
+        np.testing.assert_array_equal(
+            stacked[col], np.concatenate([e[col] for e in per_day])
+        )
+
+
+def test_interpolate_segments_matches_pandas():
+    """Leading NaNs stay, trailing NaNs forward fill, segments stay separate"""
+    values = np.array([np.nan, 1.0, np.nan, 3.0, np.nan, np.nan, 5.0, np.nan, 7.0])
+    offsets = [0, 5, 9]
+
+    result = interpolate_segments(values, offsets)
+
+    expected = np.concatenate(
+        [
+            pd.Series(values[:5]).interpolate(method="linear").to_numpy(),
+            pd.Series(values[5:]).interpolate(method="linear").to_numpy(),
+        ]
+    )
+    np.testing.assert_array_equal(result, expected)
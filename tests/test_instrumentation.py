@@ -0,0 +1,129 @@
+"""
+Tests for logging, stage timers and run reports
+"""
+
+import json
+import logging
+import pytest
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from disco_baa_01.extraction import process_single_sheep_cosinor
+from disco_baa_01.instrumentation import (
+    RunStats,
+    collecting,
+    configure_logging,
+    count,
+    stage,
+)
+from disco_baa_01.parallel import run_parallel
+from disco_baa_01.synthetic import synthetic_sheep_frame, write_synthetic_sheep_csvs
+
+
+def test_stats_merge_and_snapshot():
+    """Counters add up and stages are reported in pipeline order"""
+    first, second = RunStats(), RunStats()
+    first.count("days_fitted", 3)
+    first.add_stage("fit", 0.5)
+    second.count("days_fitted", 2)
+    second.add_stage("load", 1.0)
+    second.add_stage("fit", 0.25, calls=2)
+
+    snapshot = first.merge(second.to_dict()).to_dict()
+
+    assert snapshot["counters"] == {"days_fitted": 5}
+    assert list(snapshot["stages"]) == ["load", "fit"]
+    assert snapshot["stages"]["fit"] == {"seconds": 0.75, "calls": 3}
+
+
+def test_stage_and_count_are_noops_without_collector():
+    """Instrumented code runs unchanged when nothing is collecting"""
+    with stage("fit"):
+        count("days_fitted")
+    with collecting() as stats:
+        with stage("fit"):
+            count("days_fitted")
+    assert stats.counters == {"days_fitted": 1}
+    assert stats.stage_calls == {"fit": 1}
+
+
+def test_collectors_are_per_thread():
+    """Stages running in other threads do not count into this thread's collector"""
+
+    def work():
+        count("drink_events", 5)
+        with collecting() as own:
+            count("drink_events")
+        return own.counters
+
+    with collecting() as stats:
+        count("days_fitted")
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            assert executor.submit(work).result() == {"drink_events": 1}
+    assert stats.counters == {"days_fitted": 1}
+
+
+def test_processor_is_quiet_and_counts_short_days(tmp_path, capsys):
+    """Per-day output goes to DEBUG logging only; short days are counted"""
+    sheep = synthetic_sheep_frame("S0001", n_days=3, seed=0)
+    sheep = sheep.drop(index=range(300, 320))
+    path = tmp_path / "S0001.csv"
+    sheep.to_csv(path, index=False)
+
+    with collecting() as stats:
+        cosinor_df = process_single_sheep_cosinor(path, "S0001", output_dir=tmp_path)
+
+    assert capsys.readouterr().out == ""
+    assert len(cosinor_df) == 2
+    assert stats.counters["days_skipped_short"] == 1
+    assert stats.counters["days_fitted"] == 2
+    assert stats.counters["sheep_processed"] == 1
+    assert {"load", "segment", "clean", "fit", "write"} <= set(stats.stage_seconds)
+
+
+def test_debug_logging_reports_each_day(tmp_path, caplog):
+    """At DEBUG level every fitted day is logged"""
+    sources = write_synthetic_sheep_csvs(tmp_path, n_sheep=1, n_days=2, seed=0)
+    sheep_id, path = sources[0]
+    with caplog.at_level(logging.DEBUG, logger="disco_baa_01"):
+        process_single_sheep_cosinor(path, sheep_id)
+    assert sum("| Date:" in record.getMessage() for record in caplog.records) == 2
+
+
+def test_run_report_merges_workers(tmp_path):
+    """The run report totals counters and stage times over all workers"""
+    sources = write_synthetic_sheep_csvs(
+        tmp_path / "split", n_sheep=3, n_days=2, seed=0
+    )
+    sources.append(("S0009", str(tmp_path / "missing.csv")))
+    report_path = tmp_path / "report" / "run.json"
+
+    summary = run_parallel(sources, workers=2, report_path=report_path)
+
+    report = json.loads(report_path.read_text())
+    assert report == json.loads(json.dumps(summary.attrs["run_report"], default=str))
+    assert report["n_sheep"] == 4
+    assert report["counters"]["sheep_processed"] == 3
+    assert report["counters"]["sheep_failed"] == 1
+    assert report["counters"]["days_fitted"] == 6
+    assert report["stages"]["load"]["calls"] == 4
+    assert report["elapsed_s"] > 0
+
+
+def test_configure_logging_replaces_its_handler(tmp_path):
+    """Calling configure_logging twice keeps a single package handler"""
+    logger = configure_logging("DEBUG", log_file=tmp_path / "run.log")
+    configure_logging("INFO", log_file=tmp_path / "run.log")
+    try:
+        assert sum(getattr(h, "_disco_baa_01", False) for h in logger.handlers) == 1
+        assert logger.level == logging.INFO
+    finally:
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+            handler.close()
+        logger.setLevel(logging.NOTSET)
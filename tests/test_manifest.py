@@ -0,0 +1,79 @@
+"""
+Tests for the content-hashed pipeline manifest
+"""
+
+import pytest
+import hashlib
+import os
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from disco_baa_01.manifest import Manifest, file_sha256
+
+
+@pytest.fixture
+def step_files(tmp_path):
+    source = tmp_path / "masterfile.xlsx"
+    source.write_bytes(b"original workbook")
+    output = tmp_path / "out.parquet"
+    output.write_bytes(b"artifact")
+    return source, output
+
+
+def test_file_sha256(step_files):
+    """Chunked hash equals hashing the whole file at once"""
+    source, _ = step_files
+    assert file_sha256(source) == hashlib.sha256(b"original workbook").hexdigest()
+
+
+def test_step_is_current_until_something_changes(step_files, tmp_path):
+    """Recorded steps are current until input, params or outputs change"""
+    source, output = step_files
+    manifest_path = tmp_path / "manifest.json"
+    inputs = {"masterfile": source}
+    params = {"sheet_name": "RF Ewe.ram data", "cleaning_rules_version": 1}
+
+    manifest = Manifest(manifest_path)
+    assert not manifest.is_current("ingest", inputs, params, [output])
+    manifest.record("ingest", inputs, params, [output])
+
+    # A fresh manifest object reads the saved state
+    manifest = Manifest(manifest_path)
+    assert manifest.is_current("ingest", inputs, params, [output])
+    assert not manifest.is_current(
+        "ingest", inputs, {**params, "cleaning_rules_version": 2}, [output]
+    )
+
+    output.unlink()
+    assert not manifest.is_current("ingest", inputs, params, [output])
+    output.write_bytes(b"artifact")
+
+    source.write_bytes(b"edited workbook")
+    assert not manifest.is_current("ingest", inputs, params, [output])
+
+
+def test_touch_without_content_change_stays_current(step_files, tmp_path):
+    """A new mtime forces a re-hash but the unchanged content still matches"""
+    source, output = step_files
+    manifest = Manifest(tmp_path / "manifest.json")
+    manifest.record("ingest", {"masterfile": source}, {}, [output])
+
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    assert manifest.is_current("ingest", {"masterfile": source}, {}, [output])
+
+
+def test_invalidate(step_files, tmp_path):
+    """An invalidated step runs again"""
+    source, output = step_files
+    manifest = Manifest(tmp_path / "manifest.json")
+    manifest.record("filter", {"masterfile": source}, {}, [output])
+
+    manifest.invalidate("filter")
+
+    assert not Manifest(tmp_path / "manifest.json").is_current(
+        "filter", {"masterfile": source}, {}, [output]
+    )
@@ -0,0 +1,209 @@
+"""
+Tests for the single-pass masterfile pipeline
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+pytest.importorskip("openpyxl")
+pytest.importorskip("pyarrow")
+
+from disco_baa_01.masterfile import (
+    SHEET_NAME,
+    clean_temp_logger_ids,
+    filter_parquet,
+    load_masterfile,
+    read_parquet_projected,
+    resolve_column_groups,
+    run_masterfile_pipeline,
+)
+
+
+@pytest.fixture
+def masterfile_xlsx(tmp_path):
+    """A tiny masterfile sheet: a male, a 0.7 logger artifact and a dropped column"""
+    df = pd.DataFrame(
+        {
+            "EID": ["940 1", "940 2", "940 3", "940 4"],
+            "sex": ["F", "m", "F", np.nan],
+            "Farm": ["A", "A", "A", "A"],
+            "Temp logger # 2023": [12, 13, 0.7, 15],
+            "Preg scan 2023": ["P", "E", "P", np.nan],
+            "date of preg scanning 2023": pd.to_datetime(
+                ["2023-05-01", None, "2023-05-01", None]
+            ),
+            "WT at preg scanning 2023": [61.5, 70.0, 58.0, 64.0],
+            "Lambs born 2023": [1.0, 2.0, np.nan, 2.0],
+        }
+    )
+    path = tmp_path / "Masterfile.xlsx"
+    df.to_excel(path, sheet_name=SHEET_NAME, index=False)
+    return path
+
+
+def _no_excel(*args, **kwargs):
+    raise AssertionError("the workbook should not be parsed")
+
+
+def test_pipeline_parses_once_and_filters(masterfile_xlsx, tmp_path, monkeypatch):
+    """One read_excel call produces both the ingested and filtered artifacts"""
+    calls = []
+    read_excel = pd.read_excel
+    monkeypatch.setattr(
+        pd, "read_excel", lambda *a, **k: calls.append(a) or read_excel(*a, **k)
+    )
+
+    paths = run_masterfile_pipeline(
+        masterfile_xlsx, tmp_path / "raw", columns_to_drop=["Farm", "sex"]
+    )
+
+    assert len(calls) == 1
+    ingested = pd.read_parquet(paths["ingested_parquet"])
+    filtered = pd.read_parquet(paths["filtered_parquet"])
+    assert ingested["EID"].tolist() == ["940 1", "940 2", "940 4"]
+    assert filtered["EID"].tolist() == ["940 1", "940 4"]
+    assert "Farm" not in filtered.columns and "sex" not in filtered.columns
+    assert paths["filtered_csv"].exists()
+
+
+def test_rerun_skips_and_refilters_from_parquet(masterfile_xlsx, tmp_path, monkeypatch):
+    """Unchanged steps are skipped; a new filter rule reuses the Parquet artifact"""
+    manifest_path = tmp_path / "manifest.json"
+    paths = run_masterfile_pipeline(
+        masterfile_xlsx,
+        tmp_path / "raw",
+        columns_to_drop=["Farm", "sex"],
+        manifest_path=manifest_path,
+    )
+    first = pd.read_parquet(paths["filtered_parquet"])
+    monkeypatch.setattr(pd, "read_excel", _no_excel)
+
+    run_masterfile_pipeline(
+        masterfile_xlsx,
+        tmp_path / "raw",
+        columns_to_drop=["Farm", "sex"],
+        manifest_path=manifest_path,
+    )
+    run_masterfile_pipeline(
+        masterfile_xlsx,
+        tmp_path / "raw",
+        columns_to_drop=["Farm", "sex", "WT at preg scanning 2023"],
+        manifest_path=manifest_path,
+    )
+
+    refiltered = pd.read_parquet(paths["filtered_parquet"])
+    pd.testing.assert_frame_equal(
+        refiltered, first.drop(columns="WT at preg scanning 2023")
+    )
+
+
+def test_filter_parquet_matches_in_memory_filter(masterfile_xlsx, tmp_path):
+    """Filtering from the Parquet artifact gives the same files as the single pass"""
+    paths = run_masterfile_pipeline(
+        masterfile_xlsx, tmp_path / "raw", columns_to_drop=["Farm", "sex"]
+    )
+
+    csv_path, parquet_path = filter_parquet(
+        paths["ingested_parquet"],
+        tmp_path / "from_parquet",
+        columns_to_drop=["Farm", "sex"],
+    )
+
+    pd.testing.assert_frame_equal(
+        pd.read_parquet(parquet_path), pd.read_parquet(paths["filtered_parquet"])
+    )
+    assert csv_path.read_text() == paths["filtered_csv"].read_text()
+
+
+def test_read_parquet_projected(masterfile_xlsx, tmp_path):
+    """Dropped columns are not loaded unless a row filter needs them"""
+    paths = run_masterfile_pipeline(
+        masterfile_xlsx, tmp_path / "raw", columns_to_drop=[]
+    )
+
+    df = read_parquet_projected(
+        paths["ingested_parquet"], ["Farm", "sex", "EID"], extra_columns=["sex"]
+    )
+
+    assert "Farm" not in df.columns and "EID" not in df.columns
+    assert "sex" in df.columns
+
+
+def test_clean_temp_logger_ids_drops_artifact_rows():
+    """0.7 rows are removed and logger ids become nullable ints"""
+    df = pd.DataFrame(
+        {"Temp logger # 2022": [1.0, 0.7, np.nan], "EID": ["a", "b", "c"]}
+    )
+
+    cleaned, dropped = clean_temp_logger_ids(df)
+
+    assert dropped["EID"].tolist() == ["b"]
+    assert str(cleaned["Temp logger # 2022"].dtype) == "Int64"
+
+    with pytest.raises(ValueError):
+        clean_temp_logger_ids(pd.DataFrame({"Temp logger # 2024": [1.5]}))
+
+
+@pytest.fixture
+def masterfile_artifacts(tmp_path):
+    """CSV and Parquet artifacts of a small masterfile with several row groups"""
+    n = 400
+    df = pd.DataFrame(
+        {
+            "EID": [f"940 {i}" for i in range(n)],
+            "Temp logger # 2023": pd.array(np.arange(n), dtype="Int64"),
+            "Preg scan 2023": np.where(np.arange(n) % 3 == 0, "E", "P"),
+            "WT at preg scanning 2023": np.linspace(50, 80, n),
+            "CS_lambing_2023": np.linspace(2, 4, n),
+            "Farm": "A",
+        }
+    )
+    csv_path = tmp_path / "masterfile.csv"
+    df.to_csv(csv_path, index=False)
+    df.to_parquet(tmp_path / "masterfile.parquet", index=False, row_group_size=100)
+    return df, csv_path
+
+
+def test_load_masterfile_projects_groups_and_filters(masterfile_artifacts):
+    """Groups select columns in file order and filters are applied to rows"""
+    df, csv_path = masterfile_artifacts
+    filters = [("Temp logger # 2023", ">=", 250), ("Preg scan 2023", "in", ["E"])]
+
+    loaded = load_masterfile(csv_path, groups=["ids", "weights"], filters=filters)
+
+    assert list(loaded.columns) == ["EID", "WT at preg scanning 2023"]
+    expected = df[(df["Temp logger # 2023"] >= 250) & (df["Preg scan 2023"] == "E")]
+    assert loaded["EID"].tolist() == expected["EID"].tolist()
+
+    # Without the Parquet artifact the CSV is read and filtered the same way
+    csv_path.with_suffix(".parquet").unlink()
+    from_csv = load_masterfile(csv_path, groups=["ids", "weights"], filters=filters)
+    assert from_csv["EID"].tolist() == expected["EID"].tolist()
+
+
+def test_load_masterfile_lazy_scan_and_errors(masterfile_artifacts):
+    df, csv_path = masterfile_artifacts
+    parquet_path = csv_path.with_suffix(".parquet")
+
+    scanner = load_masterfile(
+        parquet_path,
+        columns=["EID"],
+        filters=[("Temp logger # 2023", "<", 10)],
+        lazy="pyarrow",
+    )
+    assert scanner.to_table().column("EID").to_pylist() == df["EID"].head(10).tolist()
+
+    assert resolve_column_groups(df.columns, ["reproductive"]) == [
+        "Preg scan 2023",
+        "WT at preg scanning 2023",
+        "CS_lambing_2023",
+    ]
+    with pytest.raises(KeyError):
+        load_masterfile(parquet_path, groups=["nonsense"])
+    with pytest.raises(KeyError):
+        load_masterfile(parquet_path, columns=["not a column"])
@@ -0,0 +1,98 @@
+"""
+Tests for the process-pool sheep runner
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from disco_baa_01.extraction import process_all_splitted_data
+from disco_baa_01.parallel import run_parallel, process_all_splitted_data_parallel
+
+
+def _write_sheep_csv(path, sheep_id, days=2, seed=0):
+    """Write a 5-minute rumen temperature series with a few drink drops"""
+    rng = np.random.default_rng(seed)
+    dt = pd.date_range("2024-01-01", periods=288 * days, freq="5min")
+    hours = (dt.hour + dt.minute / 60).to_numpy()
+    temp = 39 + 0.4 * np.cos(2 * np.pi * hours / 24 + 1) + rng.normal(0, 0.05, len(dt))
+    for start in range(100, len(dt) - 20, 288):
+        temp[start : start + 4] -= [1.5, 2.5, 2.0, 1.0]
+    pd.DataFrame({"DT": dt, sheep_id: temp}).to_csv(
+        path / f"{sheep_id}.csv", index=False
+    )
+
+
+@pytest.fixture
+def splitted_dir(tmp_path):
+    for i, sheep_id in enumerate(["M0003", "M0001", "M0002"]):
+        _write_sheep_csv(tmp_path, sheep_id, seed=i)
+    return tmp_path
+
+
+def test_results_are_ordered_and_written(splitted_dir, tmp_path_factory):
+    """Both analyses run per sheep and results come back in sheep_id order"""
+    cosinor_dir = tmp_path_factory.mktemp("cosinor")
+    drink_dir = tmp_path_factory.mktemp("drink")
+
+    summary = process_all_splitted_data_parallel(
+        splitted_dir,
+        workers=2,
+        chunksize=1,
+        output_dir=cosinor_dir,
+        output_drink_dir=drink_dir,
+    )
+
+    assert summary["sheep_id"].tolist() == ["M0001", "M0002", "M0003"]
+    assert (summary["status"] == "ok").all()
+    assert (summary["cosinor_days"] == 2).all()
+    assert (summary["drink_events"] > 0).all()
+    assert (cosinor_dir / "M0001_cosinor_features.csv").exists()
+    assert (drink_dir / "M0002_drinking_behavior.csv").exists()
+
+
+def test_failure_does_not_stop_batch(splitted_dir):
+    """A missing file is reported as failed and the other sheep still run"""
+    sheep_files = [
+        ("M0001", splitted_dir / "M0001.csv"),
+        ("M0000", splitted_dir / "does_not_exist.csv"),
+        ("M0002", splitted_dir / "M0002.csv"),
+    ]
+
+    summary = run_parallel(sheep_files, workers=2)
+
+    assert summary["status"].tolist() == ["failed", "ok", "ok"]
+    assert "FileNotFoundError" in summary.loc[0, "error"]
+
+
+def test_single_worker_matches_pool(splitted_dir):
+    """Running in-process gives the same per-sheep counts as the pool"""
+    serial = process_all_splitted_data_parallel(splitted_dir, workers=1)
+    pooled = process_all_splitted_data_parallel(splitted_dir, workers=3)
+
+    pd.testing.assert_frame_equal(
+        serial.drop(columns="elapsed_s"), pooled.drop(columns="elapsed_s")
+    )
+
+
+def test_serial_batch_survives_a_corrupt_csv(splitted_dir, tmp_path_factory):
+    """process_all_splitted_data reports a corrupt sheep and still runs the others"""
+    (splitted_dir / "M0000.csv").write_text("DT,M0000\nnot a date,39.0\n")
+    cosinor_dir = tmp_path_factory.mktemp("cosinor")
+
+    summary = process_all_splitted_data(splitted_dir, output_dir=cosinor_dir)
+
+    assert summary.set_index("sheep_id")["status"].to_dict() == {
+        "M0000": "failed",
+        "M0001": "ok",
+        "M0002": "ok",
+        "M0003": "ok",
+    }
+    assert (
+        "DateParseError" in summary.loc[summary["sheep_id"] == "M0000", "error"].iloc[0]
+    )
+    assert len(list(cosinor_dir.glob("*_cosinor_features.csv"))) == 3
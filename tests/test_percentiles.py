@@ -0,0 +1,61 @@
+"""
+Tests for batched pointed-temperature extraction
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from disco_baa_01.extraction import PERCENT_LIST, extract_pointed_temp_value
+from disco_baa_01.percentiles import (
+    pad_segments,
+    pointed_temp_values,
+    pointed_temp_values_matrix,
+    pointed_temp_values_segments,
+)
+
+FRACTIONS = [p / 100.0 for p in PERCENT_LIST] + [0.0, 0.999, 1.0]
+
+
+def _legacy(values, fractions):
+    series = pd.Series(values).dropna()
+    pairs = [extract_pointed_temp_value(series, p) for p in fractions]
+    return np.array([lo for lo, _ in pairs]), np.array([hi for _, hi in pairs])
+
+
+@pytest.mark.parametrize("n", [0, 1, 7, 280, 288])
+def test_pointed_values_match_legacy(n):
+    """Identical to the two-sort int(p*n) rule, including ties and NaNs"""
+    rng = np.random.default_rng(n)
+    values = np.round(rng.normal(39, 0.5, n), 1)
+    values[rng.random(n) < 0.05] = np.nan
+
+    low, high = pointed_temp_values(values, FRACTIONS)
+    expected_low, expected_high = _legacy(values, FRACTIONS)
+
+    np.testing.assert_array_equal(low, expected_low)
+    np.testing.assert_array_equal(high, expected_high)
+
+
+def test_matrix_rows_match_legacy():
+    """Ragged NaN-padded days give the same values as one call per day"""
+    rng = np.random.default_rng(0)
+    days = [rng.normal(39, 0.4, n) for n in [288, 281, 288, 3, 0, 285]]
+    offsets = np.cumsum([0] + [len(d) for d in days])
+    matrix = pad_segments(np.concatenate(days), offsets)
+
+    low, high = pointed_temp_values_matrix(matrix, FRACTIONS)
+    seg_low, seg_high = pointed_temp_values_segments(
+        np.concatenate(days), offsets, FRACTIONS
+    )
+
+    for i, day in enumerate(days):
+        expected_low, expected_high = _legacy(day, FRACTIONS)
+        np.testing.assert_array_equal(low[i], expected_low)
+        np.testing.assert_array_equal(high[i], expected_high)
+    np.testing.assert_array_equal(seg_low, low)
+    np.testing.assert_array_equal(seg_high, high)
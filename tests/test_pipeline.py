@@ -0,0 +1,188 @@
+"""
+Tests for the stage graph runner and the disco-baa CLI
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import os
+import sys
+import threading
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from disco_baa_01.cli import main
+from disco_baa_01.pipeline import (
+    Stage,
+    extraction_stage,
+    herd_stages,
+    run_stages,
+    stage_dependencies,
+    topological_order,
+)
+from disco_baa_01.sink import SINK_KINDS
+from disco_baa_01.synthetic import write_synthetic_sheep_csvs
+
+
+def _copy_stage(name, source, target, calls, transform=str.upper, **kwargs):
+    def run():
+        calls.append(name)
+        Path(target).write_text(transform(Path(source).read_text()))
+
+    return Stage(name, run, inputs={"source": source}, outputs=[target], **kwargs)
+
+
+def _rewrite(path, text):
+    # The manifest caches hashes by size and mtime; make the edit visible on coarse
+    # clocks
+    mtime_ns = path.stat().st_mtime_ns
+    path.write_text(text)
+    os.utime(path, ns=(mtime_ns + 10**9, mtime_ns + 10**9))
+
+
+def _chain(tmp_path, calls):
+    if not (tmp_path / "a.txt").exists():
+        (tmp_path / "a.txt").write_text("abc")
+    return [
+        _copy_stage("second", tmp_path / "b.txt", tmp_path / "c.txt", calls, str.lower),
+        _copy_stage("first", tmp_path / "a.txt", tmp_path / "b.txt", calls),
+    ]
+
+
+def test_dependencies_follow_inputs_to_outputs(tmp_path):
+    stages = _chain(tmp_path, [])
+    stages.append(
+        Stage("report", lambda: None, inputs={"dir": tmp_path / "out" / "x.csv"})
+    )
+    stages.append(
+        Stage("writer", lambda: None, outputs=[tmp_path / "out"], after=["first"])
+    )
+    graph = stage_dependencies(stages)
+    assert graph == {
+        "second": ["first"],
+        "first": [],
+        "report": ["writer"],
+        "writer": ["first"],
+    }
+    assert topological_order(graph) == ["first", "second", "writer", "report"]
+
+    with pytest.raises(ValueError):
+        topological_order({"a": ["b"], "b": ["a"]})
+    with pytest.raises(ValueError):
+        stage_dependencies([Stage("a", lambda: None, after=["missing"])])
+
+
+def test_only_stale_stages_run(tmp_path):
+    """
+    Unchanged stages are skipped; an upstream re-run with identical output does not
+    propagate
+    """
+    calls = []
+    manifest = tmp_path / "manifest.json"
+    summary = run_stages(_chain(tmp_path, calls), manifest)
+    assert calls == ["first", "second"]
+    assert list(summary["status"]) == ["ran", "ran"]
+    assert (tmp_path / "c.txt").read_text() == "abc"
+
+    calls.clear()
+    assert list(run_stages(_chain(tmp_path, calls), manifest)["status"]) == [
+        "skipped",
+        "skipped",
+    ]
+    assert calls == []
+
+    # Same content for 'second' after 'first' re-runs on a case change
+    _rewrite(tmp_path / "a.txt", "ABC")
+    assert list(run_stages(_chain(tmp_path, calls), manifest)["status"]) == [
+        "ran",
+        "skipped",
+    ]
+
+    _rewrite(tmp_path / "a.txt", "xyz")
+    calls.clear()
+    summary = run_stages(_chain(tmp_path, calls), manifest, dry_run=True)
+    assert list(summary["status"]) == ["stale", "stale"] and calls == []
+
+    summary = run_stages(_chain(tmp_path, calls), manifest, targets=["first"])
+    assert list(summary["stage"]) == ["first"] and calls == ["first"]
+
+
+def test_independent_stages_run_concurrently(tmp_path):
+    """Both stages must be running at once to pass the barrier"""
+    barrier = threading.Barrier(2, timeout=10)
+    stages = [
+        Stage(name, barrier.wait, outputs=[tmp_path / name])
+        for name in ("left", "right")
+    ]
+    summary = run_stages(stages)
+    assert list(summary["status"]) == ["ran", "ran"]
+
+
+def test_failure_blocks_downstream(tmp_path):
+    def fail():
+        raise RuntimeError("boom")
+
+    stages = [
+        Stage("broken", fail, outputs=[tmp_path / "x"]),
+        Stage("after", lambda: None, inputs={"x": tmp_path / "x"}),
+        Stage("other", lambda: None),
+    ]
+    summary = run_stages(stages, tmp_path / "manifest.json").set_index("stage")
+    assert (
+        summary.loc["broken", "status"] == "failed"
+        and "boom" in summary.loc["broken", "error"]
+    )
+    assert summary.loc["after", "status"] == "blocked"
+    assert summary.loc["other", "status"] == "ran"
+
+
+def test_herd_stages_without_masterfile(tmp_path):
+    names = [
+        stage.name for stage in herd_stages(tmp_path, loggers=tmp_path / "loggers.xlsx")
+    ]
+    assert names == ["split", "extract", "plot"]
+    graph = stage_dependencies(herd_stages(tmp_path, masterfile=tmp_path / "m.xlsx"))
+    assert sorted(graph["join"]) == ["extract", "ingest"]
+    assert graph["filter"] == ["ingest"] and graph["extract"] == []
+
+
+def test_cli_cosinor_skips_when_current(tmp_path, capsys):
+    pytest.importorskip("pyarrow")
+    write_synthetic_sheep_csvs(tmp_path / "split", n_sheep=2, n_days=2, seed=0)
+    argv = [
+        "cosinor",
+        str(tmp_path / "split"),
+        "--out",
+        str(tmp_path / "out"),
+        "--workers",
+        "1",
+        "--manifest",
+        str(tmp_path / "manifest.json"),
+    ]
+
+    assert main(argv) == 0
+    features = pd.read_parquet(tmp_path / "out" / "cosinor_features.parquet")
+    assert sorted(features["sheep_id"].unique()) == ["S0001", "S0002"]
+    assert not (tmp_path / "out" / "drinking_behavior.parquet").exists()
+    assert "ran" in capsys.readouterr().out
+
+    assert main(argv) == 0
+    assert "skipped" in capsys.readouterr().out
+
+
+def test_extract_stage_writes_both_sinks(tmp_path):
+    pytest.importorskip("pyarrow")
+    write_synthetic_sheep_csvs(tmp_path / "split", n_sheep=2, n_days=2, seed=0)
+    extract = extraction_stage(
+        SINK_KINDS, tmp_path / "split", tmp_path / "out", workers=1
+    )
+    assert extract.name == "extract" and len(extract.outputs) == 2
+
+    summary = run_stages([extract], tmp_path / "manifest.json")
+    assert list(summary["status"]) == ["ran"]
+    for kind in SINK_KINDS:
+        assert (
+            pd.read_parquet(tmp_path / "out" / f"{kind}.parquet")["sheep_id"].nunique()
+            == 2
+        )
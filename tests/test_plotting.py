@@ -0,0 +1,121 @@
+"""
+Tests for batch cosinor curve plotting
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import re
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+pytest.importorskip("matplotlib")
+
+from disco_baa_01.cosinor import cosinor_curve
+from disco_baa_01.plotting import (
+    curve_matrix,
+    curve_segments,
+    draw_cosinor_panel,
+    page_path,
+    plot_herd_cosinor,
+    render_page,
+    sheep_panels,
+)
+
+
+def _herd_features(n_sheep=7, n_days=5, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for s in range(n_sheep):
+        for d in range(n_days):
+            rows.append(
+                {
+                    "sheep_id": f"S{s:04d}",
+                    "record_date": f"2024-01-{d + 1:02d}",
+                    "M": 39.0 + rng.normal(0, 0.1),
+                    "A": 0.3 + rng.normal(0, 0.05),
+                    "phi": rng.uniform(-np.pi, np.pi),
+                }
+            )
+    # Shuffled, as rows come out of a sink in worker completion order
+    return pd.DataFrame(rows).sample(frac=1.0, random_state=seed).reset_index(drop=True)
+
+
+def test_curve_matrix_matches_per_row_curves():
+    """The broadcast evaluation equals one cosinor_curve call per day"""
+    M, A, phi = np.array([39.0, 38.5]), np.array([0.4, 0.2]), np.array([0.5, -2.0])
+    time_hours, curves = curve_matrix(M, A, phi)
+    assert curves.shape == (2, 240)
+    for i in range(2):
+        np.testing.assert_allclose(
+            curves[i], cosinor_curve(time_hours, M[i], A[i], phi[i])
+        )
+
+    segments = curve_segments(time_hours, curves)
+    assert segments.shape == (2, 240, 2)
+    np.testing.assert_array_equal(segments[1, :, 0], time_hours)
+    np.testing.assert_array_equal(segments[1, :, 1], curves[1])
+
+
+def test_panel_is_one_collection_and_skips_failed_fits():
+    """All days of a sheep are drawn as a single LineCollection"""
+    from matplotlib.figure import Figure
+
+    ax = Figure().subplots()
+    parameters = np.array(
+        [[39.0, 0.4, 0.5], [np.nan, np.nan, np.nan], [38.8, 0.3, 1.0]]
+    )
+    lines = draw_cosinor_panel(ax, parameters)
+    assert len(ax.collections) == 1 and len(ax.lines) == 0
+    assert len(lines.get_segments()) == 2
+    np.testing.assert_array_equal(lines.get_array(), [0.0, 2.0])
+    low, high = ax.get_ylim()
+    assert low < 38.5 and high > 39.4
+
+    assert draw_cosinor_panel(Figure().subplots(), np.full((2, 3), np.nan)) is None
+
+
+def test_sheep_panels_sort_once_by_sheep_and_date():
+    features = _herd_features(n_sheep=3, n_days=4)
+    panels = sheep_panels(features)
+    assert [sheep_id for sheep_id, _ in panels] == ["S0000", "S0001", "S0002"]
+    expected = features[features["sheep_id"] == "S0001"].sort_values("record_date")
+    np.testing.assert_array_equal(panels[1][1], expected[["M", "A", "phi"]].to_numpy())
+
+
+def test_render_page_hides_unused_panels():
+    fig = render_page(sheep_panels(_herd_features(n_sheep=3)), rows=2, cols=2)
+    visible = [ax for ax in fig.axes if ax.get_visible()]
+    assert len(visible) == 3
+    assert all(len(ax.collections) == 1 for ax in visible)
+
+
+def test_herd_pdf_has_one_page_per_grid(tmp_path):
+    """Seven sheep on 2x2 grids make a two-page PDF"""
+    paths = plot_herd_cosinor(_herd_features(), tmp_path / "herd.pdf", rows=2, cols=2)
+    assert paths == [tmp_path / "herd.pdf"]
+    content = paths[0].read_bytes()
+    assert content.startswith(b"%PDF")
+    assert len(re.findall(rb"/Type\s*/Page\b", content)) == 2
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_herd_png_pages(tmp_path, workers):
+    """PNG pages are numbered files, whether rendered in-process or by a pool"""
+    output = tmp_path / "herd.png"
+    paths = plot_herd_cosinor(
+        _herd_features(), output, rows=2, cols=2, workers=workers, dpi=40
+    )
+    assert paths == [page_path(output, i) for i in range(2)]
+    assert all(path.read_bytes().startswith(b"\x89PNG") for path in paths)
+
+
+def test_herd_subset_and_bad_format(tmp_path):
+    paths = plot_herd_cosinor(
+        _herd_features(), tmp_path / "one.png", sheep=["S0003"], workers=1, dpi=40
+    )
+    assert len(paths) == 1
+    with pytest.raises(ValueError):
+        plot_herd_cosinor(_herd_features(), tmp_path / "herd.svg")
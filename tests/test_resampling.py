@@ -0,0 +1,138 @@
+"""
+Tests for the 5-minute grid resampling kernel
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from disco_baa_01.drinking import interpolate_segments
+from disco_baa_01.extraction import extract_cosinor_features, extract_drinking_behavior
+from disco_baa_01.resampling import (
+    fill_gaps,
+    missing_runs,
+    resample_frame,
+    resample_to_grid,
+)
+from disco_baa_01.synthetic import synthetic_sheep_frame
+
+
+def test_missing_runs():
+    mask = np.array([[1, 0], [1, 1], [0, 1], [1, 0]], dtype=bool)
+    series, start, stop = missing_runs(mask)
+    assert list(zip(series, start, stop)) == [(0, 0, 2), (0, 3, 4), (1, 1, 3)]
+
+
+@pytest.mark.parametrize("max_gap_slots", [0, 2, 1000])
+def test_fill_gaps_interpolates_short_interior_runs(max_gap_slots):
+    rng = np.random.default_rng(0)
+    values = rng.normal(39, 0.5, (500, 4))
+    values[rng.random(values.shape) < 0.4] = np.nan
+    filled = values.copy()
+    n_filled = fill_gaps(filled, max_gap_slots)
+
+    for j in range(values.shape[1]):
+        expected = interpolate_segments(values[:, j])
+        series, start, stop = missing_runs(np.isnan(values[:, j]))
+        for a, b in zip(start, stop):
+            if a > 0 and b < len(values) and b - a <= max_gap_slots:
+                np.testing.assert_allclose(filled[a:b, j], expected[a:b])
+            else:
+                assert np.isnan(filled[a:b, j]).all()
+    assert n_filled == np.isnan(values).sum() - np.isnan(filled).sum()
+
+
+def test_resample_to_grid_snaps_and_marks_gaps():
+    # Clock jitter, a duplicate slot, a missing reading and a long outage
+    timestamps = pd.to_datetime(
+        [
+            "2024-03-01 00:01:10",
+            "2024-03-01 00:04:50",
+            "2024-03-01 00:06:00",
+            "2024-03-01 00:09:40",
+            "2024-03-01 00:20:00",
+            "2024-03-01 01:00:00",
+        ]
+    )
+    values = np.array(
+        [
+            [38.0, 39.0],
+            [38.5, 39.0],
+            [39.5, np.nan],
+            [40.0, 39.4],
+            [39.0, 39.0],
+            [39.0, 30.0],
+        ]
+    )
+    grid = resample_to_grid(timestamps, values, max_gap_minutes=10, min_value=35)
+
+    assert grid.timestamps[0] == np.datetime64("2024-03-01T00:00")
+    assert grid.n_slots == 13
+    np.testing.assert_allclose(grid.values[:5, 0], [38.0, 39.0, 40.0, 39.5, 39.0])
+    np.testing.assert_allclose(grid.values[:5, 1], [39.0, 39.0, 39.4, 39.2, 39.0])
+    assert grid.observed[:, 0].sum() == 5 and grid.interpolated[:, 0].sum() == 1
+    # 00:25-00:55 is longer than 10 minutes; sheep 2's last reading is below min_value
+    assert grid.gaps[5:12, 0].all() and grid.gaps[5:, 1].all()
+
+    # A 1-D series gives the same column
+    single = resample_to_grid(
+        timestamps, values[:, 0], max_gap_minutes=10, min_value=35
+    )
+    np.testing.assert_array_equal(single.values, grid.values[:, 0])
+
+
+def test_resample_frame_reports_gaps():
+    frame = synthetic_sheep_frame("A0001", n_days=1, seed=0).merge(
+        synthetic_sheep_frame("A0002", n_days=1, seed=1), on="DT"
+    )
+    frame.loc[100:111, "A0001"] = np.nan
+    frame.loc[50:51, "A0002"] = np.nan
+    resampled = resample_frame(frame.drop(index=range(200, 203)), max_gap_minutes=15)
+
+    assert len(resampled) == 288
+    assert resampled["DT"].equals(frame["DT"].astype("datetime64[ns]"))
+    gaps = resampled.attrs["gaps"]
+    assert list(gaps["sheep_id"]) == ["A0001"]
+    assert gaps["gap_start"].iloc[0] == frame["DT"].iloc[100]
+    assert gaps["gap_minutes"].iloc[0] == 60
+    assert resampled[["A0002"]].notna().all().all()
+
+
+def _dip_day(m=100, removed=(103, 104)):
+    """A day with one drink dip at m and the recovery peak 12 readings later"""
+    i = np.arange(288)
+    temps = 39 + 0.01 * np.minimum(i, m + 12) - 0.01 * np.maximum(0, i - (m + 12))
+    temps[[m - 1, m, m + 1]] -= [1.0, 2.0, 1.0]
+    frame = pd.DataFrame(
+        {"DT": pd.date_range("2024-02-01", periods=288, freq="5min"), "A0001": temps}
+    )
+    return frame.drop(index=list(removed)).reset_index(drop=True)
+
+
+def test_grid_extraction_gives_true_durations():
+    full = _dip_day(removed=())
+    assert extract_drinking_behavior(full, "A0001")["recover_time"].tolist() == [60]
+
+    # Missing readings shorten positional durations, but not grid ones
+    sparse = _dip_day()
+    assert extract_drinking_behavior(sparse, "A0001")["recover_time"].tolist() == [50]
+    events = extract_drinking_behavior(sparse, "A0001", max_gap_minutes=0)
+    assert events["recover_time"].tolist() == [60]
+    assert events["DT"].tolist() == [full["DT"].iloc[100]]
+
+
+def test_grid_extraction_matches_on_regular_series():
+    frame = synthetic_sheep_frame("A0001", n_days=3, seed=2)
+    pd.testing.assert_frame_equal(
+        extract_cosinor_features(frame, "A0001", max_gap_minutes=15),
+        extract_cosinor_features(frame, "A0001"),
+    )
+    pd.testing.assert_frame_equal(
+        extract_drinking_behavior(frame, "A0001", max_gap_minutes=0),
+        extract_drinking_behavior(frame, "A0001"),
+        check_dtype=False,
+    )
@@ -0,0 +1,76 @@
+"""
+Tests for day segmentation
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from disco_baa_01.segments import elapsed_hours, segment_days, time_of_day_hours
+
+
+@pytest.fixture
+def readings():
+    """Three days of 5-minute readings, shuffled, with a NaT and a gap day"""
+    dt = pd.date_range("2023-12-31", periods=288 * 3, freq="5min")
+    dt = dt[(dt.day != 1) | (dt.hour < 2)]
+    temps = np.linspace(38, 40, len(dt))
+    frame = pd.DataFrame({"DT": dt, "temp": temps}).sample(frac=1, random_state=0)
+    frame.iloc[0, 0] = pd.NaT
+    return frame
+
+
+def test_segments_match_date_masks(readings):
+    """Each segment holds exactly the readings of the per-date mask, in time order"""
+    keep = readings["temp"].to_numpy() >= 38.5
+    segments = segment_days(readings["DT"], keep=keep)
+
+    dates = readings["DT"].dt.date.astype(str)
+    expected_dates = sorted(dates[keep & readings["DT"].notna().to_numpy()].unique())
+    assert segments.date_strings().tolist() == expected_dates
+
+    dt = segments.take(readings["DT"])
+    temps = segments.take(readings["temp"])
+    assert (np.diff(dt) > np.timedelta64(0)).all()
+    for i, date in enumerate(expected_dates):
+        mask = keep & (dates == date).to_numpy()
+        day = temps[segments.day_slice(i)]
+        assert day.base is not None or len(day) == 0
+        np.testing.assert_array_equal(day, np.sort(readings["temp"].to_numpy()[mask]))
+
+
+def test_select_keeps_chosen_days(readings):
+    segments = segment_days(readings["DT"])
+    full = segments.select(segments.lengths > 100)
+
+    assert full.date_strings().tolist() == ["2023-12-31", "2024-01-02"]
+    np.testing.assert_array_equal(full.lengths, segments.lengths[[0, 2]])
+    np.testing.assert_array_equal(
+        full.take(readings["DT"])[full.day_slice(1)],
+        segments.take(readings["DT"])[segments.day_slice(2)],
+    )
+
+
+def test_time_of_day_hours_and_empty_input():
+    hours = time_of_day_hours(
+        pd.to_datetime(["2024-01-01 00:00:00", "2024-01-01 13:30:36"])
+    )
+    np.testing.assert_array_equal(hours, [0.0, (13 * 3600 + 30 * 60 + 36) / 3600])
+
+    empty = segment_days(np.array([], dtype="datetime64[ns]"))
+    assert empty.n_days == 0
+    assert empty.offsets.tolist() == [0]
+
+
+def test_elapsed_hours_is_continuous():
+    timestamps = pd.to_datetime(["2024-01-01 06:00:00", "2024-01-02 07:30:00", None])
+
+    hours = elapsed_hours(timestamps)
+
+    np.testing.assert_array_equal(hours[:2], [6.0, 31.5])
+    assert np.isnan(hours[2])
+    assert elapsed_hours(timestamps[:1], origin="2024-01-01 05:00")[0] == 1.0
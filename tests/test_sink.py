@@ -0,0 +1,80 @@
+"""
+Tests for the consolidated Parquet feature sink
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+from disco_baa_01.parallel import run_parallel
+from disco_baa_01.sink import FeatureSink, read_features, sheep_ids, sink_path
+from disco_baa_01.synthetic import write_synthetic_sheep_csvs
+
+
+def _frame(sheep_id, n):
+    return pd.DataFrame(
+        {
+            "record_date": pd.date_range("2024-01-01", periods=n).strftime("%Y-%m-%d"),
+            "M": np.linspace(38.5, 39.5, n),
+        }
+    )
+
+
+def test_batches_become_row_groups_with_ids_in_footer(tmp_path):
+    """Appends are buffered into row groups and the sheep list is kept in metadata"""
+    with FeatureSink(tmp_path, "cosinor_features", batch_rows=5) as sink:
+        for sheep_id in ["S0003", "S0001", "S0002"]:
+            sink.append(_frame(sheep_id, 3), sheep_id)
+        sink.append(pd.DataFrame(), "S0009")
+        assert not sink_path(tmp_path, "cosinor_features").exists()
+
+    path = sink_path(tmp_path, "cosinor_features")
+    assert pq.ParquetFile(path).num_row_groups == 2
+    assert sheep_ids(path) == ["S0001", "S0002", "S0003"]
+    data = read_features(path, sheep=["S0002"])
+    assert len(data) == 3 and (data["sheep_id"] == "S0002").all()
+
+
+def test_empty_sink_writes_nothing(tmp_path):
+    """Closing a sink that never received rows leaves no file behind"""
+    assert FeatureSink(tmp_path, "drinking_behavior").close() is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_unknown_kind_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        sink_path(tmp_path, "features")
+
+
+def test_run_parallel_consolidates_outputs(tmp_path):
+    """Workers' frames land in one file per kind, matching the per-sheep CSVs"""
+    sources = write_synthetic_sheep_csvs(
+        tmp_path / "split", n_sheep=3, n_days=2, seed=0
+    )
+    csv_dir = tmp_path / "csv"
+    csv_dir.mkdir()
+
+    summary = run_parallel(
+        sources, workers=2, output_dir=csv_dir, sink_dir=tmp_path / "sink"
+    )
+
+    features = read_features(sink_path(tmp_path / "sink", "cosinor_features"))
+    drinks = read_features(sink_path(tmp_path / "sink", "drinking_behavior"))
+    assert len(features) == summary["cosinor_days"].sum()
+    assert len(drinks) == summary["drink_events"].sum()
+    assert sheep_ids(sink_path(tmp_path / "sink", "drinking_behavior")) == [
+        "S0001",
+        "S0002",
+        "S0003",
+    ]
+    assert (drinks["sheep_id"] == drinks["logger_code"]).all()
+
+    expected = pd.read_csv(csv_dir / "S0002_cosinor_features.csv")
+    actual = features[features["sheep_id"] == "S0002"].reset_index(drop=True)
+    np.testing.assert_allclose(actual["A"], expected["A"])
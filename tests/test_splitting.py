@@ -0,0 +1,97 @@
+"""
+Tests for the streaming workbook splitter
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from disco_baa_01.extraction import split_data_by_sheep
+from disco_baa_01.splitting import sheep_columns, split_workbook_streaming
+
+
+@pytest.fixture
+def calibrated_workbook(tmp_path):
+    """A small CALIB sheet with helper columns, gaps and a bad cell"""
+    pytest.importorskip("openpyxl")
+    rng = np.random.default_rng(0)
+    n = 50
+    wide = pd.DataFrame(
+        {
+            "DT": pd.date_range("2024-01-01", periods=n, freq="5min"),
+            "date": "2024-01-01",
+            "M0001": rng.normal(39, 0.3, n),
+            "M0002": rng.normal(39, 0.3, n),
+            "hour": 0,
+            "F0103": rng.normal(39, 0.3, n),
+        }
+    )
+    wide.loc[[3, 17], "M0002"] = np.nan
+    path = tmp_path / "calibrated.xlsx"
+    wide.to_excel(path, sheet_name="CALIB", index=False)
+    return path
+
+
+@pytest.mark.parametrize("batch_rows", [7, 1000])
+def test_streaming_csv_matches_in_memory_split(
+    calibrated_workbook, tmp_path, batch_rows
+):
+    """CSV shards equal the ones split_data_by_sheep writes"""
+    expected_dir = tmp_path / "expected"
+    expected_dir.mkdir()
+    expected_ids = split_data_by_sheep(calibrated_workbook, "CALIB", expected_dir)
+
+    sheep_ids = split_workbook_streaming(
+        calibrated_workbook, tmp_path / "streamed", "CALIB", batch_rows=batch_rows
+    )
+
+    assert sheep_ids == expected_ids == ["M0001", "M0002", "F0103"]
+    for sheep_id in sheep_ids:
+        pd.testing.assert_frame_equal(
+            pd.read_csv(tmp_path / "streamed" / f"{sheep_id}.csv"),
+            pd.read_csv(expected_dir / f"{sheep_id}.csv"),
+        )
+
+
+def test_streaming_parquet_dataset(calibrated_workbook, tmp_path):
+    """Parquet output is one long dataset partitioned by sheep_id"""
+    pytest.importorskip("pyarrow")
+    out = tmp_path / "long"
+
+    split_workbook_streaming(
+        calibrated_workbook, out, "CALIB", output_format="parquet", batch_rows=20
+    )
+
+    long = pd.read_parquet(out)
+    assert sorted(long["sheep_id"].astype(str).unique()) == ["F0103", "M0001", "M0002"]
+    assert len(long) == 150
+    assert long.loc[long["sheep_id"] == "M0002", "temp"].isna().sum() == 2
+
+
+def test_sheep_columns_skips_helpers():
+    """DT/date/hour helpers and blank headers are not loggers"""
+    assert sheep_columns(["DT", "date", "M1", None, "hour", 1234]) == ["M1", "1234"]
+
+
+def test_streaming_into_temperature_store(calibrated_workbook, tmp_path):
+    """The store sink gives one float64 series per sheep"""
+    pytest.importorskip("pyarrow")
+    from disco_baa_01.store import TemperatureStore
+
+    split_workbook_streaming(
+        calibrated_workbook,
+        tmp_path / "store",
+        "CALIB",
+        output_format="store",
+        batch_rows=20,
+    )
+
+    store = TemperatureStore(tmp_path / "store")
+    assert store.sheep_ids() == ["F0103", "M0001", "M0002"]
+    series = store.read_sheep_series("M0001")
+    assert len(series) == 50
+    assert str(series["M0001"].dtype) == "float64"
@@ -0,0 +1,72 @@
+"""
+Startup cost: the package and the CLI import without heavy dependencies
+"""
+
+import pytest
+import json
+import os
+import subprocess
+from pathlib import Path
+import sys
+
+SRC = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(SRC))
+
+HEAVY_MODULES = ("numpy", "pandas", "scipy", "matplotlib", "pyarrow")
+
+# Wall-clock budget of the import itself, best of a few fresh interpreters
+IMPORT_BUDGET_S = 0.1
+
+
+def _import_in_fresh_interpreter(statement: str) -> dict:
+    code = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        f"{statement}\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"loaded = [m for m in {HEAVY_MODULES!r} if m in sys.modules]\n"
+        "print(json.dumps({'elapsed': elapsed, 'loaded': loaded}))\n"
+    )
+    env = dict(os.environ, PYTHONPATH=str(SRC))
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(output.stdout)
+
+
+@pytest.mark.parametrize(
+    "statement",
+    [
+        "import disco_baa_01",
+        "import disco_baa_01.cli",
+        "import disco_baa_01.utils, disco_baa_01.masterfile, disco_baa_01.sink",
+    ],
+)
+def test_import_is_fast_and_lazy(statement):
+    runs = [_import_in_fresh_interpreter(statement) for _ in range(3)]
+    assert runs[0]["loaded"] == []
+    assert min(run["elapsed"] for run in runs) < IMPORT_BUDGET_S
+
+
+def test_cosinor_fit_does_not_load_scipy():
+    result = _import_in_fresh_interpreter(
+        "import numpy as np\n"
+        "from disco_baa_01 import fit_cosinor\n"
+        "fit_cosinor(np.cos(np.linspace(0, 6.28, 48)), np.linspace(0, 24, 48))"
+    )
+    assert "scipy" not in result["loaded"]
+
+
+def test_lazy_attributes_resolve():
+    import disco_baa_01
+    from disco_baa_01 import cosinor
+
+    assert disco_baa_01.fit_cosinor is cosinor.fit_cosinor
+    assert disco_baa_01.cosinor is cosinor
+    assert "run_stages" in dir(disco_baa_01)
+    with pytest.raises(AttributeError):
+        disco_baa_01.not_a_module
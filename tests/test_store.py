@@ -0,0 +1,185 @@
+"""
+Tests for the partitioned Parquet temperature store
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+pytest.importorskip("pyarrow")
+
+from disco_baa_01.extraction import (
+    extract_drinking_behavior,
+    list_splitted_files,
+    load_sheep_series,
+    process_single_sheep_cosinor,
+)
+from disco_baa_01.store import TemperatureStore, is_temperature_store
+from disco_baa_01.synthetic import synthetic_sheep_frame
+
+
+def _series(start, days, seed=0):
+    rng = np.random.default_rng(seed)
+    dt = pd.date_range(start, periods=288 * days, freq="5min")
+    hours = (dt.hour + dt.minute / 60).to_numpy()
+    return dt, 39 + 0.4 * np.cos(2 * np.pi * hours / 24) + rng.normal(0, 0.05, len(dt))
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = TemperatureStore(tmp_path / "store")
+    for seed, sheep_id in enumerate(["M0001", "M0002", "F0101"]):
+        # Spans a new year so the sheep lands in two year partitions
+        store.write_sheep(sheep_id, *_series("2023-12-30", 4, seed))
+    return store
+
+
+def test_partition_layout_and_types(store):
+    """Hive partitions by year/group/sheep with typed columns"""
+    assert is_temperature_store(store.root)
+    assert (
+        store.root / "year=2024" / "group=M" / "sheep_id=M0002" / "part-0.parquet"
+    ).exists()
+    assert store.sheep_ids() == ["F0101", "M0001", "M0002"]
+
+    data = store.read()
+    assert str(data["temp"].dtype) == "float64"
+    assert pd.api.types.is_datetime64_any_dtype(data["DT"])
+    assert len(data) == 3 * 4 * 288
+
+
+def test_read_filters_sheep_and_dates(store):
+    """Only the requested sheep and [start, end) range come back"""
+    data = store.read(["M0001"], start="2024-01-01", end="2024-01-02 06:00")
+
+    assert data["sheep_id"].unique().tolist() == ["M0001"]
+    assert data["DT"].min() == pd.Timestamp("2024-01-01")
+    assert data["DT"].max() == pd.Timestamp("2024-01-02 05:55")
+    assert data["DT"].is_monotonic_increasing
+
+
+def test_write_sheep_replaces_previous_data(store):
+    """Rewriting a sheep drops partitions it no longer has"""
+    store.write_sheep("M0001", *_series("2024-03-01", 1))
+
+    data = store.read(["M0001"])
+    assert len(data) == 288
+    assert not (store.root / "year=2023" / "group=M" / "sheep_id=M0001").exists()
+
+
+def test_store_source_matches_csv_source(store, tmp_path):
+    """Cosinor features from the store equal those from the split CSV"""
+    series = store.read_sheep_series("M0002")
+    csv_path = tmp_path / "M0002.csv"
+    series.to_csv(csv_path, index=False)
+
+    from_store = process_single_sheep_cosinor(store.root, "M0002")
+    from_csv = process_single_sheep_cosinor(csv_path, "M0002")
+
+    assert len(from_store) == 4
+    pd.testing.assert_frame_equal(from_store, from_csv, check_dtype=False)
+    assert list_splitted_files(store.root)[0] == ("F0101", str(store.root))
+
+
+@pytest.mark.parametrize("temp_thresh", [-0.5, -0.8])
+def test_store_source_gives_csv_drink_events(tmp_path, temp_thresh):
+    """Readings at the 0.1 degree sensor resolution detect the same drinks"""
+    frame = synthetic_sheep_frame("M0001", n_days=20, seed=1)
+    frame["M0001"] = frame["M0001"].round(1)
+    csv_path = tmp_path / "M0001.csv"
+    frame.to_csv(csv_path, index=False)
+    TemperatureStore(tmp_path / "store").write_sheep(
+        "M0001", frame["DT"], frame["M0001"]
+    )
+
+    from_csv = extract_drinking_behavior(
+        load_sheep_series(csv_path, "M0001"), "M0001", temp_thresh=temp_thresh
+    )
+    from_store = extract_drinking_behavior(
+        load_sheep_series(tmp_path / "store", "M0001"), "M0001", temp_thresh=temp_thresh
+    )
+
+    assert len(from_csv) > 50
+    pd.testing.assert_frame_equal(from_store, from_csv)
+
+
+def test_load_sheep_series_missing_sheep(store):
+    """A sheep that is not in the store is skipped"""
+    assert load_sheep_series(store, "X9999") is None
+
+
+def test_streaming_split_with_more_partitions_than_open_files(tmp_path):
+    """More sheep than the file descriptor limit split in one streaming pass"""
+    resource = pytest.importorskip("resource")
+    from disco_baa_01.splitting import split_rows_streaming
+
+    n_sheep, n_rows = 1100, 200
+    sheep_ids = [f"M{i:04d}" for i in range(n_sheep)]
+    timestamps = pd.date_range(
+        "2023-12-31 23:00", periods=n_rows, freq="5min"
+    ).to_pydatetime()
+    temps = np.round(39 + np.arange(n_rows) / 1000, 3)
+    rows = [("DT", *sheep_ids)] + [
+        (dt, *([t] * n_sheep)) for dt, t in zip(timestamps, temps)
+    ]
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (min(512, hard), hard))
+    try:
+        store = TemperatureStore(tmp_path / "store", max_open_writers=64)
+        assert split_rows_streaming(rows, store, batch_rows=100) == sheep_ids
+    finally:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+
+    # Every sheep spans the new year: 2 * n_sheep partitions
+    assert len(list(store.root.glob("year=*/group=*/sheep_id=*"))) == 2 * n_sheep
+    series = store.read_sheep_series("M1099")
+    np.testing.assert_array_equal(series["M1099"], temps)
+    assert series["DT"].is_monotonic_increasing
+
+
+def test_partition_writers_bound_open_files(tmp_path):
+    """Evicted partitions continue in a new part file; nothing is lost"""
+    import pyarrow as pa
+    from disco_baa_01.store import PartitionWriters
+
+    schema = pa.schema([("x", pa.int64())])
+    writers = PartitionWriters(schema, row_group_size=10, max_open=3)
+    for start in range(0, 40, 5):
+        for key in range(6):
+            writers.write(
+                key,
+                tmp_path / f"p={key}",
+                pa.table({"x": np.arange(start, start + 5)}, schema=schema),
+            )
+            assert writers.n_open <= 3
+    writers.close()
+
+    for key in range(6):
+        parts = sorted((tmp_path / f"p={key}").glob("part-*.parquet"))
+        assert len(parts) > 1
+        assert sorted(pd.read_parquet(tmp_path / f"p={key}")["x"]) == list(range(40))
+
+
+def test_float32_partitions_of_older_stores_read_as_float64(store):
+    """A legacy float32 file does not narrow the rest of the store"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    legacy = store.root / "year=2024" / "group=A" / "sheep_id=A0001"
+    legacy.mkdir(parents=True)
+    dt = pd.date_range("2024-01-01", periods=2, freq="5min").to_numpy("datetime64[us]")
+    pq.write_table(
+        pa.table({"DT": dt, "temp": pa.array([36.9, 37.7], type=pa.float32())}),
+        legacy / "part-0.parquet",
+    )
+
+    data = store.read()
+    assert str(data["temp"].dtype) == "float64"
+    _, temps = _series("2023-12-30", 4, seed=0)
+    np.testing.assert_array_equal(data.loc[data["sheep_id"] == "M0001", "temp"], temps)
+    assert len(store.read(["A0001"])) == 2
@@ -0,0 +1,136 @@
+"""
+Tests for the online cosinor / drink detection engine
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from disco_baa_01.cli import main
+from disco_baa_01.extraction import extract_cosinor_features, extract_drinking_behavior
+from disco_baa_01.instrumentation import collecting
+from disco_baa_01.streaming import RING_SIZE, StreamingAnalyser, read_feed
+from disco_baa_01.synthetic import synthetic_sheep_frame
+
+
+def _herd(n_days=3, **kwargs):
+    frames = [
+        synthetic_sheep_frame(sheep_id, n_days, seed=seed, **kwargs)
+        for seed, sheep_id in enumerate(["A0001", "A0002"])
+    ]
+    return frames[0].merge(frames[1], on="DT")
+
+
+def _replay(analyser, frame, chunk_rows):
+    outputs = [
+        analyser.push(frame.iloc[start : start + chunk_rows])
+        for start in range(0, len(frame), chunk_rows)
+    ]
+    outputs.append(analyser.close())
+    return {
+        kind: pd.concat([o[kind] for o in outputs], ignore_index=True)
+        for kind in outputs[0]
+    }
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 50, 10_000])
+def test_stream_matches_batch_extraction(chunk_rows):
+    """Same day fits and drink events as the whole-history run, whatever the chunking"""
+    herd = _herd(drinks_per_day=12)
+    result = _replay(StreamingAnalyser(temp_thresh=-0.5), herd, chunk_rows)
+
+    for sheep_id in ["A0001", "A0002"]:
+        sheep_data = herd[["DT", sheep_id]]
+        expected = extract_cosinor_features(
+            sheep_data, sheep_id, extract_min_max_temp=False
+        )
+        days = (
+            result["cosinor_features"]
+            .query("sheep_id == @sheep_id")
+            .reset_index(drop=True)
+        )
+        assert len(days) == 3
+        pd.testing.assert_frame_equal(days, expected, check_dtype=False, rtol=1e-9)
+
+        expected = extract_drinking_behavior(sheep_data, sheep_id)
+        events = (
+            result["drinking_behavior"]
+            .query("sheep_id == @sheep_id")
+            .reset_index(drop=True)
+        )
+        assert len(events) > 10
+        pd.testing.assert_frame_equal(
+            events.drop(columns="sheep_id"), expected, check_dtype=False
+        )
+
+
+def test_days_finish_when_the_next_day_starts():
+    herd = _herd(n_days=2)
+    analyser = StreamingAnalyser(analyses=["cosinor_features"])
+    assert list(analyser.push(herd.iloc[:288])) == ["cosinor_features"]
+    assert analyser.push(herd.iloc[:288])["cosinor_features"].empty
+
+    days = analyser.push(herd.iloc[288:289])["cosinor_features"]
+    assert list(days["record_date"]) == ["2023-01-01", "2023-01-01"]
+    with collecting() as stats:
+        assert analyser.close()["cosinor_features"].empty
+    assert stats.counters["days_skipped_short"] == 2
+
+
+def test_late_readings_are_dropped():
+    herd = _herd(n_days=1)
+    analyser = StreamingAnalyser()
+    with collecting() as stats:
+        analyser.push(herd.iloc[100:200])
+        analyser.push(herd.iloc[:150])
+    assert stats.counters["late_readings"] == 2 * 150
+    assert analyser.close()["cosinor_features"].empty
+
+
+def test_state_is_bounded():
+    analyser = StreamingAnalyser()
+    analyser.push(_herd(n_days=2))
+    for stream in analyser.sheep.values():
+        assert stream.values.size == RING_SIZE
+        assert len(stream.drinks) + len(stream.dips) < 20
+    with pytest.raises(ValueError):
+        StreamingAnalyser(abnormal_temp_thresh=20)
+
+
+def test_read_feed_sources(tmp_path):
+    herd = _herd(n_days=1)
+    herd.iloc[:100].to_csv(tmp_path / "002.csv", index=False)
+    herd.iloc[100:].to_csv(tmp_path / "001.csv", index=False)
+    chunks = list(read_feed(tmp_path, poll_interval=0.01, idle_timeout=0))
+    assert [len(chunk) for chunk in chunks] == [188, 100]
+
+    # A growing file: only complete lines are read
+    text = herd.iloc[:10].to_csv(index=False)
+    feed = tmp_path / "feed" / "live.csv"
+    feed.parent.mkdir()
+    feed.write_text(text + "2023-01-01 00:50:00,39.")
+    chunks = list(read_feed(feed, poll_interval=0.01, idle_timeout=0.05))
+    assert sum(len(chunk) for chunk in chunks) == 10
+    assert list(chunks[0].columns) == ["DT", "A0001", "A0002"]
+
+
+def test_cli_stream(tmp_path):
+    herd = _herd(n_days=2)
+    feed = tmp_path / "feed"
+    feed.mkdir()
+    for k, start in enumerate(range(0, len(herd), 100)):
+        herd.iloc[start : start + 100].to_csv(feed / f"{k:03d}.csv", index=False)
+
+    assert (
+        main(
+            ["stream", str(feed), "--out", str(tmp_path / "out"), "--idle-timeout", "0"]
+        )
+        == 0
+    )
+    days = pd.read_csv(tmp_path / "out" / "cosinor_features.csv")
+    assert len(days) == 4 and np.isfinite(days["M"]).all()
+    assert (tmp_path / "out" / "drinking_behavior.csv").exists()
@@ -0,0 +1,109 @@
+"""
+Tests for the drink-detection threshold sweep
+"""
+
+import contextlib
+import io
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from disco_baa_01.drinking import (
+    drop_event_intervals,
+    find_drop_events,
+    mask_drinking_events,
+)
+from disco_baa_01.extraction import extract_drinking_behavior
+from disco_baa_01.segments import segment_days
+from disco_baa_01.sweep import (
+    SWEEP_COLUMNS,
+    save_sweep,
+    sweep_drinking_thresholds,
+    sweep_herd,
+)
+from disco_baa_01.synthetic import synthetic_sheep_frame, write_synthetic_sheep_csvs
+
+TEMP_THRESHES = [-1.5, -1.0, -0.5, -0.2]
+
+
+def test_find_drop_events_matches_every_threshold():
+    """The interval form gives the same events as the per-threshold rule"""
+    rng = np.random.default_rng(1)
+    values = 39 + np.cumsum(rng.normal(0, 0.4, 600))
+    offsets = np.array([0, 250, 600])
+    positions, lower, upper = drop_event_intervals(values, 30, offsets)
+    for temp_thresh in np.linspace(-2, 0, 21):
+        expected = find_drop_events(values, temp_thresh, 30, offsets)
+        assert np.array_equal(
+            positions[(lower < temp_thresh) & (temp_thresh <= upper)], expected
+        )
+
+
+def test_sweep_matches_single_threshold_extraction():
+    """Counts, event features and masked readings agree with one run per threshold"""
+    sheep = synthetic_sheep_frame("S0001", n_days=5, seed=4, missing_fraction=0.01)
+    summary, events = sweep_drinking_thresholds(
+        sheep, "S0001", TEMP_THRESHES, (35, 37), return_events=True
+    )
+
+    assert list(summary.columns) == SWEEP_COLUMNS
+    assert (summary["abnormal_temp_thresh"] == 35).sum() == 5 * len(TEMP_THRESHES)
+
+    values = sheep["S0001"].to_numpy(dtype=np.float64)
+    for abnormal in (35, 37):
+        segments = segment_days(sheep["DT"], keep=values >= abnormal)
+        segments = segments.select(segments.lengths >= 280)
+        day_values = segments.take(values)
+        for temp_thresh in TEMP_THRESHES:
+            with contextlib.redirect_stdout(io.StringIO()):
+                expected = extract_drinking_behavior(
+                    sheep, "S0001", abnormal, temp_thresh
+                )
+            rows = summary[
+                (summary["abnormal_temp_thresh"] == abnormal)
+                & (summary["temp_thresh"] == temp_thresh)
+            ]
+            found = events[
+                (events["abnormal_temp_thresh"] == abnormal)
+                & (events["temp_thresh"] == temp_thresh)
+            ]
+
+            assert rows["drink_count"].sum() == len(expected) == len(found)
+            if len(expected):
+                assert np.array_equal(found["DT"].to_numpy(), expected["DT"].to_numpy())
+                assert np.allclose(found["recover_time"], expected["recover_time"])
+
+            masked = mask_drinking_events(
+                day_values, abnormal, temp_thresh, segments.offsets
+            )
+            assert (
+                rows["masked_readings"].sum()
+                == np.isnan(masked).sum() - np.isnan(day_values).sum()
+            )
+
+
+def test_days_without_events_have_zero_count():
+    """Every (day, threshold) pair gets a row, with NaN means when nothing was found"""
+    sheep = synthetic_sheep_frame(
+        "S0001", n_days=2, seed=0, drinks_per_day=0, noise_sd=0.0
+    )
+    summary = sweep_drinking_thresholds(sheep, "S0001", [-1.0], include_masking=False)
+
+    assert (summary["drink_count"] == 0).all()
+    assert summary["mean_drink_temp"].isna().all()
+    assert summary["masked_readings"].isna().all()
+
+
+def test_sweep_herd_writes_table(tmp_path):
+    """A herd sweep stacks every sheep and round-trips through CSV"""
+    sources = write_synthetic_sheep_csvs(
+        tmp_path / "split", n_sheep=2, n_days=2, seed=0
+    )
+    sweep = sweep_herd(sources, [-1.0, -0.5])
+
+    assert sorted(sweep["sheep_id"].unique()) == ["S0001", "S0002"]
+    path = save_sweep(sweep, tmp_path / "out" / "sweep.csv")
+    assert len(pd.read_csv(path)) == len(sweep) == 2 * 2 * 2
@@ -15,6 +15,7 @@ from disco_baa_01.utils import (
     load_data,
     save_data,
     describe_data,
+    optimize_dtypes,
     set_random_seed
 )
 
@@ -40,6 +41,7 @@ def test_describe_data(sample_dataframe):
     assert 'memory_usage' in stats
     
     assert stats['shape'] == (5, 3)
+    assert 'memory_usage_optimized' not in stats
     assert len(stats['columns']) == 3
     assert 'id' in stats['columns']
 
@@ -85,3 +87,50 @@ def test_describe_data_with_missing_values():
     
     assert stats['missing_values']['a'] == 1
     assert stats['missing_values']['b'] == 1
+
+
+def test_optimize_dtypes_downcasts_and_keeps_missing():
+    """Mixed object columns, integral floats and text get compact dtypes"""
+    df = pd.DataFrame({
+        'logger': [12.0, 13.0, np.nan, 15.0] * 25,
+        'weight': [61.5, 70.25, 58.0, np.nan] * 25,
+        'scan': ['P', 'E', np.nan, 'P'] * 25,
+        'mixed': [1, 'x', np.nan, 2.5] * 25,
+        'as_text': ['1', '2', np.nan, '4'] * 25,
+        'scanned': [
+            pd.Timestamp('2023-05-01'), '2023-05-02', np.nan, '2023-05-03'
+        ] * 25,
+    })
+    df['mixed'] = df['mixed'].astype(object)
+    df['scanned'] = df['scanned'].astype(object)
+
+    optimized = optimize_dtypes(df)
+
+    assert str(optimized['logger'].dtype) == 'Int8'
+    assert optimized['weight'].dtype == np.float32
+    assert isinstance(optimized['scan'].dtype, pd.CategoricalDtype)
+    assert list(optimized['scan'].cat.categories) == ['E', 'P']
+    assert str(optimized['as_text'].dtype) == 'Int8'
+    assert pd.api.types.is_datetime64_any_dtype(optimized['scanned'])
+    assert optimized['mixed'].dropna().tolist()[:3] == ['1', 'x', '2.5']
+    assert optimized.isna().sum().to_dict() == df.isna().sum().to_dict()
+
+
+def test_optimize_dtypes_keeps_lossy_floats():
+    """Floats that float32 cannot hold within the tolerance stay float64"""
+    df = pd.DataFrame({'precise': [39.25, 1234567.891, np.nan]})
+
+    assert optimize_dtypes(df)['precise'].dtype == np.float64
+    assert optimize_dtypes(df, float_tolerance=0.1)['precise'].dtype == np.float32
+    exact = optimize_dtypes(df[['precise']].iloc[[0, 2]], float_tolerance=0)
+    assert exact['precise'].dtype == np.float32
+
+
+def test_describe_data_reports_memory_saved(sample_dataframe):
+    """describe_data compares memory before and after optimize_dtypes"""
+    df = pd.concat([sample_dataframe] * 20, ignore_index=True)
+    stats = describe_data(df, compare_optimized=True)
+
+    saved = stats['memory_usage'] - stats['memory_usage_optimized']
+    assert stats['memory_saved'] == saved
+    assert stats['memory_saved'] > 0